@@ -1,25 +1,149 @@
+import hmac
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.routing import APIRouter
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, StringConstraints
 
-from services import echo_message_task
+from config.settings import get_setting
+from database.pool import render_prometheus
+from database.session import replica_set
+from services import TaskResult, dispatch_many, dispatch_unique, echo_message_task
 
 api_router = APIRouter(prefix="/v1")
 
 
+async def require_metrics_access(authorization: str | None = Header(None)) -> None:
+    """Serve metrics in DEBUG, else only to `Bearer <METRICS_TOKEN>`; 404 otherwise."""
+    if get_setting("app").DEBUG:
+        return
+    token = get_setting("security").METRICS_TOKEN
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if (
+        token is None
+        or scheme.lower() != "bearer"
+        or not hmac.compare_digest(credentials.encode(), token.get_secret_value().encode())
+    ):
+        raise HTTPException(status_code=404)
+
+
 class EchoTaskRequest(BaseModel):
     message: str = Field(min_length=1, max_length=512)
 
 
+class EchoTaskBatchRequest(BaseModel):
+    messages: list[Annotated[str, StringConstraints(min_length=1, max_length=512)]] = Field(
+        min_length=1, max_length=get_setting("asynctasq").ASYNCTASQ_MAX_BATCH_SIZE
+    )
+
+
 @api_router.post("/tasks/echo", status_code=202)
-async def enqueue_echo_task(payload: EchoTaskRequest) -> dict[str, str]:
-    task_id = await echo_message_task(message=payload.message).dispatch()
+async def enqueue_echo_task(
+    payload: EchoTaskRequest,
+    idempotency_key: str | None = Header(None, max_length=255),
+) -> dict[str, str]:
+    """Retries sending the same `Idempotency-Key` header get the first request's task back."""
+    task = echo_message_task(message=payload.message)
+    if idempotency_key is not None:
+        task_id = await dispatch_unique(task, key=idempotency_key)
+    else:
+        task_id = await task.dispatch()
     return {
         "task_id": task_id,
-        "queue": "default",
+        "queue": task.config["queue"],
         "status": "queued",
     }
 
 
+@api_router.post("/tasks/echo/batch", status_code=202)
+async def enqueue_echo_tasks(payload: EchoTaskBatchRequest) -> dict[str, list[str] | str]:
+    """Enqueue one echo task per message in a single broker round trip."""
+    tasks = [echo_message_task(message=message) for message in payload.messages]
+    task_ids = await dispatch_many(tasks)
+    return {
+        "task_ids": task_ids,
+        "queue": tasks[0].config["queue"],
+        "status": "queued",
+    }
+
+
+@api_router.get("/tasks/{task_id}")
+async def get_task_result(
+    request: Request,
+    task_id: UUID,
+    wait: float = Query(
+        0, ge=0, le=get_setting("asynctasq").ASYNCTASQ_RESULT_MAX_WAIT, description="Seconds"
+    ),
+) -> TaskResult:
+    """
+    A task's status and result, `pending` until a worker picks it up. With `wait`, the
+    request is held until the task finishes or `wait` seconds pass, whichever is first.
+    """
+    results = request.app.state.task_results
+    if wait:
+        return await results.wait(str(task_id), wait)
+    return await results.get(str(task_id))
+
+
+@api_router.get("/tasks/{task_id}/events", response_class=StreamingResponse)
+async def stream_task_result(request: Request, task_id: UUID) -> StreamingResponse:
+    """A task's status changes as server-sent events, until it finishes."""
+    results = request.app.state.task_results
+    timeout = get_setting("asynctasq").ASYNCTASQ_RESULT_MAX_WAIT
+
+    async def events():
+        async for state in results.stream(str(task_id), timeout):
+            yield f"event: {state.status}\ndata: {state.model_dump_json(fallback=str)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_router.get("/health", status_code=200)
 async def health_check() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@api_router.get(
+    "/metrics/cache",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_access)],
+)
+async def cache_metrics(request: Request) -> str:
+    """Cache metrics of this worker in the Prometheus text format."""
+    cache = request.app.state.cache
+    local = cache.local
+    return cache.metrics.render_prometheus(
+        local_entries=len(local) if local is not None else 0,
+        local_bytes=local.size if local is not None else 0,
+    )
+
+
+@api_router.get(
+    "/metrics/db",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_access)],
+)
+async def db_pool_metrics() -> str:
+    """Connection pool metrics of this worker in the Prometheus text format."""
+    return render_prometheus(replica_set.engines)
+
+
+@api_router.get("/debug/cache/top-keys", include_in_schema=False)
+async def cache_top_keys(
+    request: Request, limit: int = Query(20, ge=1, le=500)
+) -> list[dict[str, str | int]]:
+    """Most read cache keys of this worker (version stripped); only available in DEBUG."""
+    if not get_setting("app").DEBUG:
+        raise HTTPException(status_code=404)
+    return [
+        {"key": key, "reads": reads}
+        for key, reads in request.app.state.cache.metrics.top_keys(limit)
+    ]
@@ -0,0 +1,91 @@
+"""Compare cache codecs: stored size and encode/decode cost per payload size.
+
+Usage:
+    PYTHONPATH=. python -m cmd.cache_benchmark [--sizes 10 100 1000] [--rounds 200]
+"""
+
+import argparse
+import time
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any
+
+from core.cache_codec import CacheCodec
+
+CODECS: list[tuple[str, str]] = [
+    ("json", "none"),
+    ("json", "lz4"),
+    ("json", "zstd"),
+    ("msgpack", "none"),
+    ("msgpack", "lz4"),
+    ("msgpack", "zstd"),
+]
+
+
+def _payload(items: int) -> dict[str, Any]:
+    """A list response shaped like a typical paginated endpoint."""
+    created_at = datetime(2024, 1, 1, tzinfo=UTC).isoformat()
+    return {
+        "items": [
+            {
+                "id": i,
+                "title": f"Question number {i} about caching",
+                "body": "How should large list responses be cached? " * 4,
+                "tags": ["cache", "redis", "performance"],
+                "score": i % 50,
+                "is_answered": i % 3 == 0,
+                "created_at": created_at,
+            }
+            for i in range(items)
+        ],
+        "total": items,
+        "page": 1,
+        "size": items,
+    }
+
+
+def _timed(fn: Any, rounds: int) -> float:
+    """Mean microseconds per call."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1_000_000
+
+
+def run(sizes: list[int], rounds: int, threshold: int) -> None:
+    baseline = CacheCodec()
+    print(
+        f"{'items':>6} {'codec':<14} {'json bytes':>11} {'stored':>9} {'saved':>7} "
+        f"{'encode us':>10} {'decode us':>10}"
+    )
+    for size in sizes:
+        data = _payload(size)
+        json_size = len(baseline.dumps(data))
+        for serializer, compression in CODECS:
+            try:
+                codec = CacheCodec(serializer, compression, threshold=threshold)  # type: ignore[arg-type]
+            except RuntimeError:
+                print(f"{size:>6} {serializer}+{compression:<9} skipped (not installed)")
+                continue
+
+            stored = codec.dumps(data)
+            encode_us = _timed(partial(codec.dumps, data), rounds)
+            decode_us = _timed(partial(codec.loads, stored), rounds)
+            saved = 1 - len(stored) / json_size
+            print(
+                f"{size:>6} {serializer + '+' + compression:<14} {json_size:>11} "
+                f"{len(stored):>9} {saved:>7.1%} {encode_us:>10.1f} {decode_us:>10.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--threshold", type=int, default=1024)
+    args = parser.parse_args()
+    run(args.sizes, args.rounds, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,9 @@ from core.exception_handler import SecurityAwareExceptionHandler
 
 # from core.key_manager import KeyManager
 from core.limiter import limiter
+from core.middlewares import get_query_stats_middleware, get_read_your_writes_middleware
+from database.session import replica_set
+from services import get_result_backend
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +33,17 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     app.state.limiter = limiter
     app.state.cache = Cache()
+    await app.state.cache.start()
+    await replica_set.start()
+    app.state.task_results = get_result_backend()
+    await app.state.task_results.start()
     # app.state.key_manager = KeyManager(cache=app.state.cache)
     try:
         async with get_asynctasq_integration().lifespan(app):
             yield
     finally:
+        await app.state.task_results.close()
+        await replica_set.close()
         await app.state.cache.close()
 
 
@@ -65,6 +74,9 @@ def get_app() -> FastAPI:
             allowed_hosts=[__security_settings.ALLOWED_HOSTS],  # type: ignore
         )
     app.add_middleware(SlowAPIMiddleware)
+    get_query_stats_middleware(app)
+    if replica_set.replicas:
+        get_read_your_writes_middleware(app)
 
     @app.exception_handler(RateLimitExceeded)
     async def rate_limit_handler(request: Request, exc: RateLimitExceeded) -> Response:
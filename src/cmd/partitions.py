@@ -0,0 +1,53 @@
+"""Create upcoming partitions of partitioned tables and detach or drop expired ones.
+
+Usage:
+    PYTHONPATH=. python -m cmd.partitions [--drop] [--table events]
+"""
+
+import argparse
+import asyncio
+
+import models  # noqa: F401  (registers the mapped models)
+from database.base import Base
+from database.partitioning import ensure_partitions, expire_partitions
+from database.session import engine
+
+
+async def run(drop: bool, names: list[str] | None) -> None:
+    tables = [
+        table
+        for table in Base.metadata.sorted_tables
+        if "partition_interval" in table.info and (not names or table.name in names)
+    ]
+    try:
+        for table in tables:
+            interval = table.info["partition_interval"]
+            retention = table.info["partition_retention"]
+            # One transaction per table, so a failure leaves the other tables maintained.
+            async with engine.begin() as connection:
+                created = await connection.run_sync(
+                    ensure_partitions, table, interval, table.info["partition_ahead"]
+                )
+                expired = []
+                if retention is not None:
+                    expired = await connection.run_sync(
+                        expire_partitions, table, retention, interval, drop
+                    )
+            print(
+                f"{table.name}: created {[p.name for p in created]}, "
+                f"{'dropped' if drop else 'detached'} {[p.name for p in expired]}"
+            )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drop", action="store_true", help="drop expired partitions")
+    parser.add_argument("--table", action="append", dest="tables", help="table name")
+    args = parser.parse_args()
+    asyncio.run(run(args.drop, args.tables))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Purge soft-deleted rows past their retention, or move them to their archive tables.
+
+Usage:
+    PYTHONPATH=. python -m cmd.purge_deleted [--days 30] [--batch-size 1000] [--model Question]
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+
+import models  # noqa: F401  (registers the mapped models)
+from config.settings import get_setting
+from database.base import Base, BaseModelWithDeleted
+from database.session import AsyncLocalSession, engine
+from repositories import BaseRepository
+
+
+def soft_deleted_models() -> list[type[BaseModelWithDeleted]]:
+    return sorted(
+        (
+            mapper.class_
+            for mapper in Base.registry.mappers
+            if issubclass(mapper.class_, BaseModelWithDeleted)
+        ),
+        key=lambda model: model.__name__,
+    )
+
+
+async def purge(model: type[BaseModelWithDeleted], older_than: timedelta, batch_size: int) -> int:
+    """Purge `model`'s expired tombstones, one short transaction per batch."""
+    repository = type(f"{model.__name__}Repository", (BaseRepository,), {"model": model})
+    total = 0
+    while True:
+        async with AsyncLocalSession() as session, session.begin():
+            purged = await repository(session).purge_deleted(older_than, batch_size)
+        total += purged
+        if purged < batch_size:
+            return total
+
+
+async def run(days: int, batch_size: int, names: list[str] | None) -> None:
+    try:
+        for model in soft_deleted_models():
+            if names and model.__name__ not in names:
+                continue
+            purged = await purge(model, timedelta(days=days), batch_size)
+            action = "archived" if model.__archive_table__ else "purged"
+            print(f"{model.__tablename__}: {purged} rows {action}")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    db_settings = get_setting("db")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=db_settings.DATABASE_SOFT_DELETE_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=db_settings.DATABASE_PURGE_BATCH_SIZE)
+    parser.add_argument("--model", action="append", dest="models", help="model class name")
+    args = parser.parse_args()
+    asyncio.run(run(args.days, args.batch_size, args.models))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Run an asynctasq worker over the configured queues, recording task states and results.
+
+Queues come from ASYNCTASQ_QUEUES, each with its priority (weight), concurrency and
+prefetch; the worker's total concurrency defaults to the sum of theirs.
+
+Usage:
+    PYTHONPATH=. python -m cmd.worker [--queues interactive,bulk] [--concurrency 24]
+"""
+
+import argparse
+import asyncio
+from cmd.asynq import get_asynctasq_integration
+
+from asynctasq.config import Config
+from asynctasq.core.driver_factory import DriverFactory
+from asynctasq.monitoring import EventRegistry
+
+from config.settings import get_setting
+from services import (
+    RecordingTaskExecutor,
+    WeightedQueueWorker,
+    get_process_pool,
+    get_result_backend,
+)
+
+
+async def run(names: list[str] | None, concurrency: int | None) -> None:
+    queues = get_setting("asynctasq").QUEUES
+    if names:
+        unknown = set(names) - set(queues)
+        if unknown:
+            raise SystemExit(f"Undeclared queues: {', '.join(sorted(unknown))}")
+        queues = {name: queues[name] for name in names}
+    get_asynctasq_integration()  # configures asynctasq
+    config = Config.get()
+    EventRegistry.init()
+    results = get_result_backend()
+    worker = WeightedQueueWorker(
+        DriverFactory.create(config.driver, config), queues, concurrency=concurrency
+    )
+    worker._task_executor = RecordingTaskExecutor(results)
+    try:
+        await worker.start()
+    finally:
+        get_process_pool().shutdown()
+        await results.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queues", help="comma-separated subset of the configured queues")
+    parser.add_argument("--concurrency", type=int, help="cap on the tasks running at once")
+    args = parser.parse_args()
+    names = [name.strip() for name in args.queues.split(",")] if args.queues else None
+    asyncio.run(run(names, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import Literal, overload
 
+from pydantic import BaseModel, Field, SecretStr
 from pydantic.networks import AmqpDsn, PostgresDsn, RedisDsn
 from pydantic_settings import BaseSettings as _BaseSettings
 from pydantic_settings import SettingsConfigDict
@@ -45,10 +46,53 @@ class DBSettings(BaseSettings):
     MIN_CONNECTIONS: int
     MAX_OVERFLOW: int
     TIMEOUT: int
+    DATABASE_REPLICA_URLS: list[PostgresDsn] = []
+    DATABASE_REPLICA_BALANCING: Literal["round_robin", "least_connections"] = "round_robin"
+    DATABASE_REPLICA_MAX_LAG: float = 5.0
+    DATABASE_REPLICA_CHECK_INTERVAL: float = 5.0
+    DATABASE_READ_YOUR_WRITES_WINDOW: float = 5.0
+    DATABASE_READONLY_AUTOCOMMIT: bool = False
+    DATABASE_SLOW_QUERY_THRESHOLD: float = 0.5
+    DATABASE_QUERY_BUDGET: int = 50
+    DATABASE_QUERY_BUDGET_STRICT: bool = False
+    DATABASE_N_PLUS_ONE_THRESHOLD: int = 5
+    DATABASE_SOFT_DELETE_RETENTION_DAYS: int = 30
+    DATABASE_PURGE_BATCH_SIZE: int = 1000
 
 
 class RedisSettings(BaseSettings):
     REDIS_DSN: RedisDsn
+    REDIS_BACKEND: Literal["redis", "sharded", "cluster", "memory"] = "redis"
+    REDIS_SHARD_DSNS: list[RedisDsn] = []
+    REDIS_SHARD_VNODES: int = 160
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float | None = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float | None = 5.0
+    REDIS_SOCKET_KEEPALIVE: bool = True
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_LOCAL_CACHE_ENABLED: bool = False
+    REDIS_LOCAL_CACHE_MAX_ENTRIES: int = 10_000
+    REDIS_LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    REDIS_LOCAL_CACHE_MAX_ITEM_BYTES: int = 256 * 1024
+    REDIS_LOCAL_CACHE_TTL: int = 5
+    REDIS_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    REDIS_VERSION_MEMO_TTL: float = 1.0
+    REDIS_VERSION_MEMO_MAX_ENTRIES: int = 1024
+    REDIS_SWEEP_INTERVAL: float = 300.0
+    REDIS_SWEEP_BATCH_SIZE: int = 500
+    REDIS_CACHE_SERIALIZER: Literal["json", "msgpack"] = "json"
+    REDIS_CACHE_COMPRESSION: Literal["none", "zstd", "lz4"] = "none"
+    REDIS_CACHE_COMPRESSION_THRESHOLD: int = 1024
+
+
+class QueueSettings(BaseModel):
+    # Share of the worker's picks while several queues are backlogged (weighted fair).
+    priority: int = Field(1, ge=1)
+    # Tasks of the queue running at once on a worker.
+    concurrency: int = Field(10, ge=1)
+    # Tasks taken off the broker per poll, held by the worker until a slot frees up.
+    prefetch: int = Field(1, ge=1)
 
 
 class AsyncTasQSettings(BaseSettings):
@@ -58,6 +102,23 @@ class AsyncTasQSettings(BaseSettings):
     ASYNCTASQ_BROKER_URL: RedisDsn | AmqpDsn
     ASYNCTASQ_TASK_DEFAULTS_RETRY_POLICY: dict
     ASYNCTASQ_RESULT_BACKEND_URL: RedisDsn | AmqpDsn
+    ASYNCTASQ_MAX_BATCH_SIZE: int = 1000
+    ASYNCTASQ_RESULT_TTL: int = 24 * 60 * 60
+    ASYNCTASQ_RESULT_CHANNEL: str = "asynctasq:results"
+    ASYNCTASQ_RESULT_MAX_WAIT: float = 30.0
+    ASYNCTASQ_DEDUP_WINDOW: float = 5 * 60
+    # E.g. {"interactive": {"priority": 4, "concurrency": 20}, "bulk": {"concurrency": 4}}
+    ASYNCTASQ_QUEUES: dict[str, QueueSettings] = {}
+    # Task (`module.function`) glob patterns to queue names, the first match wins.
+    ASYNCTASQ_TASK_ROUTES: dict[str, str] = {}
+    # Processes running `executor="process"` tasks, one per core by default.
+    ASYNCTASQ_PROCESS_POOL_SIZE: int | None = None
+    ASYNCTASQ_PROCESS_MAX_TASKS_PER_CHILD: int = 100
+
+    @property
+    def QUEUES(self) -> dict[str, QueueSettings]:
+        """The declared queues, else the default queue alone."""
+        return self.ASYNCTASQ_QUEUES or {self.ASYNCTASQ_TASK_DEFAULTS_QUEUE: QueueSettings()}
 
 
 class SecuritySettings(BaseSettings):
@@ -65,6 +126,10 @@ class SecuritySettings(BaseSettings):
     ALLOWED_METHODS: list[str]
     ALLOWED_HEADERS: list[str]
     ALLOWED_HOSTS: list[str]
+    # Signs pagination cursors; only required by endpoints using `paginate_cursor`.
+    CURSOR_SECRET_KEY: SecretStr | None = None
+    # Bearer token for the /metrics endpoints outside DEBUG; unset, they are not served.
+    METRICS_TOKEN: SecretStr | None = None
 
 
 SettingsName = Literal["db", "http", "app", "redis", "security", "asynctasq"]
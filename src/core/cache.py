@@ -1,96 +1,691 @@
-import json
+import asyncio
+import hashlib
+import logging
+import re
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine, Iterable, Mapping
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Any
 from uuid import uuid4
 
-from pydantic import TypeAdapter
-from redis.asyncio.client import Redis
-from redis.asyncio.connection import ConnectionPool
-from redis.typing import DecodedT, EncodableT, ResponseT
+from pydantic import TypeAdapter, ValidationError
+from redis.exceptions import RedisError
+from redis.typing import EncodableT
 
 from config.settings import get_setting
+from core.cache_backends import CacheBackend, Command, create_backend
+from core.cache_codec import CacheCodec, get_cache_codec
+from core.cache_metrics import CacheMetrics, LookupResult
+
+logger = logging.getLogger(__name__)
+
+# Key segments after a namespace prefix that hold bookkeeping rather than a version.
+_RESERVED_SEGMENTS = ("cache", "tag")
+
+
+def _glob_escape(value: str) -> str:
+    """Escape the glob metacharacters of a SCAN MATCH pattern."""
+    return re.sub(r"([*?\[\]\\])", r"\\\1", value)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag of a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+@lru_cache(maxsize=256)
+def get_type_adapter(response_type: Any) -> TypeAdapter:
+    """Return a TypeAdapter for `response_type`, built once per type."""
+    return TypeAdapter(response_type)
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL, used as L1 in front of Redis."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        max_item_bytes: int | None = None,
+    ):
+        """
+        Initialize the local cache.
+
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used.
+            max_bytes: Maximum total payload size in bytes kept before evicting.
+            ttl: Default TTL in seconds for local entries.
+            max_item_bytes: Entries larger than this are never stored locally.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_item_bytes = max_item_bytes or max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the locally cached payloads."""
+        return self._size
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, (bytes, bytearray, str)):
+            return len(value)
+        return sys.getsizeof(value)
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store a value, evicting least recently used entries to honor the bounds."""
+        size = self._sizeof(value)
+        self._pop(key)
+        if size > self.max_item_bytes:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._size += size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size > self.max_bytes
+        ):
+            self._pop(next(iter(self._entries)))
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+
+class CachePipeline:
+    """Commands queued on a Cache and sent in a single round trip, see `Cache.pipeline`."""
+
+    def __init__(self):
+        self.commands: list[Command] = []
+        self.written: list[str] = []
+        self.results: list[Any] = []
+
+    def get(self, key: str) -> "CachePipeline":
+        self.commands.append(("get", (key,)))
+        return self
+
+    def set(
+        self, key: str, value: str | bytes | int | float | bool | EncodableT, ttl: int = 3600
+    ) -> "CachePipeline":
+        self.commands.append(("set", (key, value, ttl)))
+        self.written.append(key)
+        return self
+
+    def delete(self, *keys: str) -> "CachePipeline":
+        self.commands.append(("delete", keys))
+        self.written.extend(keys)
+        return self
+
+    def tag(self, tag_key: str, *keys: str, ttl: int = 3600) -> "CachePipeline":
+        """Record `keys` under `tag_key`, see `Cache.invalidate_tags`."""
+        self.commands.append(("sadd", (tag_key, keys, ttl)))
+        return self
 
 
 class Cache:
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        local_cache: LocalCache | None = None,
+        backend: CacheBackend | None = None,
+        **kwargs,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            local_cache: L1 cache to use instead of the one configured in `RedisSettings`.
+            backend: Storage backend; defaults to the topology selected by `REDIS_BACKEND`.
+        """
         __settings = get_setting("redis")
-        host, port, password = (
-            __settings.REDIS_DSN.host,
-            __settings.REDIS_DSN.port,
-            __settings.REDIS_DSN.password,
-        )
+        self.backend = backend or create_backend(__settings)
 
-        self._pool = ConnectionPool(
-            host=host,
-            port=port or 6379,
-            db=0,
-            password=password,
-            max_connections=20,
+        if local_cache is None and __settings.REDIS_LOCAL_CACHE_ENABLED:
+            local_cache = LocalCache(
+                max_entries=__settings.REDIS_LOCAL_CACHE_MAX_ENTRIES,
+                max_bytes=__settings.REDIS_LOCAL_CACHE_MAX_BYTES,
+                ttl=__settings.REDIS_LOCAL_CACHE_TTL,
+                max_item_bytes=__settings.REDIS_LOCAL_CACHE_MAX_ITEM_BYTES,
+            )
+        self.local = local_cache
+        self.versions = LocalCache(
+            max_entries=__settings.REDIS_VERSION_MEMO_MAX_ENTRIES,
+            max_bytes=__settings.REDIS_VERSION_MEMO_MAX_ENTRIES * 64,
+            ttl=__settings.REDIS_VERSION_MEMO_TTL,
         )
-        self._redis = Redis(connection_pool=self._pool)
+        self.metrics = CacheMetrics()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._background: set[asyncio.Task] = set()
+        self._node_id = uuid4().hex
+        self._channel = __settings.REDIS_INVALIDATION_CHANNEL
+        self._listener: asyncio.Task | None = None
+        self._drops = 0
+        self._namespaces: dict[str, str] = {}
+        self._sweep_interval = __settings.REDIS_SWEEP_INTERVAL
+        self._sweep_batch_size = __settings.REDIS_SWEEP_BATCH_SIZE
+
+    async def start(self) -> None:
+        """Start listening for invalidation broadcasts, and sweeping dead versions."""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
+            if self._sweep_interval > 0:
+                self.spawn(self._sweep_periodically())
 
     async def close(self):
-        """Close the redis client and disconnect the connection pool."""
-        try:
-            await self._redis.close()
-        finally:
-            await self._pool.disconnect()
+        """Stop background tasks and close the backend connections."""
+        tasks = [*self._background, *([self._listener] if self._listener else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listener = None
+        await self.backend.close()
 
     async def __aenter__(self):
+        await self.start()
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
         await self.close()
 
+    async def _listen_invalidations(self) -> None:
+        """Drop local entries invalidated elsewhere; reconnect and flush L1 on failures."""
+        backoff = 0.1
+
+        def subscribed() -> None:
+            nonlocal backoff
+            # Messages published while disconnected are lost, so nothing local is trusted.
+            self._drop_local()
+            backoff = 0.1
+
+        def received(data: bytes) -> None:
+            origin, *keys = data.decode("utf-8").split("\n")
+            if origin != self._node_id:
+                self._drop_local(*keys)
+
+        while True:
+            try:
+                await self.backend.listen(self._channel, subscribed, received)
+            except (RedisError, OSError):
+                logger.warning("Cache invalidation listener disconnected, retrying")
+                self._drop_local()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+
+    def _drop_local(self, *keys: str) -> None:
+        self._drops += 1
+        for store in (self.local, self.versions):
+            if store is None:
+                continue
+            if keys:
+                store.delete(*keys)
+            else:
+                store.clear()
+
+    def _invalidation_message(self, *keys: str) -> str:
+        return "\n".join((self._node_id, *keys))
+
+    @staticmethod
+    def _as_stored(value: Any) -> bytes | None:
+        """Return the bytes Redis will hand back for `value`, or None if not predictable."""
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, str):
+            return value.encode("utf-8")
+        return None
+
     async def set(
-        self, key: str, value: str | bytes | int | float | bool | EncodableT, ttl: int = 3600
-    ) -> ResponseT:
-        """Set a value with TTL (seconds)."""
-        return await self._redis.set(key, value, ex=ttl)
+        self,
+        key: str,
+        value: str | bytes | int | float | bool | EncodableT,
+        ttl: int = 3600,
+        local: bool = True,
+        tags: Iterable[str] = (),
+    ) -> bool:
+        """Set a value with TTL (seconds), recording it under `tags` (see `invalidate_tags`)."""
+        commands: list[Command] = [("set", (key, value, ttl))]
+        commands += [("sadd", (tag_key, (key,), ttl)) for tag_key in tags]
+        if self.local is None and len(commands) == 1:
+            with self.metrics.timer("set"):
+                return await self.backend.set(key, value, ttl=ttl)
+
+        if self.local is not None:
+            commands.append(("publish", (self._channel, self._invalidation_message(key))))
+        with self.metrics.timer("set"):
+            result, *_ = await self.backend.execute(commands)
+        if self.local is None:
+            return result
+
+        stored = self._as_stored(value)
+        if local and stored is not None:
+            self.local.set(key, stored, ttl=ttl)
+        else:
+            self.local.delete(key)
+        return result
+
+    async def get(self, key: str, local: bool = True) -> bytes | None:
+        if self.local is None or not local:
+            with self.metrics.timer("get"):
+                return await self.backend.get(key)
 
-    async def get(self, key: str) -> DecodedT:
-        return await self._redis.get(key)
+        value = self.local.get(key)
+        self.metrics.record_local(hit=value is not None)
+        if value is not None:
+            return value
+        drops = self._drops
+        with self.metrics.timer("get"):
+            value = await self.backend.get(key)
+        # Skip the fill if an invalidation arrived while the read was in flight.
+        if value is not None and drops == self._drops:
+            self.local.set(key, value)
+        return value
+
+    async def delete(self, key: str) -> int:
+        if self.local is None:
+            with self.metrics.timer("delete"):
+                return await self.backend.delete(key)
+
+        self.local.delete(key)
+        commands: list[Command] = [
+            ("delete", (key,)),
+            ("publish", (self._channel, self._invalidation_message(key))),
+        ]
+        with self.metrics.timer("delete"):
+            result, _ = await self.backend.execute(commands)
+        return result
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[CachePipeline]:
+        """
+        Queue commands and send them in one round trip when the block exits.
+
+        Results are available in `CachePipeline.results` after the block, in queuing order.
+        Keys written through the pipeline are dropped from the L1 cache of every worker.
+
+        Args:
+            transaction: Wrap the queued commands in MULTI/EXEC.
+        """
+        batch = CachePipeline()
+        yield batch
+        commands = list(batch.commands)
+        broadcast = self.local is not None and bool(batch.written)
+        if broadcast:
+            self.local.delete(*batch.written)
+            commands.append(
+                ("publish", (self._channel, self._invalidation_message(*batch.written)))
+            )
+        if not commands:
+            return
+        with self.metrics.timer("pipeline"):
+            results = await self.backend.execute(commands, transaction=transaction)
+        batch.results = results[:-1] if broadcast else results
+
+    async def mget(self, keys: list[str], local: bool = True) -> list[bytes | None]:
+        """Get several keys in one round trip; missing keys are None."""
+        if not keys:
+            return []
+        if self.local is None or not local:
+            with self.metrics.timer("mget"):
+                return await self.backend.mget(keys)
+
+        values = [self.local.get(key) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is None]
+        for value in values:
+            self.metrics.record_local(hit=value is not None)
+        if not missing:
+            return values
+
+        drops = self._drops
+        with self.metrics.timer("mget"):
+            fetched = dict(zip(missing, await self.backend.mget(missing)))
+        for key, value in fetched.items():
+            if value is not None and drops == self._drops:
+                self.local.set(key, value)
+        return [fetched[key] if value is None else value for key, value in zip(keys, values)]
+
+    async def mset(
+        self,
+        items: Mapping[str, str | bytes | int | float | bool | EncodableT],
+        ttl: int | Mapping[str, int] = 3600,
+        local: bool = True,
+        tags: Mapping[str, Iterable[str]] | None = None,
+    ) -> None:
+        """
+        Set several values in one round trip.
+
+        Args:
+            items: Values by key.
+            ttl: TTL in seconds for every key, or TTLs by key.
+            local: Also keep the written values in the L1 cache, if enabled.
+            tags: Tag keys by key, see `invalidate_tags`.
+        """
+        if not items:
+            return
+        ttls = ttl if isinstance(ttl, Mapping) else dict.fromkeys(items, ttl)
+        async with self.pipeline() as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ttl=ttls[key])
+                for tag_key in (tags or {}).get(key, ()):
+                    pipe.tag(tag_key, key, ttl=ttls[key])
+
+        if self.local is not None and local:
+            for key, value in items.items():
+                stored = self._as_stored(value)
+                if stored is not None:
+                    self.local.set(key, stored, ttl=ttls[key])
+
+    async def delete_many(self, keys: list[str]) -> int:
+        """Delete several keys in one round trip; returns the number of keys removed."""
+        if not keys:
+            return 0
+        async with self.pipeline() as pipe:
+            pipe.delete(*keys)
+        return pipe.results[0]
+
+    async def invalidate_tags(self, *tag_keys: str) -> int:
+        """
+        Delete every key recorded under `tag_keys` (see `set`), and the tag sets themselves.
+
+        Returns:
+            The number of distinct keys invalidated.
+        """
+        if not tag_keys:
+            return 0
+        members = await self.backend.execute([("smembers", (tag_key,)) for tag_key in tag_keys])
+        keys = sorted({member.decode("utf-8") for tagged in members for member in tagged})
+        commands: list[Command] = [("unlink", (*keys, *tag_keys))]
+        if keys and self.local is not None:
+            self._drop_local(*keys)
+            commands.append(("publish", (self._channel, self._invalidation_message(*keys))))
+        with self.metrics.timer("invalidate_tags"):
+            await self.backend.execute(commands)
+        return len(keys)
+
+    def track_namespace(self, prefix: str, version_key: str) -> None:
+        """Have the background sweeper reclaim keys of dead versions under `prefix`."""
+        self._namespaces.setdefault(prefix, version_key)
+
+    async def _live_versions(self, version_key: str) -> frozenset[str]:
+        raw_versions = await self.backend.mget(
+            [version_key, self.previous_version_key(version_key)]
+        )
+        return frozenset(raw.decode("utf-8") for raw in raw_versions if raw is not None)
+
+    async def sweep_versions(self, prefix: str, version_key: str, batch_size: int = 500) -> int:
+        """
+        Unlink keys under `prefix` built with a version other than the current or previous one.
+
+        Keys are expected as `prefix + version + suffix`; the version keys and tag sets are kept,
+        but members of the tag sets whose keys no longer exist (swept or expired) are removed.
+        Every key under `prefix` is taken for one of its own, so namespaces must not nest.
+        Keys are scanned incrementally and unlinked in batches, so Redis is never blocked.
+
+        Args:
+            prefix: The namespace prefix, e.g. ":users:".
+            version_key: The key holding the namespace's current version.
+            batch_size: Keys per SCAN step and per UNLINK call.
+
+        Returns:
+            The number of keys removed.
+        """
+        if not await self._live_versions(version_key):
+            return 0
+
+        async def unlink(keys: list[str]) -> int:
+            # Versions read before the scan may have rotated since; never drop a live one.
+            live = {*await self._live_versions(version_key), *_RESERVED_SEGMENTS}
+            return await self.backend.unlink(
+                *(key for key in keys if key[len(prefix) :].split(":", 1)[0] not in live)
+            )
+
+        removed, batch, tag_keys = 0, [], set()
+        async for key in self.backend.scan(f"{_glob_escape(prefix)}*", batch_size):
+            if key.startswith(f"{prefix}tag:"):
+                tag_keys.add(key)
+            batch.append(key)
+            if len(batch) >= batch_size:
+                removed += await unlink(batch)
+                batch = []
+        if batch:
+            removed += await unlink(batch)
+        for tag_key in sorted(tag_keys):
+            await self._prune_tag(tag_key, batch_size)
+        return removed
+
+    async def _prune_tag(self, tag_key: str, batch_size: int) -> int:
+        """Remove the members of a tag set whose keys no longer exist; returns how many."""
+        # Every write refreshes the set's TTL, so without this a hot tag never stops growing.
+        (members,) = await self.backend.execute([("smembers", (tag_key,))])
+        keys = sorted(member.decode("utf-8") for member in members)
+        pruned = 0
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start : start + batch_size]
+            found = await self.backend.execute([("exists", (key,)) for key in batch])
+            gone = [key for key, exists in zip(batch, found) if not exists]
+            if gone:
+                (count,) = await self.backend.execute([("srem", (tag_key, *gone))])
+                pruned += count
+        return pruned
+
+    async def _sweep_periodically(self) -> None:
+        """Sweep every tracked namespace once per interval, across all workers and nodes."""
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            for prefix, version_key in list(self._namespaces.items()):
+                try:
+                    # The lock is left to expire, so each namespace is swept once per interval.
+                    if await self.acquire_lock(f"{prefix}cache:sweep", self._sweep_interval):
+                        removed = await self.sweep_versions(
+                            prefix, version_key, self._sweep_batch_size
+                        )
+                        logger.debug("Swept %d dead cache keys under %s", removed, prefix)
+                except (RedisError, OSError):
+                    logger.warning("Cache sweep failed for %s", prefix, exc_info=True)
+
+    @staticmethod
+    def previous_version_key(version_key: str) -> str:
+        return f"{version_key}:previous"
+
+    async def get_versioned(
+        self,
+        version_key: str,
+        prefix: str,
+        suffix: str,
+        version_ttl: int,
+        local: bool = True,
+        stale: bool = False,
+    ) -> tuple[str, bytes | None, bytes | None]:
+        """
+        Resolve a namespace version and read the key `prefix + version + suffix`.
+
+        The versions are memoized locally for a short window, so the common case is a single
+        read. Otherwise a server-side script resolves (or creates) the version and reads the
+        payload in the same round trip.
+
+        Args:
+            stale: On a miss, also read the payload stored under the previous version.
+
+        Returns:
+            The resolved version, the raw payload and the raw stale payload; missing payloads
+            are None.
+        """
+        memoized = self.versions.get(version_key)
+        if memoized is not None:
+            version, previous = memoized
+            key = f"{prefix}{version}{suffix}"
+            if not stale or previous is None:
+                return version, await self.get(key, local=local), None
+            payload = self.local.get(key) if local and self.local is not None else None
+            if payload is not None:
+                return version, payload, None
+            with self.metrics.timer("mget"):
+                payload, stale_payload = await self.backend.mget(
+                    [key, f"{prefix}{previous}{suffix}"]
+                )
+            return version, payload, stale_payload if payload is None else None
+
+        drops = self._drops
+        with self.metrics.timer("get_versioned"):
+            raw_version, raw_previous, payload, stale_payload = await self.backend.get_versioned(
+                version_key,
+                self.previous_version_key(version_key),
+                str(uuid4()),
+                version_ttl,
+                prefix,
+                suffix,
+                stale,
+            )
+        version = raw_version.decode("utf-8")
+        previous = raw_previous.decode("utf-8") if raw_previous else None
+        if drops == self._drops:
+            self.versions.set(version_key, (version, previous))
+            if local and payload is not None and self.local is not None:
+                self.local.set(f"{prefix}{version}{suffix}", payload)
+        return version, payload, stale_payload
+
+    async def get_version(self, version_key: str, version_ttl: int) -> str:
+        """Get or create the current version stored under `version_key`."""
+        memoized = self.versions.get(version_key)
+        if memoized is not None:
+            return memoized[0]
+
+        raw_version, raw_previous = await self.backend.mget(
+            [version_key, self.previous_version_key(version_key)]
+        )
+        if raw_version:
+            version = raw_version.decode("utf-8")
+        else:
+            version = str(uuid4())
+            if not await self.backend.set(version_key, version, ttl=version_ttl, nx=True):
+                # Another worker created it first; use theirs so both build the same keys.
+                version = (await self.backend.get(version_key) or version.encode()).decode("utf-8")
+        previous = raw_previous.decode("utf-8") if raw_previous else None
+        self.versions.set(version_key, (version, previous))
+        return version
+
+    async def rotate_version(self, version_key: str, version_ttl: int) -> str:
+        """Replace the version under `version_key`, keeping the old one as previous version."""
+        version = str(uuid4())
+        raw_previous = await self.backend.rotate_version(
+            version_key, self.previous_version_key(version_key), version, version_ttl
+        )
+        await self.backend.publish(self._channel, self._invalidation_message(version_key))
+        previous = raw_previous.decode("utf-8") if raw_previous else None
+        self._drop_local(version_key)
+        self.versions.set(version_key, (version, previous))
+        return version
+
+    async def acquire_lock(self, name: str, ttl: float) -> str | None:
+        """Try to take a distributed lock for `ttl` seconds; returns the owner token or None."""
+        token = uuid4().hex
+        if await self.backend.set(name, token, ttl=ttl, nx=True):
+            return token
+        return None
+
+    async def release_lock(self, name: str, token: str) -> None:
+        await self.backend.release_lock(name, token)
+
+    async def single_flight[T](self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `factory` once per key in this process; concurrent callers share its result.
+
+        The shared call is shielded, so a cancelled caller does not cancel it for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
 
-    async def delete(self, key: str) -> ResponseT:
-        return await self._redis.delete(key)
+    def spawn(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        """Run `coro` in the background, logging failures; cancelled when the cache closes."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+        return task
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background cache task failed", exc_info=task.exception())
 
 
 class CacheHelper:
     """Generic caching helper for API endpoints with namespace-based invalidation."""
 
     def __init__(
-        self, cache: Cache, namespace: str, ttl: int = 3600, version_ttl: int = 60 * 60 * 24 * 30
+        self,
+        cache: Cache,
+        namespace: str,
+        ttl: int = 3600,
+        version_ttl: int = 60 * 60 * 24 * 30,
+        local: bool = True,
+        codec: CacheCodec | None = None,
     ):
         """
         Initialize the cache helper.
 
         Args:
             cache: The Cache instance to use.
-            namespace: A unique namespace identifier (e.g., "community_qa", "users").
+            namespace: A unique namespace identifier (e.g., "community_qa", "users"), without
+                ":" so that no namespace's keys fall under another's prefix.
             ttl: Default TTL in seconds for cached responses.
             version_ttl: TTL in seconds for the cache version key.
+            local: Whether responses may be served from the in-process L1 cache, if enabled.
+            codec: Payload encoding; defaults to the codec configured in `RedisSettings`.
         """
+        if not namespace or ":" in namespace:
+            # The sweeper would take the keys of a nested namespace for a dead version's.
+            raise ValueError(f"Invalid cache namespace {namespace!r}: must be non-empty, no ':'")
         self.cache = cache
         self.namespace = namespace
         self.ttl = ttl
         self.version_ttl = version_ttl
+        self.local = local
+        self.codec = codec or get_cache_codec()
+        self._prefix = f":{namespace}:"
         self._version_key = f":{namespace}:cache:version"
-
-    @staticmethod
-    def _normalize_payload(payload: Any) -> str:
-        """Normalize cached payload to string."""
-        if isinstance(payload, (bytes, bytearray)):
-            return payload.decode("utf-8")
-        return str(payload)
+        cache.track_namespace(self._prefix, self._version_key)
 
     async def get_version(self) -> str:
         """Get or create the current cache version for this namespace."""
-        current_version = await self.cache.get(self._version_key)
-        if current_version:
-            return self._normalize_payload(current_version)
+        return await self.cache.get_version(self._version_key, self.version_ttl)
 
-        version = str(uuid4())
-        await self.cache.set(self._version_key, version, ttl=self.version_ttl)
-        return version
+    def _key_suffix(
+        self, scope: str, path: str, query_params: str, user_id: int | None = None
+    ) -> str:
+        user_scope = f":user:{user_id}" if user_id is not None else ""
+        return f":{scope}:{path}:{query_params}{user_scope}"
 
     async def build_cache_key(
         self,
@@ -112,8 +707,199 @@ class CacheHelper:
             A formatted cache key string.
         """
         version = await self.get_version()
-        user_scope = f":user:{user_id}" if user_id is not None else ""
-        return f":{self.namespace}:{version}:{scope}:{path}:{query_params}{user_scope}"
+        return f":{self.namespace}:{version}{self._key_suffix(scope, path, query_params, user_id)}"
+
+    async def lookup(
+        self,
+        scope: str,
+        path: str,
+        query_params: str,
+        response_type: Any,
+        user_id: int | None = None,
+    ) -> tuple[str, Any | None]:
+        """
+        Build the cache key and fetch its cached response in a single Redis round trip.
+
+        Equivalent to `build_cache_key` followed by `get_cached_response`, without the extra
+        round trips for the version lookup.
+
+        Args:
+            scope: Endpoint operation name (e.g., "list_questions", "retrieve_answer").
+            path: Request path (e.g., "/community/questions").
+            query_params: Stringified query parameters.
+            response_type: The Pydantic response model type, or dict/list for raw data.
+            user_id: Optional user ID for user-scoped caching.
+
+        Returns:
+            The cache key (to store the response under on a miss) and the deserialized
+            response, or None if not cached.
+        """
+        key, response, _ = await self._lookup(scope, path, query_params, response_type, user_id)
+        return key, response
+
+    async def _lookup(
+        self,
+        scope: str,
+        path: str,
+        query_params: str,
+        response_type: Any,
+        user_id: int | None = None,
+        stale: bool = False,
+    ) -> tuple[str, Any | None, Any | None]:
+        prefix = self._prefix
+        suffix = self._key_suffix(scope, path, query_params, user_id)
+        version, payload, stale_payload = await self.cache.get_versioned(
+            self._version_key, prefix, suffix, self.version_ttl, local=self.local, stale=stale
+        )
+        cache_key = f"{prefix}{version}{suffix}"
+        stale_response = self._deserialize(stale_payload, response_type)
+        if payload is None and stale_response is not None:
+            # Counted once, as a stale hit rather than a miss.
+            scope, tracked_key = self._parse_key(cache_key)
+            self.cache.metrics.record_lookup(self.namespace, scope, "stale", key=tracked_key)
+            return cache_key, None, stale_response
+        return cache_key, self._read(cache_key, payload, response_type), stale_response
+
+    async def lookup_etag(
+        self,
+        scope: str,
+        path: str,
+        query_params: str,
+        user_id: int | None = None,
+    ) -> str | None:
+        """
+        Return the ETag of the cached response without reading the response itself.
+
+        Only responses cached with `etag=True` have one; see `set_cached_response`.
+
+        Args:
+            scope: Endpoint operation name (e.g., "list_questions", "retrieve_answer").
+            path: Request path (e.g., "/community/questions").
+            query_params: Stringified query parameters.
+            user_id: Optional user ID for user-scoped caching.
+
+        Returns:
+            The ETag, or None if the response is not cached under the current version.
+        """
+        suffix = self._key_suffix(scope, path, query_params, user_id)
+        _, etag, _ = await self.cache.get_versioned(
+            self._version_key,
+            self._prefix,
+            self._etag_key(suffix),
+            self.version_ttl,
+            local=self.local,
+        )
+        return etag.decode("utf-8") if etag is not None else None
+
+    @staticmethod
+    def _etag_key(cache_key: str) -> str:
+        return f"{cache_key}:etag"
+
+    async def get_or_set(
+        self,
+        scope: str,
+        path: str,
+        query_params: str,
+        response_type: Any,
+        loader: Callable[[], Awaitable[Any]],
+        user_id: int | None = None,
+        ttl: int | None = None,
+        is_json: bool = False,
+        lock_timeout: float | None = 10.0,
+        stale_while_revalidate: bool = False,
+        tags: Iterable[str] = (),
+        etag: bool = False,
+    ) -> Any:
+        """
+        Return the cached response, computing and caching it with `loader` on a miss.
+
+        Concurrent misses for the same key in this process share a single `loader` call. With a
+        `lock_timeout`, a Redis lock also lets only one node recompute while the others wait for
+        its result (up to `lock_timeout` seconds, then they compute it themselves).
+
+        Args:
+            scope: Endpoint operation name (e.g., "list_questions", "retrieve_answer").
+            path: Request path (e.g., "/community/questions").
+            query_params: Stringified query parameters.
+            response_type: The Pydantic response model type, or dict/list for raw data.
+            loader: Coroutine function producing the response on a miss.
+            user_id: Optional user ID for user-scoped caching.
+            ttl: Optional override for TTL (uses instance default if None).
+            is_json: Whether `loader` returns raw JSON data (dict/list) or a JSON string.
+            lock_timeout: Distributed lock TTL in seconds, or None to only coalesce in-process.
+            stale_while_revalidate: After `invalidate()`, serve the response cached under the
+                previous version while a single background task refreshes it.
+            tags: Entity tags the response depends on, see `invalidate_tags`.
+            etag: Store the ETag of computed responses, see `lookup_etag`.
+
+        Returns:
+            The cached response, or the one returned by `loader`.
+        """
+        cache_key, response, stale = await self._lookup(
+            scope, path, query_params, response_type, user_id, stale=stale_while_revalidate
+        )
+        if response is not None:
+            return response
+
+        tags = tuple(tags)
+
+        def recompute(wait: bool) -> Callable[[], Awaitable[Any]]:
+            return lambda: self._recompute(
+                cache_key, response_type, loader, ttl, is_json, lock_timeout, wait, tags, etag
+            )
+
+        if stale is not None:
+            refresh = self.cache.single_flight(f"{cache_key}:refresh", recompute(wait=False))
+            self.cache.spawn(refresh)
+            return stale
+        return await self.cache.single_flight(cache_key, recompute(wait=True))
+
+    async def _recompute(
+        self,
+        cache_key: str,
+        response_type: Any,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int | None,
+        is_json: bool,
+        lock_timeout: float | None,
+        wait: bool,
+        tags: tuple[str, ...] = (),
+        etag: bool = False,
+    ) -> Any:
+        lock_key, token = f"{cache_key}:lock", None
+        if lock_timeout:
+            token = await self.cache.acquire_lock(lock_key, lock_timeout)
+            if token is None:
+                # Another node is recomputing; background refreshes just leave it to them.
+                if not wait:
+                    return None
+                response = await self._wait_for(cache_key, response_type, lock_timeout)
+                if response is not None:
+                    return response
+
+        try:
+            response = await loader()
+            if response is not None:
+                await self.set_cached_response(
+                    cache_key, response, ttl=ttl, is_json=is_json, tags=tags, etag=etag
+                )
+            return response
+        finally:
+            if token is not None:
+                await self.cache.release_lock(lock_key, token)
+
+    async def _wait_for(self, cache_key: str, response_type: Any, timeout: float) -> Any | None:
+        """Poll for a response another node is computing, with capped exponential backoff."""
+        deadline, delay = time.monotonic() + timeout, 0.02
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            response = self._deserialize(
+                await self.cache.get(cache_key, local=False), response_type
+            )
+            if response is not None:
+                return response
+            delay = min(delay * 2, 0.5)
+        return None
 
     async def get_cached_response(self, cache_key: str, response_type: Any) -> Any | None:
         """
@@ -126,31 +912,68 @@ class CacheHelper:
         Returns:
             The deserialized response or None if not cached.
         """
-        payload = await self.cache.get(cache_key)
+        payload = await self.cache.get(cache_key, local=self.local)
+        return self._read(cache_key, payload, response_type)
+
+    def _parse_key(self, cache_key: str) -> tuple[str, str]:
+        """Return the scope of a key built by this helper and the key without its version."""
+        parts = cache_key.split(":", 4)
+        if len(parts) < 5 or parts[1] != self.namespace:
+            return "unknown", cache_key
+        _, namespace, _, scope, rest = parts
+        return scope, f":{namespace}:{scope}:{rest}"
+
+    def _read(self, cache_key: str, payload: Any, response_type: Any) -> Any | None:
+        """Deserialize a payload read from `cache_key`, recording the lookup in the metrics."""
+        scope, tracked_key = self._parse_key(cache_key)
         if payload is None:
+            self.cache.metrics.record_lookup(self.namespace, scope, "miss", key=tracked_key)
             return None
 
-        normalized = self._normalize_payload(payload)
-        data = json.loads(normalized)
+        response = self._deserialize(payload, response_type)
+        result: LookupResult = "hit" if response is not None else "error"
+        self.cache.metrics.record_lookup(
+            self.namespace, scope, result, key=tracked_key, size=len(payload)
+        )
+        return response
+
+    def _deserialize(self, payload: Any, response_type: Any) -> Any | None:
+        if payload is None:
+            return None
+
+        # Raw JSON bytes are handed back as-is, e.g. to be streamed straight into a response
+        if response_type is bytes:
+            return self.codec.loads_json(payload)
 
         # If response_type is dict, list, or other built-in types, just parse and return
         if response_type in (dict, list) or not hasattr(response_type, "model_validate"):
-            return data
+            return self.codec.loads(payload)
 
         # Otherwise, validate as Pydantic model
-        try:
-            adapter = TypeAdapter(response_type)
-            return adapter.validate_json(normalized, by_alias=True, by_name=True)
-        except Exception:
+        adapter = get_type_adapter(response_type)
+        serializer, body = self.codec.unframe(payload)
+        if serializer == "json":
             try:
-                return TypeAdapter(response_type).validate_python(
-                    data,
-                    by_alias=True,
-                    by_name=True,
+                return adapter.validate_json(body, by_alias=True, by_name=True)
+            except ValidationError:
+                # Validation is retried below on the decoded payload, which logs if it fails too.
+                logger.debug(
+                    "Cached JSON failed validation, retrying in Python mode", exc_info=True
                 )
-            except Exception:
-                # Log the error and return None if deserialization fails
-                return None
+        try:
+            return adapter.validate_python(
+                self.codec.loads(payload),
+                by_alias=True,
+                by_name=True,
+            )
+        except Exception:
+            # Log the error and return None if deserialization fails
+            logger.warning(
+                "Failed to deserialize cached response",
+                extra={"namespace": self.namespace, "response_type": repr(response_type)},
+                exc_info=True,
+            )
+            return None
 
     async def set_cached_response(
         self,
@@ -158,39 +981,118 @@ class CacheHelper:
         response: Any,
         ttl: int | None = None,
         is_json: bool = False,
+        tags: Iterable[str] = (),
+        etag: bool = False,
     ) -> None:
         """
         Serialize and cache a response.
 
         Args:
             cache_key: The cache key.
-            response: The Pydantic model instance, dict, list, or JSON string to cache.
+            response: The Pydantic model instance, dict, list, or JSON string/bytes to cache.
             ttl: Optional override for TTL (uses instance default if None).
             is_json: Whether the response is raw JSON data (dict/list) or already a JSON string.
+            tags: Entity tags the response depends on, see `invalidate_tags`.
+            etag: Also store the ETag of the JSON body, expiring and invalidated with it.
+        """
+        payload = self._serialize(response, is_json)
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        if not etag:
+            await self.cache.set(
+                cache_key, payload, ttl=ttl or self.ttl, local=self.local, tags=tag_keys
+            )
+            return
+
+        etag_key = self._etag_key(cache_key)
+        await self.cache.mset(
+            {cache_key: payload, etag_key: make_etag(self.codec.loads_json(payload))},
+            ttl=ttl or self.ttl,
+            local=self.local,
+            tags=dict.fromkeys((cache_key, etag_key), tag_keys),
+        )
+
+    async def get_cached_responses(
+        self, cache_keys: list[str], response_type: Any
+    ) -> list[Any | None]:
+        """
+        Retrieve and deserialize several cached responses in one round trip.
+
+        Args:
+            cache_keys: The cache keys.
+            response_type: The Pydantic response model type, or dict/list for raw data.
+
+        Returns:
+            The deserialized responses in `cache_keys` order, None for keys not cached.
         """
+        payloads = await self.cache.mget(cache_keys, local=self.local)
+        return [
+            self._read(key, payload, response_type) for key, payload in zip(cache_keys, payloads)
+        ]
 
+    async def set_cached_responses(
+        self,
+        responses: Mapping[str, Any],
+        ttl: int | Mapping[str, int] | None = None,
+        is_json: bool = False,
+        tags: Mapping[str, Iterable[str]] | None = None,
+    ) -> None:
+        """
+        Serialize and cache several responses in one round trip.
+
+        Args:
+            responses: The responses to cache by cache key, as for `set_cached_response`.
+            ttl: Optional override for TTL, for all keys or by key (uses instance default if None).
+            is_json: Whether the responses are raw JSON data (dict/list) or JSON strings.
+            tags: Entity tags by cache key, see `invalidate_tags`.
+        """
+        await self.cache.mset(
+            {key: self._serialize(response, is_json) for key, response in responses.items()},
+            ttl=self.ttl if ttl is None else ttl,
+            local=self.local,
+            tags={
+                key: [self._tag_key(tag) for tag in key_tags]
+                for key, key_tags in (tags or {}).items()
+            },
+        )
+
+    def _serialize(self, response: Any, is_json: bool) -> bytes:
         if is_json:
             # Response is raw data (dict/list) or already a JSON string
-            if isinstance(response, str):
+            if isinstance(response, (str, bytes)):
                 # Already a JSON string
-                value = response
-            else:
-                value = json.dumps(response)
-        else:
-            value = response.model_dump_json(
-                by_alias=True, exclude_none=False, exclude={"exclusion_fields"}
+                return self.codec.dumps_json(response)
+            return self.codec.dumps(response)
+        if self.codec.serializer == "json":
+            return self.codec.dumps_json(
+                response.model_dump_json(
+                    by_alias=True, exclude_none=False, exclude={"exclusion_fields"}
+                )
+            )
+        return self.codec.dumps(
+            response.model_dump(
+                mode="json", by_alias=True, exclude_none=False, exclude={"exclusion_fields"}
             )
-
-        await self.cache.set(
-            cache_key,
-            value,
-            ttl=ttl or self.ttl,
         )
 
     async def invalidate(self) -> None:
         """Invalidate all cached responses in this namespace by rotating the version key."""
-        await self.cache.set(
-            self._version_key,
-            str(uuid4()),
-            ttl=self.version_ttl,
-        )
+        await self.cache.rotate_version(self._version_key, self.version_ttl)
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}tag:{tag}"
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Invalidate only the cached responses stored with any of `tags`.
+
+        Prefer this over `invalidate()` when a write touches known entities, e.g.
+        `invalidate_tags(f"question:{question_id}")`: the rest of the namespace stays cached.
+
+        Returns:
+            The number of cached responses invalidated.
+        """
+        return await self.cache.invalidate_tags(*(self._tag_key(tag) for tag in tags))
+
+    async def sweep(self, batch_size: int = 500) -> int:
+        """Remove responses cached under dead versions now, instead of waiting for their TTL."""
+        return await self.cache.sweep_versions(self._prefix, self._version_key, batch_size)
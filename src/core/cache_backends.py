@@ -0,0 +1,617 @@
+import asyncio
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect
+from collections.abc import AsyncIterator, Callable, Sequence
+from fnmatch import fnmatchcase
+from typing import Any
+
+from redis.asyncio.client import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.typing import EncodableT
+
+from config.settings import RedisSettings, get_setting
+
+# A queued command: ("get", (key,)), ("set", (key, value, ttl)), ("delete", keys),
+# ("unlink", keys), ("exists", (key,)), ("sadd", (key, members, ttl)), ("smembers", (key,)),
+# ("srem", (key, *members)) or ("publish", (channel, message)).
+# "sadd" keeps the set alive for at least `ttl` seconds, extending but never shortening it.
+Command = tuple[str, tuple[Any, ...]]
+
+# Reads (or creates) a namespace version and the payload stored under it in one round trip.
+# On a miss, also reads the payload stored under the previous version when ARGV[5] is "1".
+# KEYS: version key, previous version key.
+# ARGV: fallback version, version TTL, key prefix, key suffix, stale flag.
+_GET_VERSIONED_LUA = """
+local version = redis.call('GET', KEYS[1])
+if not version then
+    version = ARGV[1]
+    redis.call('SET', KEYS[1], version, 'EX', ARGV[2])
+end
+local previous = redis.call('GET', KEYS[2])
+local payload = redis.call('GET', ARGV[3] .. version .. ARGV[4])
+local stale = false
+if not payload and previous and ARGV[5] == '1' then
+    stale = redis.call('GET', ARGV[3] .. previous .. ARGV[4])
+end
+return {version, previous, payload, stale}
+"""
+
+# Rotates a namespace version, keeping the old one as the previous version.
+# KEYS: version key, previous version key. ARGV: new version, version TTL.
+_ROTATE_VERSION_LUA = """
+local previous = redis.call('GET', KEYS[1])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+if previous then
+    redis.call('SET', KEYS[2], previous, 'EX', ARGV[2])
+end
+return previous
+"""
+
+# Deletes a lock only if it is still held by the caller's token.
+_RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _encode(value: EncodableT) -> bytes:
+    """Encode a value the way redis-py sends it, so reads return the same bytes."""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value).encode("utf-8")
+    raise TypeError(f"Invalid cache value type: {type(value).__name__}")
+
+
+class CacheBackend(ABC):
+    """Storage operations used by `Cache`, so the same Cache runs on any topology."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]: ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: EncodableT, ttl: float | None = None, nx: bool = False
+    ) -> bool:
+        """Set a value with an optional TTL (seconds); with `nx`, only if the key is missing."""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> int: ...
+
+    @abstractmethod
+    async def unlink(self, *keys: str) -> int:
+        """Delete keys, reclaiming their memory off the main thread where supported."""
+
+    @abstractmethod
+    def scan(self, match: str, count: int = 500) -> AsyncIterator[str]:
+        """Iterate over the keys matching the glob pattern `match`, without blocking the server."""
+
+    @abstractmethod
+    async def execute(self, commands: Sequence[Command], transaction: bool = False) -> list[Any]:
+        """Run queued commands in as few round trips as possible, returning their results."""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None: ...
+
+    @abstractmethod
+    async def listen(
+        self,
+        channel: str,
+        on_subscribe: Callable[[], None],
+        on_message: Callable[[bytes], None],
+    ) -> None:
+        """Deliver messages published on `channel` until cancelled or the connection is lost."""
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+    async def get_versioned(
+        self,
+        version_key: str,
+        previous_key: str,
+        fallback_version: str,
+        version_ttl: int,
+        prefix: str,
+        suffix: str,
+        stale: bool,
+    ) -> tuple[bytes, bytes | None, bytes | None, bytes | None]:
+        """
+        Resolve (or create) a version and read `prefix + version + suffix`.
+
+        This generic implementation takes several round trips; backends that can run it
+        server-side override it.
+
+        Returns:
+            The version, the previous version, the payload and, when `stale` is set and the
+            payload is missing, the payload stored under the previous version.
+        """
+        version, previous = await self.mget([version_key, previous_key])
+        if version is None:
+            await self.set(version_key, fallback_version, ttl=version_ttl, nx=True)
+            version = await self.get(version_key) or fallback_version.encode("utf-8")
+
+        payload = await self.get(f"{prefix}{version.decode('utf-8')}{suffix}")
+        stale_payload = None
+        if payload is None and previous is not None and stale:
+            stale_payload = await self.get(f"{prefix}{previous.decode('utf-8')}{suffix}")
+        return version, previous, payload, stale_payload
+
+    async def rotate_version(
+        self, version_key: str, previous_key: str, version: str, version_ttl: int
+    ) -> bytes | None:
+        """Replace the version, keeping the old one under `previous_key`; returns the old one."""
+        previous = await self.get(version_key)
+        commands: list[Command] = [("set", (version_key, version, version_ttl))]
+        if previous is not None:
+            commands.append(("set", (previous_key, previous, version_ttl)))
+        await self.execute(commands)
+        return previous
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Delete a lock if it is still held by `token`."""
+        if await self.get(key) == token.encode("utf-8"):
+            return bool(await self.delete(key))
+        return False
+
+
+class RedisBackend(CacheBackend):
+    """A single Redis server, or a Redis Cluster (without multi-key server-side scripts)."""
+
+    def __init__(self, client: Redis | RedisCluster, pubsub_client: Redis | None = None):
+        self.client = client
+        self._pubsub_client = pubsub_client
+        self._cluster = isinstance(client, RedisCluster)
+        if not self._cluster:
+            self._get_versioned_script = client.register_script(_GET_VERSIONED_LUA)
+            self._rotate_version_script = client.register_script(_ROTATE_VERSION_LUA)
+            self._release_lock_script = client.register_script(_RELEASE_LOCK_LUA)
+
+    @classmethod
+    def from_dsn(cls, dsn: str, settings: RedisSettings, cluster: bool = False) -> "RedisBackend":
+        """Build a backend using the pool, timeout and keepalive options of `settings`."""
+        options: dict[str, Any] = {
+            "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+            "socket_connect_timeout": settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            "socket_keepalive": settings.REDIS_SOCKET_KEEPALIVE,
+            "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        }
+        if cluster:
+            client = RedisCluster.from_url(
+                dsn, max_connections=settings.REDIS_MAX_CONNECTIONS, **options
+            )
+            # Published messages reach every cluster node, so any node can serve subscriptions.
+            return cls(client, pubsub_client=Redis.from_url(dsn, **options))
+
+        # A blocking pool queues callers for up to REDIS_POOL_TIMEOUT when all connections
+        # are busy instead of failing immediately.
+        pool = BlockingConnectionPool.from_url(
+            dsn,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            **options,
+        )
+        return cls(Redis.from_pool(pool))
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(key)
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]:
+        if self._cluster:
+            return await self.client.mget_nonatomic(list(keys))
+        return await self.client.mget(list(keys))
+
+    async def set(
+        self, key: str, value: EncodableT, ttl: float | None = None, nx: bool = False
+    ) -> bool:
+        px = int(ttl * 1000) if ttl else None
+        return bool(await self.client.set(key, value, px=px, nx=nx))
+
+    async def delete(self, *keys: str) -> int:
+        return await self.client.delete(*keys) if keys else 0
+
+    async def unlink(self, *keys: str) -> int:
+        return await self.client.unlink(*keys) if keys else 0
+
+    async def scan(self, match: str, count: int = 500) -> AsyncIterator[str]:
+        async for key in self.client.scan_iter(match=match, count=count):
+            yield key.decode("utf-8")
+
+    @staticmethod
+    def _queue(pipe: Any, name: str, args: tuple[Any, ...]) -> int:
+        """Queue one command on `pipe`; returns the number of replies it produces."""
+        if name == "set":
+            key, value, ttl = args
+            pipe.set(key, value, px=int(ttl * 1000) if ttl else None)
+            return 1
+        if name == "sadd":
+            key, members, ttl = args
+            pipe.sadd(key, *members)
+            # NX gives a new set its TTL, GT extends it for members that live longer.
+            pipe.expire(key, ttl, nx=True)
+            pipe.expire(key, ttl, gt=True)
+            return 3
+        getattr(pipe, name)(*args)
+        return 1
+
+    async def execute(self, commands: Sequence[Command], transaction: bool = False) -> list[Any]:
+        # Cluster pipelines route by key, so keyless PUBLISH commands are sent separately.
+        queued = [c for c in commands if not (self._cluster and c[0] == "publish")]
+        # redis-py pipelines default to MULTI/EXEC; only the cluster one is asked for nothing.
+        pipe = (
+            self.client.pipeline()
+            if self._cluster and not transaction
+            else self.client.pipeline(transaction=transaction)
+        )
+        async with pipe:
+            replies = iter([self._queue(pipe, name, args) for name, args in queued])
+            results = iter(await pipe.execute())
+
+        output = []
+        for name, args in commands:
+            if self._cluster and name == "publish":
+                output.append(await self.client.publish(*args))
+                continue
+            # Keep the first reply of commands sent as several (e.g. SADD + EXPIRE).
+            first, *_ = [next(results) for _ in range(next(replies))]
+            output.append(first)
+        return output
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(channel, message)
+
+    async def listen(
+        self,
+        channel: str,
+        on_subscribe: Callable[[], None],
+        on_message: Callable[[bytes], None],
+    ) -> None:
+        client = self._pubsub_client or self.client
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            on_subscribe()
+            while True:
+                # Polling with a timeout keeps idle subscriptions clear of socket_timeout.
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None and message["type"] == "message":
+                    on_message(message["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        try:
+            await self.client.aclose()
+        finally:
+            if self._pubsub_client is not None:
+                await self._pubsub_client.aclose()
+
+    async def get_versioned(
+        self,
+        version_key: str,
+        previous_key: str,
+        fallback_version: str,
+        version_ttl: int,
+        prefix: str,
+        suffix: str,
+        stale: bool,
+    ) -> tuple[bytes, bytes | None, bytes | None, bytes | None]:
+        if self._cluster:
+            return await super().get_versioned(
+                version_key, previous_key, fallback_version, version_ttl, prefix, suffix, stale
+            )
+        return await self._get_versioned_script(
+            keys=[version_key, previous_key],
+            args=[fallback_version, version_ttl, prefix, suffix, int(stale)],
+        )
+
+    async def rotate_version(
+        self, version_key: str, previous_key: str, version: str, version_ttl: int
+    ) -> bytes | None:
+        if self._cluster:
+            return await super().rotate_version(version_key, previous_key, version, version_ttl)
+        return await self._rotate_version_script(
+            keys=[version_key, previous_key], args=[version, version_ttl]
+        )
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        if self._cluster:
+            return await super().release_lock(key, token)
+        return bool(await self._release_lock_script(keys=[key], args=[token]))
+
+
+class ShardedRedisBackend(CacheBackend):
+    """
+    Client-side consistent hashing over independent Redis nodes.
+
+    Every key lives on exactly one node; adding or removing a node only remaps the keys of
+    its ring segments. Invalidation messages go through the first node.
+    """
+
+    def __init__(self, nodes: Sequence[RedisBackend], vnodes: int = 160):
+        if not nodes:
+            raise ValueError("ShardedRedisBackend needs at least one node")
+        self.nodes = list(nodes)
+        ring = sorted(
+            (self._hash(f"{index}:{vnode}"), index)
+            for index in range(len(self.nodes))
+            for vnode in range(vnodes)
+        )
+        self._ring_hashes = [point for point, _ in ring]
+        self._ring_nodes = [index for _, index in ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest())
+
+    def _node_index(self, key: str) -> int:
+        position = bisect(self._ring_hashes, self._hash(key)) % len(self._ring_hashes)
+        return self._ring_nodes[position]
+
+    def node_for(self, key: str) -> RedisBackend:
+        return self.nodes[self._node_index(key)]
+
+    def _group(self, keys: Sequence[str]) -> dict[int, list[int]]:
+        """Positions of `keys` grouped by the index of the node owning them."""
+        groups: dict[int, list[int]] = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(self._node_index(key), []).append(position)
+        return groups
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.node_for(key).get(key)
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]:
+        groups = self._group(keys)
+        fetched = await asyncio.gather(
+            *(
+                self.nodes[node].mget([keys[p] for p in positions])
+                for node, positions in groups.items()
+            )
+        )
+        values: list[bytes | None] = [None] * len(keys)
+        for positions, node_values in zip(groups.values(), fetched):
+            for position, value in zip(positions, node_values):
+                values[position] = value
+        return values
+
+    async def set(
+        self, key: str, value: EncodableT, ttl: float | None = None, nx: bool = False
+    ) -> bool:
+        return await self.node_for(key).set(key, value, ttl=ttl, nx=nx)
+
+    async def delete(self, *keys: str) -> int:
+        groups = self._group(keys)
+        deleted = await asyncio.gather(
+            *(
+                self.nodes[node].delete(*(keys[p] for p in positions))
+                for node, positions in groups.items()
+            )
+        )
+        return sum(deleted)
+
+    async def unlink(self, *keys: str) -> int:
+        groups = self._group(keys)
+        deleted = await asyncio.gather(
+            *(
+                self.nodes[node].unlink(*(keys[p] for p in positions))
+                for node, positions in groups.items()
+            )
+        )
+        return sum(deleted)
+
+    async def scan(self, match: str, count: int = 500) -> AsyncIterator[str]:
+        for node in self.nodes:
+            async for key in node.scan(match, count):
+                yield key
+
+    async def execute(self, commands: Sequence[Command], transaction: bool = False) -> list[Any]:
+        # Multi-key deletes are split so every queued command targets a single node.
+        flat: list[tuple[int, Command]] = []
+        publishes: list[tuple[int, Command]] = []
+        for position, (name, args) in enumerate(commands):
+            if name in ("delete", "unlink"):
+                flat.extend((position, (name, (key,))) for key in args)
+            elif name == "publish":
+                publishes.append((position, (name, args)))
+            else:
+                flat.append((position, (name, args)))
+
+        groups: dict[int, list[tuple[int, Command]]] = {}
+        for position, command in flat:
+            groups.setdefault(self._node_index(command[1][0]), []).append((position, command))
+        if transaction and len(groups) > 1:
+            raise ValueError("A transaction cannot span several shards")
+
+        results = await asyncio.gather(
+            *(
+                self.nodes[node].execute([command for _, command in queued], transaction)
+                for node, queued in groups.items()
+            )
+        )
+        # Keyless broadcasts go through node 0 (where `listen` subscribes), after the writes
+        # they announce and outside their transaction.
+        batches = list(zip(groups.values(), results))
+        if publishes:
+            published = await self.nodes[0].execute([command for _, command in publishes])
+            batches.append((publishes, published))
+
+        output: list[Any] = [0 if name in ("delete", "unlink") else None for name, _ in commands]
+        for queued, node_results in batches:
+            for (position, (name, _)), result in zip(queued, node_results):
+                if name in ("delete", "unlink"):
+                    output[position] += result
+                else:
+                    output[position] = result
+        return output
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.nodes[0].publish(channel, message)
+
+    async def listen(
+        self,
+        channel: str,
+        on_subscribe: Callable[[], None],
+        on_message: Callable[[bytes], None],
+    ) -> None:
+        await self.nodes[0].listen(channel, on_subscribe, on_message)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(node.close() for node in self.nodes))
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        return await self.node_for(key).release_lock(key, token)
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process backend with Redis semantics, for tests and benchmarks.
+
+    Data and pub/sub are local to this instance; share one instance between Cache objects to
+    simulate several workers.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, bytes | set[bytes]]] = {}
+        self._subscribers: dict[str, set[asyncio.Queue[bytes]]] = {}
+
+    def _read(self, key: str) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _write(self, key: str, value: EncodableT, ttl: float | None, nx: bool = False) -> bool:
+        if nx and self._read(key) is not None:
+            return False
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (expires_at, _encode(value))
+        return True
+
+    def _remove(self, *keys: str) -> int:
+        return sum(self._read(key) is not None and self._data.pop(key) is not None for key in keys)
+
+    def _add(self, key: str, members: Sequence[EncodableT], ttl: float) -> int:
+        current = self._read(key)
+        entries = set() if current is None else current
+        expires_at = time.monotonic() + ttl
+        if current is not None and self._data[key][0] is not None:
+            expires_at = max(expires_at, self._data[key][0])
+        added = {_encode(member) for member in members} - entries
+        self._data[key] = (expires_at, entries | added)
+        return len(added)
+
+    def _discard(self, key: str, *members: EncodableT) -> int:
+        entries = self._read(key)
+        if entries is None:
+            return 0
+        removed = entries & {_encode(member) for member in members}
+        entries -= removed
+        if not entries:  # Like Redis, an emptied set no longer exists.
+            del self._data[key]
+        return len(removed)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._read(key)
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]:
+        return [self._read(key) for key in keys]
+
+    async def set(
+        self, key: str, value: EncodableT, ttl: float | None = None, nx: bool = False
+    ) -> bool:
+        return self._write(key, value, ttl, nx=nx)
+
+    async def delete(self, *keys: str) -> int:
+        return self._remove(*keys)
+
+    async def unlink(self, *keys: str) -> int:
+        return self._remove(*keys)
+
+    async def scan(self, match: str, count: int = 500) -> AsyncIterator[str]:
+        for key in list(self._data):
+            if fnmatchcase(key, match) and self._read(key) is not None:
+                yield key
+
+    async def execute(self, commands: Sequence[Command], transaction: bool = False) -> list[Any]:
+        results: list[Any] = []
+        for name, args in commands:
+            if name == "get":
+                results.append(self._read(args[0]))
+            elif name == "set":
+                results.append(self._write(*args))
+            elif name in ("delete", "unlink"):
+                results.append(self._remove(*args))
+            elif name == "exists":
+                results.append(int(self._read(args[0]) is not None))
+            elif name == "sadd":
+                results.append(self._add(*args))
+            elif name == "smembers":
+                results.append(set(self._read(args[0]) or ()))
+            elif name == "srem":
+                results.append(self._discard(*args))
+            elif name == "publish":
+                results.append(self._publish(*args))
+            else:
+                raise ValueError(f"Unsupported command: {name}")
+        return results
+
+    def _publish(self, channel: str, message: str) -> int:
+        subscribers = self._subscribers.get(channel, set())
+        for queue in subscribers:
+            queue.put_nowait(_encode(message))
+        return len(subscribers)
+
+    async def publish(self, channel: str, message: str) -> None:
+        self._publish(channel, message)
+
+    async def listen(
+        self,
+        channel: str,
+        on_subscribe: Callable[[], None],
+        on_message: Callable[[bytes], None],
+    ) -> None:
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            on_subscribe()
+            while True:
+                on_message(await queue.get())
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    async def close(self) -> None:
+        return None
+
+
+def create_backend(settings: RedisSettings | None = None) -> CacheBackend:
+    """Build the cache backend selected by `REDIS_BACKEND`."""
+    settings = settings or get_setting("redis")
+    match settings.REDIS_BACKEND:
+        case "memory":
+            return MemoryBackend()
+        case "cluster":
+            return RedisBackend.from_dsn(str(settings.REDIS_DSN), settings, cluster=True)
+        case "sharded":
+            dsns = settings.REDIS_SHARD_DSNS or [settings.REDIS_DSN]
+            return ShardedRedisBackend(
+                [RedisBackend.from_dsn(str(dsn), settings) for dsn in dsns],
+                vnodes=settings.REDIS_SHARD_VNODES,
+            )
+        case _:
+            return RedisBackend.from_dsn(str(settings.REDIS_DSN), settings)
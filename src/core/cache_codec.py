@@ -0,0 +1,171 @@
+import importlib
+import json
+from functools import cache, lru_cache
+from types import ModuleType
+from typing import Any, Literal
+
+from config.settings import get_setting
+
+Serializer = Literal["json", "msgpack"]
+Compression = Literal["none", "zstd", "lz4"]
+
+# Framed payloads start with a NUL byte, which plain JSON entries written before the codec
+# existed can never start with. The next two bytes identify the serializer and compression.
+_MAGIC = b"\x00"
+_HEADER_SIZE = 3
+_SERIALIZERS: dict[Serializer, int] = {"json": 0, "msgpack": 1}
+_COMPRESSIONS: dict[Compression, int] = {"none": 0, "zstd": 1, "lz4": 2}
+_SERIALIZER_NAMES = {v: k for k, v in _SERIALIZERS.items()}
+_COMPRESSION_NAMES = {v: k for k, v in _COMPRESSIONS.items()}
+
+
+@cache
+def _optional_module(name: str) -> ModuleType:
+    try:
+        return importlib.import_module(name)
+    except ImportError as exc:
+        raise RuntimeError(
+            f"'{name}' is required by the configured cache codec; install the 'cache' extra."
+        ) from exc
+
+
+@cache
+def _orjson() -> ModuleType | None:
+    try:
+        return importlib.import_module("orjson")
+    except ImportError:
+        return None
+
+
+def _json_dumps(data: Any) -> bytes:
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(body: bytes) -> Any:
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class CacheCodec:
+    """Encodes cached payloads with a pluggable serializer and size-gated compression."""
+
+    def __init__(
+        self,
+        serializer: Serializer = "json",
+        compression: Compression = "none",
+        threshold: int = 1024,
+        level: int | None = None,
+    ):
+        """
+        Initialize the codec.
+
+        Args:
+            serializer: Encoding for raw data (dict/list): "json" (orjson when installed)
+                or "msgpack".
+            compression: Compression applied to payloads of at least `threshold` bytes.
+            threshold: Minimum encoded size in bytes before compression is attempted.
+            level: Optional compression level, defaults to the library's default.
+        """
+        if serializer not in _SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        if serializer == "msgpack":
+            _optional_module("msgpack")
+        if compression != "none":
+            _optional_module("zstandard" if compression == "zstd" else "lz4.frame")
+
+        self.serializer = serializer
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+        self._zstd_compressor: Any = None
+        self._zstd_decompressor: Any = None
+
+    @classmethod
+    def from_settings(cls) -> "CacheCodec":
+        __settings = get_setting("redis")
+        return cls(
+            serializer=__settings.REDIS_CACHE_SERIALIZER,
+            compression=__settings.REDIS_CACHE_COMPRESSION,
+            threshold=__settings.REDIS_CACHE_COMPRESSION_THRESHOLD,
+        )
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize raw data (dict/list) with the configured serializer and frame it."""
+        if self.serializer == "msgpack":
+            return self._frame("msgpack", _optional_module("msgpack").packb(data))
+        return self._frame("json", _json_dumps(data))
+
+    def dumps_json(self, body: str | bytes) -> bytes:
+        """Frame an already-encoded JSON body."""
+        return self._frame("json", body.encode("utf-8") if isinstance(body, str) else body)
+
+    def loads(self, payload: bytes) -> Any:
+        """Decode any stored payload back into raw data."""
+        serializer, body = self.unframe(payload)
+        if serializer == "msgpack":
+            return _optional_module("msgpack").unpackb(body)
+        return _json_loads(body)
+
+    def loads_json(self, payload: bytes) -> bytes:
+        """Decode any stored payload into JSON bytes, re-encoding non-JSON payloads."""
+        serializer, body = self.unframe(payload)
+        if serializer == "msgpack":
+            return _json_dumps(_optional_module("msgpack").unpackb(body))
+        return body
+
+    def unframe(self, payload: bytes | bytearray | str) -> tuple[Serializer, bytes]:
+        """Return the serializer and decompressed body of a stored payload."""
+        if isinstance(payload, str):
+            return "json", payload.encode("utf-8")
+        payload = bytes(payload)
+        if not payload.startswith(_MAGIC):
+            # Plain JSON, either uncompressed or written before the codec was introduced
+            return "json", payload
+
+        serializer = _SERIALIZER_NAMES[payload[1]]
+        compression = _COMPRESSION_NAMES[payload[2]]
+        return serializer, self._decompress(compression, payload[_HEADER_SIZE:])
+
+    def _frame(self, serializer: Serializer, body: bytes) -> bytes:
+        compression: Compression = "none"
+        if self.compression != "none" and len(body) >= self.threshold:
+            compressed = self._compress(body)
+            # Incompressible payloads are kept as-is
+            if len(compressed) < len(body):
+                compression, body = self.compression, compressed
+
+        if serializer == "json" and compression == "none":
+            return body
+        header = _MAGIC + bytes((_SERIALIZERS[serializer], _COMPRESSIONS[compression]))
+        return header + body
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.compression == "zstd":
+            if self._zstd_compressor is None:
+                zstandard = _optional_module("zstandard")
+                self._zstd_compressor = zstandard.ZstdCompressor(level=self.level or 3)
+            return self._zstd_compressor.compress(body)
+        lz4_frame = _optional_module("lz4.frame")
+        return lz4_frame.compress(body, compression_level=self.level or 0)
+
+    def _decompress(self, compression: Compression, body: bytes) -> bytes:
+        if compression == "zstd":
+            if self._zstd_decompressor is None:
+                self._zstd_decompressor = _optional_module("zstandard").ZstdDecompressor()
+            return self._zstd_decompressor.decompress(body)
+        if compression == "lz4":
+            return _optional_module("lz4.frame").decompress(body)
+        return body
+
+
+@lru_cache(maxsize=1)
+def get_cache_codec() -> CacheCodec:
+    """Return the codec configured through `RedisSettings`."""
+    return CacheCodec.from_settings()
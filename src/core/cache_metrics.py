@@ -0,0 +1,152 @@
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Literal
+
+LookupResult = Literal["hit", "miss", "stale", "error"]
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus model (cumulative on export)."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        total = 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def render_histogram(name: str, histogram: Histogram, **labels: str) -> list[str]:
+    """Render a histogram's series in the Prometheus text exposition format."""
+    lines = [
+        f"{name}_bucket{_labels(**labels, le=bound)} {count}"
+        for bound, count in histogram.cumulative()
+    ]
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def render_sample(name: str, value: float, **labels: str) -> str:
+    return f"{name}{_labels(**labels) if labels else ''} {value}"
+
+
+class CacheMetrics:
+    """
+    In-process cache counters and histograms, per namespace and scope.
+
+    Values are per worker process; scrape every worker (or aggregate in Prometheus).
+    """
+
+    def __init__(self, max_tracked_keys: int = 10_000):
+        self.max_tracked_keys = max_tracked_keys
+        self.lookups: dict[tuple[str, str, LookupResult], int] = {}
+        self.payload_bytes: dict[tuple[str, str], Histogram] = {}
+        self.latency: dict[str, Histogram] = {}
+        self.local_hits = 0
+        self.local_misses = 0
+        self.key_access: dict[str, int] = {}
+
+    def record_lookup(
+        self,
+        namespace: str,
+        scope: str,
+        result: LookupResult,
+        key: str | None = None,
+        size: int | None = None,
+    ) -> None:
+        """Count a CacheHelper read; `key` feeds the top keys, `size` the payload histogram."""
+        label = (namespace, scope, result)
+        self.lookups[label] = self.lookups.get(label, 0) + 1
+        if size is not None:
+            histogram = self.payload_bytes.get((namespace, scope))
+            if histogram is None:
+                histogram = self.payload_bytes[(namespace, scope)] = Histogram(SIZE_BUCKETS)
+            histogram.observe(size)
+        if key is not None:
+            self._count_access(key)
+
+    def record_local(self, hit: bool) -> None:
+        if hit:
+            self.local_hits += 1
+        else:
+            self.local_misses += 1
+
+    def observe_latency(self, command: str, seconds: float) -> None:
+        histogram = self.latency.get(command)
+        if histogram is None:
+            histogram = self.latency[command] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, command: str) -> Iterator[None]:
+        """Observe the duration of the enclosed Redis command."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_latency(command, time.perf_counter() - started)
+
+    def _count_access(self, key: str) -> None:
+        self.key_access[key] = self.key_access.get(key, 0) + 1
+        if len(self.key_access) > self.max_tracked_keys:
+            # Keep the most accessed half; rarely read keys are dropped to bound memory
+            keep = sorted(self.key_access.items(), key=lambda item: item[1], reverse=True)
+            self.key_access = dict(keep[: self.max_tracked_keys // 2])
+
+    def top_keys(self, limit: int = 20) -> list[tuple[str, int]]:
+        """Most accessed keys (approximate once more than `max_tracked_keys` were seen)."""
+        return sorted(self.key_access.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def render_prometheus(self, local_entries: int = 0, local_bytes: int = 0) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = ["# TYPE cache_lookups_total counter"]
+        for (namespace, scope, result), count in sorted(self.lookups.items()):
+            labels = _labels(namespace=namespace, scope=scope, result=result)
+            lines.append(f"cache_lookups_total{labels} {count}")
+
+        lines.append("# TYPE cache_payload_bytes histogram")
+        for (namespace, scope), histogram in sorted(self.payload_bytes.items()):
+            lines.extend(
+                render_histogram("cache_payload_bytes", histogram, namespace=namespace, scope=scope)
+            )
+
+        lines.append("# TYPE cache_command_duration_seconds histogram")
+        for command, histogram in sorted(self.latency.items()):
+            lines.extend(
+                render_histogram("cache_command_duration_seconds", histogram, command=command)
+            )
+
+        lines += [
+            "# TYPE cache_local_lookups_total counter",
+            f'cache_local_lookups_total{{result="hit"}} {self.local_hits}',
+            f'cache_local_lookups_total{{result="miss"}} {self.local_misses}',
+            "# TYPE cache_local_entries gauge",
+            f"cache_local_entries {local_entries}",
+            "# TYPE cache_local_bytes gauge",
+            f"cache_local_bytes {local_bytes}",
+        ]
+        return "\n".join(lines) + "\n"
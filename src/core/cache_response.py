@@ -0,0 +1,159 @@
+import functools
+import inspect
+import json
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from config.settings import get_setting
+from core.cache import CacheHelper, get_type_adapter, make_etag
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_PARAM = "_cache_request"
+
+
+class CachedJSONResponse(Response):
+    """JSON response whose body is already-encoded bytes, sent without re-serialization."""
+
+    media_type = "application/json"
+
+
+def _encode(result: Any) -> bytes:
+    """Encode an endpoint result the way FastAPI's default JSON response would."""
+    if isinstance(result, BaseModel):
+        return result.model_dump_json(by_alias=True).encode("utf-8")
+    return json.dumps(
+        jsonable_encoder(result),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Evaluate an If-None-Match header against `etag` (weak comparison, RFC 9110 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(",")
+    )
+
+
+def _request_param(signature: inspect.Signature) -> str | None:
+    for name, param in signature.parameters.items():
+        if param.annotation is Request:
+            return name
+    return None
+
+
+def cache_response(
+    namespace: str,
+    scope: str | None = None,
+    ttl: int = 3600,
+    user_id: Callable[[Request], int | None] | None = None,
+    lock_timeout: float | None = 10.0,
+    stale_while_revalidate: bool = False,
+    validate: bool | None = None,
+    tags: Callable[[Request], Iterable[str]] | None = None,
+    etag: bool = True,
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Response]]]:
+    """
+    Cache an endpoint's JSON body in Redis and serve hits as raw bytes.
+
+    Cache hits skip JSON parsing, Pydantic validation and re-serialization entirely: the stored
+    bytes are written straight into the response. The endpoint result is cached as returned,
+    so the route's `response_model` filtering does not apply to decorated endpoints.
+
+    Responses carry a strong ETag of their body. A matching `If-None-Match` is answered with
+    304 Not Modified from the ETag stored next to the cached body, without reading the body.
+
+    Usage:
+        @api_router.get("/questions")
+        @cache_response(namespace="community_qa", ttl=300)
+        async def list_questions(...) -> QuestionList: ...
+
+    Args:
+        namespace: CacheHelper namespace, invalidated with `CacheHelper.invalidate()`.
+        scope: Endpoint operation name; defaults to the endpoint function name.
+        ttl: TTL in seconds for cached responses.
+        user_id: Optional callable returning the user ID for user-scoped caching.
+        lock_timeout: See `CacheHelper.get_or_set`.
+        stale_while_revalidate: See `CacheHelper.get_or_set`.
+        validate: Validate cached bytes against the endpoint's return annotation on every hit;
+            defaults to the app's DEBUG setting. Failures are logged, not raised.
+        tags: Optional callable returning the entity tags of a response, invalidated with
+            `CacheHelper.invalidate_tags()`.
+        etag: Send ETags and answer conditional requests.
+    """
+    if validate is None:
+        validate = get_setting("app").DEBUG
+
+    def decorator(endpoint: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Response]]:
+        signature = inspect.signature(endpoint)
+        request_param = _request_param(signature)
+        return_type = signature.return_annotation
+        endpoint_scope = scope or endpoint.__name__
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Response:
+            request: Request = kwargs[request_param or _REQUEST_PARAM]
+            if request_param is None:
+                kwargs.pop(_REQUEST_PARAM)
+
+            async def load() -> bytes:
+                return _encode(await endpoint(*args, **kwargs))
+
+            helper = CacheHelper(request.app.state.cache, namespace, ttl=ttl)
+            query = urlencode(sorted(request.query_params.multi_items()))
+            user = user_id(request) if user_id else None
+            if_none_match = request.headers.get("if-none-match") if etag else None
+            if if_none_match:
+                current = await helper.lookup_etag(endpoint_scope, request.url.path, query, user)
+                if current is not None and _etag_matches(if_none_match, current):
+                    return Response(status_code=304, headers={"ETag": current})
+
+            body = await helper.get_or_set(
+                endpoint_scope,
+                request.url.path,
+                query,
+                bytes,
+                load,
+                user_id=user,
+                is_json=True,
+                lock_timeout=lock_timeout,
+                stale_while_revalidate=stale_while_revalidate,
+                tags=tags(request) if tags else (),
+                etag=etag,
+            )
+            if validate and return_type is not inspect.Signature.empty:
+                try:
+                    get_type_adapter(return_type).validate_json(body)
+                except Exception:
+                    logger.exception(
+                        "Cached response failed validation",
+                        extra={"namespace": namespace, "scope": endpoint_scope},
+                    )
+            headers = {"ETag": make_etag(body)} if etag else None
+            return CachedJSONResponse(content=body, headers=headers)
+
+        if request_param is None:
+            extra = inspect.Parameter(
+                _REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request
+            )
+            params = [p for p in signature.parameters.values() if p.kind != p.VAR_KEYWORD]
+            params += [
+                extra,
+                *(p for p in signature.parameters.values() if p.kind == p.VAR_KEYWORD),
+            ]
+            wrapper.__signature__ = signature.replace(  # type: ignore[attr-defined]
+                parameters=params
+            )
+        return wrapper
+
+    return decorator
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Callable
+from typing import Any, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import get_type_adapter
+from database.session import AsyncLocalSession
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Rows fetched per round trip from the server-side cursor, and sent per chunk.
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+
+
+def _csv_value(value: Any) -> Any:
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def _take(buffer: io.StringIO) -> bytes:
+    data = buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+async def stream_export(
+    query: Select,
+    schema: type[BaseModel],
+    format: ExportFormat = "ndjson",
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+    session_factory: Callable[[], AsyncSession] = AsyncLocalSession,
+) -> AsyncIterator[bytes]:
+    """
+    Run `query` on a server-side cursor and yield its rows serialized, a batch per chunk.
+
+    Memory stays bounded by `batch_size` rows whatever the result size: the next batch is
+    only fetched once the client has taken the previous chunk. The generator opens its own
+    session, as the response outlives the endpoint's dependencies.
+
+    Args:
+        query: A select of ORM entities (or rows) to export.
+        schema: The model each row is serialized through, read from its attributes.
+        format: `ndjson`, one JSON object per line, or `csv` with a header row of the
+            schema's fields; nested values are JSON-encoded in their cells.
+        batch_size: Rows per cursor fetch and per chunk.
+        session_factory: E.g. `AsyncReadOnlySession` to export from a replica.
+    """
+    adapter = get_type_adapter(schema)
+    fields = list(schema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv":
+        # Sent before the query runs, so an empty result still gets its header row.
+        writer.writerow(fields)
+        yield _take(buffer)
+
+    async with session_factory() as session:
+        result = await session.stream_scalars(query, execution_options={"yield_per": batch_size})
+        async for partition in result.partitions():
+            if format == "ndjson":
+                yield b"".join(
+                    adapter.dump_json(adapter.validate_python(row, from_attributes=True)) + b"\n"
+                    for row in partition
+                )
+                continue
+            for row in partition:
+                values = adapter.dump_python(
+                    adapter.validate_python(row, from_attributes=True), mode="json"
+                )
+                writer.writerow([_csv_value(values[field]) for field in fields])
+            yield _take(buffer)
+
+
+def export_response(
+    query: Select,
+    schema: type[BaseModel],
+    format: ExportFormat = "ndjson",
+    filename: str | None = None,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+    session_factory: Callable[[], AsyncSession] = AsyncLocalSession,
+) -> StreamingResponse:
+    """
+    Stream a query's rows as NDJSON or CSV; see `stream_export`.
+
+    Usage:
+        @api_router.get("/questions/export")
+        async def export_questions(format: ExportFormat = "ndjson"):
+            return export_response(select(Question), QuestionSchema, format, "questions")
+    """
+    headers = {}
+    if filename is not None:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{format}"'
+    return StreamingResponse(
+        stream_export(query, schema, format, batch_size, session_factory),
+        media_type=MEDIA_TYPES[format],
+        headers=headers,
+    )
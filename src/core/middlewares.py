@@ -1,7 +1,23 @@
+import math
+import time
 from typing import Awaitable, Callable
 
 from fastapi import FastAPI, Request, Response
 from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.settings import get_setting
+from database.instrumentation import (
+    QueryStats,
+    check_query_stats,
+    route_budget,
+    track_queries,
+)
+from database.replicas import use_primary
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
 
 
 def get_logger_middleware(app: FastAPI) -> None:
@@ -21,3 +37,116 @@ def get_logger_middleware(app: FastAPI) -> None:
             status_code=response.status_code,
         )
         return response
+
+
+class QueryStatsMiddleware:
+    """
+    Count each request's queries, checking them for N+1 patterns and the route's budget.
+
+    Routes default to DATABASE_QUERY_BUDGET queries, overridden with `query_budget`. Over
+    budget requests are logged, or fail with DATABASE_QUERY_BUDGET_STRICT (for test runs).
+    In debug, a `Server-Timing` header reports the query count and time.
+
+    A plain ASGI middleware, so streamed responses are checked once their last chunk is
+    sent rather than when the endpoint returns. A response sent in one piece is checked
+    before it goes out, so strict mode still turns it into an error; a streamed one is
+    checked after, and its `Server-Timing` only covers the queries run before streaming.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        db_settings = get_setting("db")
+        self.default_budget = db_settings.DATABASE_QUERY_BUDGET
+        self.repeat_threshold = db_settings.DATABASE_N_PLUS_ONE_THRESHOLD
+        self.strict = db_settings.DATABASE_QUERY_BUDGET_STRICT
+        self.debug = get_setting("app").DEBUG
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_start: Message | None = None
+
+        async def send_checked(message: Message) -> None:
+            nonlocal response_start
+            if message["type"] == "http.response.start":
+                # Held back until the first chunk tells whether the body is streamed.
+                response_start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            last = not message.get("more_body", False)
+            if response_start is not None:
+                if last:
+                    self.check(scope, stats)
+                await send(self.with_timing(response_start, stats))
+                response_start = None
+                await send(message)
+            else:
+                await send(message)
+                if last:
+                    self.check(scope, stats)
+
+        with track_queries(f"{scope['method']} {scope['path']}") as stats:
+            await self.app(scope, receive, send_checked)
+
+    def check(self, scope: Scope, stats: QueryStats) -> None:
+        check_query_stats(
+            stats,
+            budget=route_budget(scope.get("endpoint"), self.default_budget),
+            repeat_threshold=self.repeat_threshold,
+            strict=self.strict,
+        )
+
+    def with_timing(self, start: Message, stats: QueryStats) -> Message:
+        if not self.debug:
+            return start
+        headers = MutableHeaders(scope=start)
+        headers["Server-Timing"] = (
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+        )
+        return start
+
+
+def get_query_stats_middleware(app: FastAPI) -> None:
+    app.add_middleware(QueryStatsMiddleware)
+
+
+def get_read_your_writes_middleware(app: FastAPI) -> None:
+    """
+    Keep a client's reads on the primary for a short window after it wrote.
+
+    Unsafe methods read from the primary for the whole request. Their successful responses
+    set a cookie holding the window's end, so the client's next reads skip replicas that may
+    not have replayed its write yet.
+    """
+    window = get_setting("db").DATABASE_READ_YOUR_WRITES_WINDOW
+
+    @app.middleware("http")
+    async def route_reads(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        now = time.time()
+        try:
+            until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+        except ValueError:
+            until = 0.0
+        writing = request.method not in SAFE_METHODS
+        # Cookies claiming more than one window are ignored rather than trusted.
+        token = use_primary.set(writing or now < until <= now + window)
+        try:
+            response = await call_next(request)
+        finally:
+            use_primary.reset(token)
+
+        if writing and response.status_code < 400 and window > 0:
+            response.set_cookie(
+                READ_YOUR_WRITES_COOKIE,
+                f"{now + window:.3f}",
+                max_age=math.ceil(window),
+                httponly=True,
+                samesite="lax",
+            )
+        return response
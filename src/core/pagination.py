@@ -1,7 +1,199 @@
-from fastapi import Query
+import base64
+import hashlib
+import hmac
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Literal
+
+from fastapi import HTTPException, Query, status
 from fastapi_pagination import Params
+from pydantic import BaseModel
+from sqlalchemy import ColumnElement, Select, and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from config.settings import get_setting
 
 
 class PaginationParams(Params):
     page: int = Query(1, ge=1)
     size: int = Query(10, ge=1, le=100)
+
+
+class CursorParams(BaseModel):
+    """Keyset pagination parameters; use `Depends()` on an endpoint argument."""
+
+    cursor: str | None = Query(None, description="Opaque cursor from a previous page")
+    size: int = Query(10, ge=1, le=100)
+
+
+class CursorPage[T](BaseModel):
+    items: Sequence[T]
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+
+Direction = Literal["next", "previous"]
+OrderKey = tuple[Any, bool]  # (column, descending)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _signature(payload: bytes) -> bytes:
+    secret = get_setting("security").CURSOR_SECRET_KEY
+    if secret is None:
+        raise RuntimeError("CURSOR_SECRET_KEY must be set to use cursor pagination")
+    return hmac.digest(secret.get_secret_value().encode("utf-8"), payload, "sha256")[:16]
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def _fingerprint(order: Sequence[OrderKey]) -> str:
+    """Identify an ordering, so a cursor is only accepted by the listing that issued it."""
+    spec = ",".join(f"{column}:{int(descending)}" for column, descending in order)
+    return hashlib.blake2b(spec.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def encode_cursor(values: Sequence[Any], direction: Direction, order: Sequence[OrderKey]) -> str:
+    """Sign the sort key of a boundary row into an opaque cursor."""
+    payload = json.dumps(
+        {"k": [_dump_value(value) for value in values], "d": direction, "o": _fingerprint(order)},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return f"{_b64encode(payload)}.{_b64encode(_signature(payload))}"
+
+
+def decode_cursor(cursor: str, order: Sequence[OrderKey]) -> tuple[list[Any], Direction]:
+    """Verify a cursor and return its sort key and direction; raises 400 if tampered with."""
+    try:
+        encoded_payload, encoded_signature = cursor.split(".", 1)
+        payload = _b64decode(encoded_payload)
+        if not hmac.compare_digest(_b64decode(encoded_signature), _signature(payload)):
+            raise ValueError("bad signature")
+        data = json.loads(payload)
+        if data["o"] != _fingerprint(order) or data["d"] not in ("next", "previous"):
+            raise ValueError("cursor issued for another listing")
+        values = [_load_value(value) for value in data["k"]]
+        if len(values) != len(order):
+            raise ValueError("sort key length mismatch")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from None
+    return values, data["d"]
+
+
+def _order_keys(query: Select, order_by: Sequence[Any] | None) -> list[OrderKey]:
+    """Parse `order_by`, defaulting to newest first, always ending on the unique `id`."""
+    entity = query.column_descriptions[0]["entity"]
+    if order_by is None:
+        order_by = [entity.created_at.desc()] if hasattr(entity, "created_at") else []
+
+    order: list[OrderKey] = []
+    for expression in order_by:
+        if isinstance(expression, UnaryExpression) and expression.modifier in (
+            operators.desc_op,
+            operators.asc_op,
+        ):
+            order.append((expression.element, expression.modifier is operators.desc_op))
+        else:
+            order.append((expression, False))
+
+    if not any(getattr(column, "key", None) == "id" for column, _ in order):
+        # The unique id breaks ties, so rows sharing a sort value are neither skipped nor repeated.
+        order.append((entity.id, order[-1][1] if order else True))
+    return order
+
+
+def _after(order: Sequence[OrderKey], values: Sequence[Any]) -> ColumnElement[bool]:
+    """Rows strictly after `values` in `order` (a keyset seek predicate)."""
+    if len({descending for _, descending in order}) == 1:
+        # A single row-value comparison lets PostgreSQL seek a composite index directly.
+        columns = tuple_(*(column for column, _ in order))
+        return columns < tuple_(*values) if order[0][1] else columns > tuple_(*values)
+
+    clauses = []
+    for index, (column, descending) in enumerate(order):
+        equal = [order[i][0] == values[i] for i in range(index)]
+        clauses.append(
+            and_(*equal, column < values[index] if descending else column > values[index])
+        )
+    return or_(*clauses)
+
+
+async def paginate_cursor(
+    session: AsyncSession,
+    query: Select,
+    params: CursorParams,
+    order_by: Sequence[Any] | None = None,
+) -> CursorPage[Any]:
+    """
+    Paginate a select of ORM entities by keyset instead of OFFSET, without a count query.
+
+    Each page seeks past the sort key of the previous page's boundary row, so every page
+    costs the same however deep it is. Use `PaginationParams` for small tables that need
+    page numbers or a total. Cursors are signed with `CURSOR_SECRET_KEY`, which must be set.
+
+    Usage:
+        @api_router.get("/questions", response_model=CursorPage[QuestionSchema])
+        async def list_questions(params: CursorParams = Depends(), db=Depends(get_db)):
+            return await paginate_cursor(db, select(Question), params)
+
+    Args:
+        session: The session to run the query on.
+        query: A select whose first entity is the paginated model.
+        params: The cursor and page size.
+        order_by: Sort columns, optionally `.desc()`; defaults to `created_at` descending.
+            The model's `id` is appended as a tiebreaker. Index these columns together.
+
+    Returns:
+        The page, with cursors for the next and previous pages when they exist.
+    """
+    order = _order_keys(query, order_by)
+    values, direction = decode_cursor(params.cursor, order) if params.cursor else (None, "next")
+    backwards = direction == "previous"
+
+    # Walking backwards reads the reversed order, then flips the page back.
+    seek_order = [(column, descending != backwards) for column, descending in order]
+    if values is not None:
+        query = query.where(_after(seek_order, values))
+    query = query.order_by(
+        *(column.desc() if descending else column.asc() for column, descending in seek_order)
+    ).limit(params.size + 1)
+
+    items = list(await session.scalars(query))
+    has_more = len(items) > params.size
+    items = items[: params.size]
+    if backwards:
+        items.reverse()
+    if not items:
+        return CursorPage(items=[])
+
+    def key(item: Any) -> list[Any]:
+        return [getattr(item, column.key) for column, _ in order]
+
+    has_next = has_more if not backwards else True
+    has_previous = values is not None if not backwards else has_more
+    return CursorPage(
+        items=items,
+        next_cursor=encode_cursor(key(items[-1]), "next", order) if has_next else None,
+        previous_cursor=encode_cursor(key(items[0]), "previous", order) if has_previous else None,
+    )
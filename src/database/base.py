@@ -1,9 +1,25 @@
 import re
-from datetime import datetime, timezone
-
-from sqlalchemy import BigInteger, Column, DateTime, MetaData, event, func
-from sqlalchemy.orm import declared_attr
+from typing import Any, ClassVar
+from weakref import WeakSet
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    FetchedValue,
+    Index,
+    MetaData,
+    Table,
+    UniqueConstraint,
+    event,
+    func,
+    update,
+)
+from sqlalchemy.orm import Mapper, ORMExecuteState, Session, declared_attr, with_loader_criteria
 from sqlalchemy.orm.decl_api import DeclarativeBase
+from sqlalchemy.sql.naming import conv
+
+from database.ddl import attach_updated_at_trigger
 
 
 class Base(DeclarativeBase):
@@ -47,46 +63,62 @@ class Base(DeclarativeBase):
 
 
 class BaseModel(Base):
+    """
+    Model with `created_at` and `updated_at` set by the database.
+
+    `updated_at` is maintained by a BEFORE UPDATE trigger (see `database.ddl`), so bulk,
+    upsert and raw SQL updates keep it current too; eager defaults read it back with
+    RETURNING instead of a lazy load after flush.
+    """
+
     __abstract__ = True
+    __mapper_args__: ClassVar[dict[str, Any]] = {"eager_defaults": True}
 
     id = Column(BigInteger(), primary_key=True, autoincrement=True)
     created_at = Column(
         DateTime(timezone=True),
-        default=func.now(),
         server_default=func.now(),
         nullable=False,
     )
     updated_at = Column(
         DateTime(timezone=True),
-        default=func.now(),
         server_default=func.now(),
-        onupdate=func.now(),
+        server_onupdate=FetchedValue(),
         nullable=False,
     )
 
 
-def _set_updated_at(mapper, connection, target):
-    target.updated_at = datetime.now(timezone.utc)
-
-
-event.listens_for(BaseModel, "before_update", propagate=True)(_set_updated_at)
-
-
 class BaseModelWithDeleted(Base):
+    """
+    Model soft-deleted by setting `deleted_at`.
+
+    - `session.delete(obj)` and ORM `delete(Model)` statements become UPDATEs of `deleted_at`;
+      pass `execution_options(hard_delete=True)` to really delete.
+    - Every ORM select, relationship loads included, skips deleted rows unless run with
+      `execution_options(include_deleted=True)`.
+    - Indexes are partial, `WHERE deleted_at IS NULL`, unless their `info` holds
+      `include_deleted=True`: they only cover the live rows queries can see, and unique
+      indexes let a deleted row's values be reused. Unique constraints, `unique=True` columns
+      included, become partial unique indexes, as constraints cannot be partial. Indexes and
+      constraints added to the table after the class is defined are covered too.
+    - Tombstones older than the retention are purged, or moved to `__archive_table__`, by
+      `cmd.purge_deleted`.
+    """
+
     __abstract__ = True
+    __mapper_args__: ClassVar[dict[str, Any]] = {"eager_defaults": True}
+    __archive_table__: ClassVar[str | None] = None
 
     id = Column(BigInteger(), primary_key=True, autoincrement=True)
     created_at = Column(
         DateTime(timezone=True),
-        default=func.now(),
         server_default=func.now(),
         nullable=False,
     )
     updated_at = Column(
         DateTime(timezone=True),
-        default=func.now(),
         server_default=func.now(),
-        onupdate=func.now(),
+        server_onupdate=FetchedValue(),
         nullable=False,
     )
     deleted_at = Column(
@@ -95,9 +127,78 @@ class BaseModelWithDeleted(Base):
     )
 
 
-def _set_deleted_at(mapper, connection, target) -> None:
-    target.deleted_at = datetime.now(timezone.utc)
-
-
-event.listens_for(BaseModelWithDeleted, "before_update", propagate=True)(_set_updated_at)
-event.listens_for(BaseModelWithDeleted, "before_delete", propagate=True)(_set_deleted_at)
+@event.listens_for(BaseModel, "instrument_class", propagate=True)
+def _add_updated_at_trigger(mapper: Mapper, cls: type[Any]) -> None:
+    attach_updated_at_trigger(mapper.local_table)  # type: ignore[arg-type]
+
+
+# Tables of soft-deleted models, whose indexes only cover the live rows.
+_soft_delete_tables: WeakSet[Table] = WeakSet()
+
+
+def _cover_live_rows(table: Table, item: Index | UniqueConstraint) -> None:
+    """Make an index, or a unique constraint turned into an index, skip deleted rows."""
+    if item.info.get("include_deleted"):
+        return
+    where = table.c.deleted_at.is_(None)
+    if isinstance(item, UniqueConstraint):
+        table.constraints.discard(item)
+        columns = list(item.columns)
+        # Named as the constraint would have been, by the "uq" naming convention.
+        name = item.name or conv(f"uq_{table.name}_{columns[0].name}")
+        Index(name, *columns, unique=True, info=dict(item.info), postgresql_where=where)
+        return
+    options = item.dialect_options["postgresql"]
+    if options["where"] is None:
+        options["where"] = where
+
+
+@event.listens_for(BaseModelWithDeleted, "instrument_class", propagate=True)
+def _add_soft_delete_ddl(mapper: Mapper, cls: type[Any]) -> None:
+    table: Table = mapper.local_table  # type: ignore[assignment]
+    attach_updated_at_trigger(table)
+    _soft_delete_tables.add(table)
+    for item in [*table.indexes, *table.constraints]:
+        if isinstance(item, Index | UniqueConstraint):
+            _cover_live_rows(table, item)
+
+
+@event.listens_for(Index, "after_parent_attach")
+@event.listens_for(UniqueConstraint, "after_parent_attach")
+def _cover_added_index(item: Index | UniqueConstraint, table: Table) -> None:
+    if table in _soft_delete_tables:
+        _cover_live_rows(table, item)
+
+
+@event.listens_for(Session, "before_flush")
+def _soft_delete_objects(session: Session, flush_context: Any, instances: Any) -> None:
+    for instance in list(session.deleted):
+        if isinstance(instance, BaseModelWithDeleted):
+            session.add(instance)  # takes it out of the pending deletions
+            instance.deleted_at = func.now()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _soft_delete_criteria(state: ORMExecuteState) -> Any:
+    if state.execution_options.get("include_deleted") or state.execution_options.get("hard_delete"):
+        return None
+    if state.is_select and not state.is_column_load and not state.is_relationship_load:
+        # Propagates to the relationship and column loads this select triggers.
+        state.statement = state.statement.options(
+            with_loader_criteria(
+                BaseModelWithDeleted,
+                lambda cls: cls.deleted_at.is_(None),
+                include_aliases=True,
+            )
+        )
+    elif (
+        state.is_delete
+        and state.bind_mapper is not None
+        and issubclass(state.bind_mapper.class_, BaseModelWithDeleted)
+    ):
+        model = state.bind_mapper.class_
+        soft_delete = update(model).where(model.deleted_at.is_(None)).values(deleted_at=func.now())
+        if state.statement.whereclause is not None:
+            soft_delete = soft_delete.where(state.statement.whereclause)
+        return state.invoke_statement(statement=soft_delete)
+    return None
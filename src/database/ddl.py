@@ -0,0 +1,49 @@
+"""
+Database-side DDL the models rely on, for both `metadata.create_all` and Alembic.
+
+The Alembic operations emitting it live in `database.migration_ops`, so the app does not
+import Alembic at runtime.
+"""
+
+from sqlalchemy import DDL, Table, event
+
+SET_UPDATED_AT_FUNCTION = """
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def qualified_name(table_name: str, schema: str | None) -> str:
+    return f'"{schema}"."{table_name}"' if schema else f'"{table_name}"'
+
+
+def updated_at_trigger_name(table_name: str) -> str:
+    return f"{table_name}_set_updated_at"
+
+
+def create_updated_at_trigger_sql(table_name: str, schema: str | None = None) -> str:
+    return (
+        f'CREATE TRIGGER "{updated_at_trigger_name(table_name)}" '
+        f"BEFORE UPDATE ON {qualified_name(table_name, schema)} "
+        "FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+    )
+
+
+def drop_updated_at_trigger_sql(table_name: str, schema: str | None = None) -> str:
+    return (
+        f'DROP TRIGGER IF EXISTS "{updated_at_trigger_name(table_name)}" '
+        f"ON {qualified_name(table_name, schema)}"
+    )
+
+
+def attach_updated_at_trigger(table: Table) -> None:
+    """Create the trigger with the table in `metadata.create_all`, e.g. for test databases."""
+    for statement in (
+        SET_UPDATED_AT_FUNCTION,
+        create_updated_at_trigger_sql(table.name, table.schema),
+    ):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
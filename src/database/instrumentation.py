@@ -0,0 +1,134 @@
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+_BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more queries than its route's budget, in strict mode."""
+
+
+@dataclass
+class QueryStats:
+    """The statements one request ran, keyed by their SQL with parameters left out."""
+
+    route: str
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least `threshold` times, the usual sign of an N+1 loop."""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries(route: str) -> Iterator[QueryStats]:
+    """Count the queries run in this context (and tasks it spawns) into a `QueryStats`."""
+    stats = QueryStats(route)
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def query_budget[F: Callable[..., Any]](limit: int) -> Callable[[F], F]:
+    """
+    Override DATABASE_QUERY_BUDGET for one endpoint.
+
+    Usage:
+        @api_router.get("/questions/{id}")
+        @query_budget(3)
+        async def get_question(id: int, db=Depends(get_db)): ...
+    """
+
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, _BUDGET_ATTRIBUTE, limit)
+        return endpoint
+
+    return decorator
+
+
+def route_budget(endpoint: Callable[..., Any] | None, default: int) -> int:
+    return getattr(endpoint, _BUDGET_ATTRIBUTE, default)
+
+
+def redact(parameters: Any) -> Any:
+    """Replace bound values by their type names, keeping the shape of the parameters."""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"  # executemany
+        return [type(value).__name__ for value in parameters]
+    return parameters
+
+
+def instrument_engine(engine: AsyncEngine, slow_query_threshold: float) -> None:
+    """
+    Time every statement run on `engine`, recording it in the request's `QueryStats`.
+
+    Statements slower than `slow_query_threshold` seconds are logged with redacted
+    parameters; 0 disables the log.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_timer(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def record_query(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        duration = time.perf_counter() - context._query_start
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if slow_query_threshold and duration >= slow_query_threshold:
+            logger.warning(
+                "Slow query (%.3fs) on %s: %s; parameters: %s",
+                duration,
+                stats.route if stats is not None else "<no request>",
+                statement,
+                redact(parameters),
+            )
+
+
+def check_query_stats(stats: QueryStats, budget: int, repeat_threshold: int, strict: bool) -> None:
+    """
+    Report possible N+1 patterns and enforce the query budget; 0 disables either check.
+
+    Raises:
+        QueryBudgetExceeded: When over budget in strict mode; otherwise only a warning is logged.
+    """
+    for statement, count in stats.repeated(repeat_threshold) if repeat_threshold else []:
+        logger.warning(
+            "Possible N+1 on %s: %d executions of %s", stats.route, count, statement.strip()
+        )
+    if budget and stats.count > budget:
+        message = f"{stats.route} ran {stats.count} queries, over its budget of {budget}"
+        if strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,215 @@
+"""
+Alembic operations for the DDL of `database.ddl` and `database.partitioning`.
+
+Importing this module (as `migrations/env.py` does) registers the `op.create_updated_at_trigger`,
+`op.drop_updated_at_trigger`, `op.create_partitions` and `op.drop_partitions` operations,
+and the autogenerate comparators emitting them.
+"""
+
+from typing import Any
+
+from alembic.autogenerate import comparators, renderers
+from alembic.operations import MigrateOperation, Operations
+from sqlalchemy import MetaData, Table, text
+
+from database.ddl import (
+    SET_UPDATED_AT_FUNCTION,
+    create_updated_at_trigger_sql,
+    drop_updated_at_trigger_sql,
+    qualified_name,
+    updated_at_trigger_name,
+)
+from database.partitioning import PartitionInterval, ensure_partitions, list_partitions
+
+
+@Operations.register_operation("create_updated_at_trigger")
+class CreateUpdatedAtTriggerOp(MigrateOperation):
+    """Keep `updated_at` current on every UPDATE, including bulk and raw SQL ones."""
+
+    def __init__(self, table_name: str, schema: str | None = None):
+        self.table_name = table_name
+        self.schema = schema
+
+    @classmethod
+    def create_updated_at_trigger(
+        cls, operations: Operations, table_name: str, schema: str | None = None
+    ) -> Any:
+        return operations.invoke(cls(table_name, schema))
+
+    def reverse(self) -> "DropUpdatedAtTriggerOp":
+        return DropUpdatedAtTriggerOp(self.table_name, self.schema)
+
+
+@Operations.register_operation("drop_updated_at_trigger")
+class DropUpdatedAtTriggerOp(MigrateOperation):
+    def __init__(self, table_name: str, schema: str | None = None):
+        self.table_name = table_name
+        self.schema = schema
+
+    @classmethod
+    def drop_updated_at_trigger(
+        cls, operations: Operations, table_name: str, schema: str | None = None
+    ) -> Any:
+        return operations.invoke(cls(table_name, schema))
+
+    def reverse(self) -> CreateUpdatedAtTriggerOp:
+        return CreateUpdatedAtTriggerOp(self.table_name, self.schema)
+
+
+@Operations.implementation_for(CreateUpdatedAtTriggerOp)
+def _create_updated_at_trigger(operations: Operations, operation: CreateUpdatedAtTriggerOp) -> None:
+    operations.execute(SET_UPDATED_AT_FUNCTION)
+    operations.execute(create_updated_at_trigger_sql(operation.table_name, operation.schema))
+
+
+@Operations.implementation_for(DropUpdatedAtTriggerOp)
+def _drop_updated_at_trigger(operations: Operations, operation: DropUpdatedAtTriggerOp) -> None:
+    operations.execute(drop_updated_at_trigger_sql(operation.table_name, operation.schema))
+
+
+@renderers.dispatch_for(CreateUpdatedAtTriggerOp)
+def _render_create_updated_at_trigger(autogen_context: Any, op: CreateUpdatedAtTriggerOp) -> str:
+    return f"op.create_updated_at_trigger({op.table_name!r}, schema={op.schema!r})"
+
+
+@renderers.dispatch_for(DropUpdatedAtTriggerOp)
+def _render_drop_updated_at_trigger(autogen_context: Any, op: DropUpdatedAtTriggerOp) -> str:
+    return f"op.drop_updated_at_trigger({op.table_name!r}, schema={op.schema!r})"
+
+
+@comparators.dispatch_for("table", qualifier="postgresql")
+def _compare_updated_at_trigger(
+    autogen_context: Any,
+    modify_ops: Any,
+    schema: str | None,
+    table_name: str,
+    conn_table: Table | None,
+    metadata_table: Table | None,
+) -> None:
+    if metadata_table is None:
+        return  # dropped with the table
+    wanted = "updated_at" in metadata_table.c
+    exists = conn_table is not None and bool(
+        autogen_context.connection.scalar(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = :name AND tgrelid = to_regclass(:table)"),
+            {
+                "name": updated_at_trigger_name(table_name),
+                "table": qualified_name(table_name, schema),
+            },
+        )
+    )
+    if wanted and not exists:
+        modify_ops.ops.append(CreateUpdatedAtTriggerOp(table_name, schema))
+    elif exists and not wanted:
+        modify_ops.ops.append(DropUpdatedAtTriggerOp(table_name, schema))
+
+
+@Operations.register_operation("create_partitions")
+class CreatePartitionsOp(MigrateOperation):
+    """
+    Create the partitions of a table range-partitioned by `created_at`, from the current
+    period to `ahead` periods later. Needs a database connection (no `--sql` mode).
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        interval: PartitionInterval,
+        ahead: int,
+        schema: str | None = None,
+    ):
+        self.table_name = table_name
+        self.interval = interval
+        self.ahead = ahead
+        self.schema = schema
+
+    @classmethod
+    def create_partitions(
+        cls,
+        operations: Operations,
+        table_name: str,
+        interval: PartitionInterval,
+        ahead: int,
+        schema: str | None = None,
+    ) -> Any:
+        return operations.invoke(cls(table_name, interval, ahead, schema))
+
+    def reverse(self) -> "DropPartitionsOp":
+        return DropPartitionsOp(self.table_name, self.interval, self.ahead, self.schema)
+
+
+@Operations.register_operation("drop_partitions")
+class DropPartitionsOp(MigrateOperation):
+    """Drop every range partition of a table, with its rows."""
+
+    def __init__(
+        self,
+        table_name: str,
+        interval: PartitionInterval,
+        ahead: int,
+        schema: str | None = None,
+    ):
+        self.table_name = table_name
+        self.interval = interval
+        self.ahead = ahead
+        self.schema = schema
+
+    @classmethod
+    def drop_partitions(
+        cls,
+        operations: Operations,
+        table_name: str,
+        interval: PartitionInterval,
+        ahead: int,
+        schema: str | None = None,
+    ) -> Any:
+        return operations.invoke(cls(table_name, interval, ahead, schema))
+
+    def reverse(self) -> CreatePartitionsOp:
+        return CreatePartitionsOp(self.table_name, self.interval, self.ahead, self.schema)
+
+
+@Operations.implementation_for(CreatePartitionsOp)
+def _create_partitions(operations: Operations, operation: CreatePartitionsOp) -> None:
+    table = Table(operation.table_name, MetaData(), schema=operation.schema)
+    ensure_partitions(operations.get_bind(), table, operation.interval, operation.ahead)
+
+
+@Operations.implementation_for(DropPartitionsOp)
+def _drop_partitions(operations: Operations, operation: DropPartitionsOp) -> None:
+    table = Table(operation.table_name, MetaData(), schema=operation.schema)
+    for partition in list_partitions(operations.get_bind(), table):
+        operations.drop_table(partition.name, schema=operation.schema)
+
+
+@renderers.dispatch_for(CreatePartitionsOp)
+def _render_create_partitions(autogen_context: Any, op: CreatePartitionsOp) -> str:
+    return (
+        f"op.create_partitions({op.table_name!r}, interval={op.interval!r}, "
+        f"ahead={op.ahead!r}, schema={op.schema!r})"
+    )
+
+
+@renderers.dispatch_for(DropPartitionsOp)
+def _render_drop_partitions(autogen_context: Any, op: DropPartitionsOp) -> str:
+    return (
+        f"op.drop_partitions({op.table_name!r}, interval={op.interval!r}, "
+        f"ahead={op.ahead!r}, schema={op.schema!r})"
+    )
+
+
+@comparators.dispatch_for("table", qualifier="postgresql")
+def _compare_partitions(
+    autogen_context: Any,
+    modify_ops: Any,
+    schema: str | None,
+    table_name: str,
+    conn_table: Table | None,
+    metadata_table: Table | None,
+) -> None:
+    # Later partitions are created by `cmd.partitions`; migrations only seed new tables.
+    if conn_table is None and metadata_table is not None:
+        interval = metadata_table.info.get("partition_interval")
+        if interval is not None:
+            ahead = metadata_table.info["partition_ahead"]
+            modify_ops.ops.append(CreatePartitionsOp(table_name, interval, ahead, schema))
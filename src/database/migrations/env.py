@@ -3,12 +3,14 @@ from logging.config import fileConfig
 from pathlib import Path
 
 from alembic import context
-from sqlalchemy import pool
+from sqlalchemy import inspect, pool
 from sqlalchemy.ext.asyncio import async_engine_from_config
 import alembic_postgresql_enum
+import database.migration_ops  # noqa: F401  (custom operations and autogenerate comparators)
 
 from config.settings import get_setting
 from database.base import BaseModelWithDeleted  # type:ignore
+from database.partitioning import ensure_partitions
 from models import *  # noqa: F401
     
 
@@ -80,6 +82,19 @@ def include_object(object, name, type_, reflected, compare_to):
 # ... etc.
 
 
+def ensure_future_partitions(connection) -> None:
+    """Top up the partitions of every partitioned table on each deploy's upgrade."""
+    existing = set(inspect(connection).get_table_names())
+    for table in target_metadata.tables.values():
+        if "partition_interval" in table.info and table.name in existing:
+            ensure_partitions(
+                connection,
+                table,
+                table.info["partition_interval"],
+                table.info["partition_ahead"],
+            )
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -127,6 +142,7 @@ def run_migrations_online() -> None:
 
         with context.begin_transaction():
             context.run_migrations()
+            ensure_future_partitions(connection)
 
     async def run_async_migrations() -> None:
         async with connectable.connect() as connection:
@@ -0,0 +1,201 @@
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, ClassVar, Literal
+
+from sqlalchemy import Column, Connection, DateTime, PrimaryKeyConstraint, Table, func, text
+from sqlalchemy.orm import declared_attr
+
+PartitionInterval = Literal["day", "week", "month"]
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class PartitionedByCreatedAt:
+    """
+    Mixin range-partitioning a `BaseModel` table by `created_at`, listed before the base.
+
+    Queries filtering on `created_at` only scan the matching partitions, and expiring data
+    detaches or drops whole partitions instead of deleting rows. PostgreSQL requires the
+    partition key in every unique index, so `created_at` joins `id` in the primary key.
+
+    Partitions are created with the table by its migration (`op.create_partitions`), and
+    kept ahead of time and expired by `cmd.partitions`, to run daily.
+
+    The mixin owns `__table_args__`; models declare theirs as `__partition_table_args__`,
+    which is merged in (a trailing dict of options included).
+
+    Usage:
+        class Event(PartitionedByCreatedAt, BaseModel):
+            __partition_interval__ = "day"
+            __partition_retention__ = 90  # partitions kept, None for forever
+            __partition_table_args__ = (Index("ix_event_kind", "kind"),)
+    """
+
+    __partition_interval__: ClassVar[PartitionInterval] = "month"
+    __partition_ahead__: ClassVar[int] = 3
+    __partition_retention__: ClassVar[int | None] = None
+    __partition_table_args__: ClassVar[tuple[Any, ...]] = ()
+
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        # Checked before the model is mapped, as its own `__table_args__` would hide ours.
+        if "__table_args__" in cls.__dict__:
+            raise TypeError(
+                f"{cls.__name__} is partitioned; declare `__partition_table_args__` instead "
+                "of `__table_args__`"
+            )
+        super().__init_subclass__(**kwargs)
+
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple[Any, ...]:
+        args, options = cls.__partition_table_args__, {}
+        if args and isinstance(args[-1], dict):
+            args, options = args[:-1], args[-1]
+        return (
+            # `id` first, so the primary key index serves lookups by `id` alone.
+            PrimaryKeyConstraint("id", "created_at"),
+            *args,
+            {
+                **options,
+                "postgresql_partition_by": "RANGE (created_at)",
+                "info": {
+                    **options.get("info", {}),
+                    "partition_interval": cls.__partition_interval__,
+                    "partition_ahead": cls.__partition_ahead__,
+                    "partition_retention": cls.__partition_retention__,
+                },
+            },
+        )
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    start: datetime
+    end: datetime
+
+
+def period_start(moment: datetime, interval: PartitionInterval) -> datetime:
+    """The start, in UTC, of the partition period containing `moment`."""
+    day = moment.astimezone(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start: datetime, interval: PartitionInterval) -> datetime:
+    if interval == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=7 if interval == "week" else 1)
+
+
+def partition_for(table_name: str, start: datetime, interval: PartitionInterval) -> Partition:
+    suffix = {"day": "%Y%m%d", "week": "%Gw%V", "month": "%Y%m"}[interval]
+    return Partition(f"{table_name}_p{start.strftime(suffix)}", start, next_period(start, interval))
+
+
+def _quoted(connection: Connection, name: str, schema: str | None) -> str:
+    preparer = connection.dialect.identifier_preparer
+    return (
+        f"{preparer.quote_schema(schema)}.{preparer.quote(name)}"
+        if schema
+        else preparer.quote(name)
+    )
+
+
+def list_partitions(connection: Connection, table: Table) -> list[Partition]:
+    """The range partitions attached to `table`, oldest first."""
+    rows = connection.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": _quoted(connection, table.name, table.schema)},
+    )
+    partitions = []
+    for name, bound in rows:
+        match = _BOUNDS.search(bound or "")
+        if match is not None:  # skips a DEFAULT partition
+            start, end = (datetime.fromisoformat(value) for value in match.groups())
+            partitions.append(Partition(name, start, end))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def ensure_partitions(
+    connection: Connection,
+    table: Table,
+    interval: PartitionInterval,
+    ahead: int,
+    now: datetime | None = None,
+) -> list[Partition]:
+    """
+    Create the partitions of the current period and the `ahead` following ones if missing.
+
+    Each is created standalone and then attached, which only takes a SHARE UPDATE EXCLUSIVE
+    lock on the parent (CREATE TABLE ... PARTITION OF would block its reads and writes).
+
+    Returns:
+        The partitions created.
+    """
+    parent = _quoted(connection, table.name, table.schema)
+    existing = {partition.name for partition in list_partitions(connection, table)}
+    start = period_start(now or datetime.now(UTC), interval)
+    created = []
+    for _ in range(ahead + 1):
+        partition = partition_for(table.name, start, interval)
+        start = partition.end
+        if partition.name in existing:
+            continue
+        name = _quoted(connection, partition.name, table.schema)
+        bounds = f"FROM ('{partition.start.isoformat()}') TO ('{partition.end.isoformat()}')"
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                f"(LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        connection.execute(
+            text(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES {bounds}")
+        )
+        created.append(partition)
+    return created
+
+
+def expire_partitions(
+    connection: Connection,
+    table: Table,
+    retention: int,
+    interval: PartitionInterval,
+    drop: bool = False,
+    now: datetime | None = None,
+) -> list[Partition]:
+    """
+    Detach the partitions older than the `retention` most recent periods, dropping them too
+    with `drop`. Detached tables stay queryable under their own names, e.g. to archive them.
+
+    Returns:
+        The partitions detached (or dropped).
+    """
+    cutoff = period_start(now or datetime.now(UTC), interval)
+    for _ in range(retention - 1):
+        cutoff = period_start(cutoff - timedelta(days=1), interval)
+    parent = _quoted(connection, table.name, table.schema)
+    expired = [
+        partition for partition in list_partitions(connection, table) if partition.end <= cutoff
+    ]
+    for partition in expired:
+        name = _quoted(connection, partition.name, table.schema)
+        connection.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+        if drop:
+            connection.execute(text(f"DROP TABLE {name}"))
+    return expired
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from contextlib import AsyncExitStack
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from core.cache_metrics import LATENCY_BUCKETS, Histogram, render_histogram, render_sample
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Checkout latency and connection churn of one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkout_seconds = Histogram(LATENCY_BUCKETS)
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool timing every checkout; see `create_instrumented_engine`."""
+
+    metrics: PoolMetrics
+
+    def connect(self) -> PoolProxiedConnection:
+        # Covers waiting for a free connection, opening a new one and the pre-ping.
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.checkout_seconds.observe(time.perf_counter() - start)
+
+
+def create_instrumented_engine(url: str, name: str, **kwargs: Any) -> AsyncEngine:
+    """
+    `create_async_engine` with a pool recording `PoolMetrics`, labelled `name`.
+
+    The metrics live on a pool class of the engine's own, so they survive the pool being
+    recreated on `dispose()`.
+    """
+    metrics = PoolMetrics(name)
+    pool_class = type(f"InstrumentedPool[{name}]", (InstrumentedPool,), {"metrics": metrics})
+    engine = create_async_engine(url, poolclass=pool_class, **kwargs)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(*args: Any) -> None:
+        metrics.connects += 1
+
+    @event.listens_for(engine.sync_engine, "close")
+    def on_close(*args: Any) -> None:
+        metrics.closes += 1
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def on_invalidate(*args: Any) -> None:
+        metrics.invalidations += 1
+
+    return engine
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    """
+    Open up to `connections` connections and return them to the pool.
+
+    Requests then skip the TCP, TLS and authentication handshakes of a cold pool. Failures
+    are logged, not raised: the pool fills on demand when the database comes back.
+    """
+    connections = min(connections, engine.sync_engine.pool.size())  # type: ignore[attr-defined]
+    if connections <= 0:
+        return
+    try:
+        async with AsyncExitStack() as stack:
+            # Held concurrently, otherwise every checkout would reuse the first connection.
+            await asyncio.gather(
+                *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+            )
+    except (exc.SQLAlchemyError, OSError, TimeoutError):
+        logger.warning("Could not warm up the %s pool", engine.url.host, exc_info=True)
+
+
+def render_prometheus(engines: Iterable[AsyncEngine]) -> str:
+    """Pool gauges and counters of instrumented engines, in the Prometheus text format."""
+    pools = [
+        engine.sync_engine.pool
+        for engine in engines
+        if isinstance(engine.sync_engine.pool, InstrumentedPool)
+    ]
+    gauges = {
+        "db_pool_size": lambda pool: pool.size(),
+        "db_pool_checked_out": lambda pool: pool.checkedout(),
+        "db_pool_checked_in": lambda pool: pool.checkedin(),
+        # Negative while the pool is below its size: only connections beyond it are overflow.
+        "db_pool_overflow": lambda pool: max(pool.overflow(), 0),
+    }
+    counters = {
+        "db_pool_checkout_timeouts_total": "timeouts",
+        "db_pool_connections_opened_total": "connects",
+        "db_pool_connections_closed_total": "closes",
+        "db_pool_connections_invalidated_total": "invalidations",
+    }
+
+    lines: list[str] = []
+    for name, gauge in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(render_sample(name, gauge(pool), pool=pool.metrics.name) for pool in pools)
+    for name, attribute in counters.items():
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(
+            render_sample(name, getattr(pool.metrics, attribute), pool=pool.metrics.name)
+            for pool in pools
+        )
+    lines.append("# TYPE db_pool_checkout_seconds histogram")
+    for pool in pools:
+        lines.extend(
+            render_histogram(
+                "db_pool_checkout_seconds", pool.metrics.checkout_seconds, pool=pool.metrics.name
+            )
+        )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from sqlalchemy import Delete, Insert, Update, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from database.pool import warm_up
+
+logger = logging.getLogger(__name__)
+
+Balancing = Literal["round_robin", "least_connections"]
+
+# Seconds of replay lag; 0 when the replica has replayed everything it received.
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+# Set for requests that must read from the primary: unsafe methods, and requests within the
+# read-your-writes window of a client's last write (see `core.middlewares`).
+use_primary: ContextVar[bool] = ContextVar("use_primary", default=False)
+
+
+@dataclass
+class Replica:
+    engine: AsyncEngine
+    name: str
+    lag: float = 0.0
+    healthy: bool = True
+
+    @property
+    def connections(self) -> int:
+        return self.engine.sync_engine.pool.checkedout()  # type: ignore[attr-defined]
+
+
+@dataclass
+class ReplicaSet:
+    """Primary and read replicas, with load balancing and lag-based eviction."""
+
+    primary: AsyncEngine
+    replicas: list[Replica] = field(default_factory=list)
+    balancing: Balancing = "round_robin"
+    max_lag: float = 5.0
+    check_interval: float = 5.0
+    autocommit_reads: bool = False
+    min_connections: int = 0
+    _read_engines: dict[AsyncEngine, Engine] = field(default_factory=dict, init=False)
+    _cycle: itertools.count = field(default_factory=itertools.count, init=False)
+    _monitor: asyncio.Task | None = field(default=None, init=False)
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return [self.primary, *(replica.engine for replica in self.replicas)]
+
+    def choose(self) -> AsyncEngine:
+        """Pick a replica in rotation, or the primary when none is usable."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy or use_primary.get():
+            return self.primary
+        if self.balancing == "least_connections":
+            return min(healthy, key=lambda replica: replica.connections).engine
+        return healthy[next(self._cycle) % len(healthy)].engine
+
+    def read_engine(self) -> Engine:
+        """The engine for a read-only session, in AUTOCOMMIT mode if `autocommit_reads`."""
+        engine = self.choose()
+        if not self.autocommit_reads:
+            return engine.sync_engine
+        read_engine = self._read_engines.get(engine)
+        if read_engine is None:
+            # Shares the engine's pool; statements run without BEGIN/ROLLBACK round trips.
+            read_engine = self._read_engines[engine] = engine.sync_engine.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+        return read_engine
+
+    async def check_lag(self) -> None:
+        """Measure every replica's lag, taking lagging or unreachable ones out of rotation."""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as connection:
+                    replica.lag = float(await connection.scalar(_LAG_QUERY) or 0)
+                healthy = replica.lag <= self.max_lag
+            except (SQLAlchemyError, OSError, TimeoutError):
+                logger.warning("Replica %s is unreachable", replica.name, exc_info=True)
+                healthy = False
+            if healthy != replica.healthy:
+                logger.warning(
+                    "Replica %s %s rotation (lag %.1fs)",
+                    replica.name,
+                    "back in" if healthy else "out of",
+                    replica.lag,
+                )
+            replica.healthy = healthy
+
+    async def _monitor_lag(self) -> None:
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(self.check_interval)
+
+    async def start(self) -> None:
+        """Warm up every pool to `min_connections` and start monitoring replica lag."""
+        await asyncio.gather(*(warm_up(engine, self.min_connections) for engine in self.engines))
+        if self.replicas and self._monitor is None:
+            self._monitor = asyncio.create_task(self._monitor_lag())
+
+    async def close(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+            self._monitor = None
+        await asyncio.gather(*(replica.engine.dispose() for replica in self.replicas))
+
+
+class RoutingSession(Session):
+    """
+    Session reading from a replica and writing to the primary.
+
+    The replica is picked once per session, so its reads see one consistent replica. After
+    the first write, everything (reads included) goes to the primary to read its own writes.
+    """
+
+    replica_set: ReplicaSet
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._read_engine: Engine | None = None
+        self._wrote = False
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Engine:
+        locking = getattr(clause, "_for_update_arg", None) is not None
+        if self._flushing or locking or isinstance(clause, (Insert, Update, Delete)):
+            self._wrote = True
+        if self._wrote:
+            return self.replica_set.primary.sync_engine
+        if self._read_engine is None:
+            self._read_engine = self.replica_set.read_engine()
+        return self._read_engine
@@ -1,16 +1,44 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from config.settings import get_setting
+from database.instrumentation import instrument_engine
+from database.pool import create_instrumented_engine
+from database.replicas import Replica, ReplicaSet, RoutingSession
 
 db_settings = get_setting("db")
-engine = create_async_engine(
-    url=str(db_settings.DATABASE_ASYNC_URL),
-    pool_size=db_settings.MAX_CONNECTIONS,
-    max_overflow=db_settings.MAX_OVERFLOW,
-    pool_pre_ping=True,
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    engine = create_instrumented_engine(
+        url,
+        name,
+        pool_size=db_settings.MAX_CONNECTIONS,
+        max_overflow=db_settings.MAX_OVERFLOW,
+        pool_timeout=db_settings.TIMEOUT,
+        pool_pre_ping=True,
+    )
+    instrument_engine(engine, db_settings.DATABASE_SLOW_QUERY_THRESHOLD)
+    return engine
+
+
+engine = _create_engine(str(db_settings.DATABASE_ASYNC_URL), "primary")
+
+replica_set = ReplicaSet(
+    primary=engine,
+    replicas=[
+        Replica(engine=_create_engine(str(url), name), name=name)
+        for url in db_settings.DATABASE_REPLICA_URLS
+        for name in [f"{url.host}:{url.port or 5432}"]
+    ],
+    balancing=db_settings.DATABASE_REPLICA_BALANCING,
+    max_lag=db_settings.DATABASE_REPLICA_MAX_LAG,
+    check_interval=db_settings.DATABASE_REPLICA_CHECK_INTERVAL,
+    autocommit_reads=db_settings.DATABASE_READONLY_AUTOCOMMIT,
+    min_connections=db_settings.MIN_CONNECTIONS,
 )
+RoutingSession.replica_set = replica_set
 
 AsyncLocalSession = async_sessionmaker(
     bind=engine,
@@ -20,13 +48,34 @@ AsyncLocalSession = async_sessionmaker(
     autocommit=False,
 )
 
+AsyncReadOnlySession = async_sessionmaker(
+    expire_on_commit=False,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    # The transaction begins, and a pool connection is checked out, on first use only: requests
+    # answered from the cache or rejected early never hold a connection.
     async with AsyncLocalSession() as session:
         try:
-            await session.begin()
             yield session
-            await session.commit()
+            if session.in_transaction():
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_db_readonly() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints, served by a replica when one is in rotation.
+
+    Like `get_db`, it only takes a connection on first use. With DATABASE_READONLY_AUTOCOMMIT,
+    reads also skip BEGIN/ROLLBACK, at the cost of each statement seeing its own snapshot.
+    """
+    async with AsyncReadOnlySession() as session:
+        # Nothing is committed: writes belong in `get_db`. Closing rolls back and releases.
+        yield session
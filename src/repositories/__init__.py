@@ -0,0 +1,4 @@
+from repositories.base import BaseRepository
+from repositories.loader import BatchLoader
+
+__all__ = ("BaseRepository", "BatchLoader")
@@ -0,0 +1,229 @@
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import timedelta
+from itertools import batched
+from typing import Any, ClassVar
+
+from sqlalchemy import Table, column, delete, func, insert, select, table, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import Base
+from repositories.loader import BatchLoader
+
+# Rows per INSERT/UPDATE statement; 1000 rows of 30 columns stay under asyncpg's 32767
+# bind parameter limit.
+DEFAULT_BATCH_SIZE = 1000
+
+
+class BaseRepository[ModelT: Base]:
+    """
+    Data access for one model, with set-based bulk operations.
+
+    Methods run on the caller's session (e.g. from `get_db` or `AsyncLocalSession()`) and
+    never commit, so several calls share one transaction.
+
+    Usage:
+        class QuestionRepository(BaseRepository[Question]):
+            model = Question
+
+        async with AsyncLocalSession() as session, session.begin():
+            await QuestionRepository(session).insert_many(rows)
+    """
+
+    model: ClassVar[type[Any]]
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def table(self) -> Table:
+        return self.model.__table__
+
+    async def get(self, id: int) -> ModelT | None:
+        if len(self.table.primary_key) > 1:
+            # Partitioned tables key rows by (id, created_at); `id` alone is still unique.
+            return await self.session.scalar(select(self.model).where(self.model.id == id))
+        return await self.session.get(self.model, id)
+
+    async def get_many(self, ids: Sequence[int]) -> list[ModelT]:
+        """Load the rows with the given primary keys, in no particular order."""
+        if not ids:
+            return []
+        result = await self.session.scalars(select(self.model).where(self.model.id.in_(ids)))
+        return list(result)
+
+    async def load(self, id: int) -> ModelT | None:
+        """Like `get`, batched with the lookups awaited alongside it; see `BatchLoader`."""
+        return await BatchLoader.for_session(self.session).load(self.model, id)
+
+    async def load_many(self, ids: Sequence[int]) -> list[ModelT | None]:
+        """The rows with the given primary keys in input order, None for missing ones."""
+        return await BatchLoader.for_session(self.session).load_many(self.model, ids)
+
+    async def insert_many(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        returning: bool = False,
+    ) -> list[int]:
+        """
+        Insert rows with multi-row INSERT statements instead of one flush per object.
+
+        Args:
+            rows: Column values by column name; omitted columns get their defaults.
+            batch_size: Rows per statement.
+            returning: Return the primary keys of the inserted rows, in input order.
+
+        Returns:
+            The inserted primary keys if `returning`, else an empty list.
+        """
+        statement = insert(self.table)
+        if returning:
+            statement = statement.returning(self.table.c.id, sort_by_parameter_order=True)
+
+        ids: list[int] = []
+        for batch in batched(rows, batch_size):
+            result = await self.session.execute(statement, list(batch))
+            if returning:
+                ids.extend(result.scalars())
+        return ids
+
+    async def upsert_many(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        conflict_columns: Sequence[str],
+        update_columns: Sequence[str] | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        Insert rows, updating the existing ones with INSERT ... ON CONFLICT DO UPDATE.
+
+        Args:
+            rows: Column values by column name, all rows with the same columns.
+            conflict_columns: Columns of the unique index or constraint identifying a row.
+            update_columns: Columns overwritten on conflict; defaults to every provided column
+                but the conflict ones. Empty means ON CONFLICT DO NOTHING.
+            batch_size: Rows per statement.
+
+        Returns:
+            The number of rows inserted or updated.
+        """
+        count = 0
+        for batch in batched(rows, batch_size):
+            values = list(batch)
+            statement = pg_insert(self.table)
+            if update_columns is None:
+                update_columns = [
+                    column
+                    for column in values[0]
+                    if column not in conflict_columns and column not in ("id", "created_at")
+                ]
+            if update_columns:
+                statement = statement.on_conflict_do_update(
+                    index_elements=list(conflict_columns),
+                    set_={column: statement.excluded[column] for column in update_columns},
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=list(conflict_columns))
+            result = await self.session.execute(statement.values(values))
+            count += result.rowcount
+        return count
+
+    async def update_many(
+        self,
+        ids: Sequence[int],
+        values: Mapping[str, Any],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        Apply the same values to every row in `ids` with UPDATE ... WHERE id IN (...).
+
+        Objects already loaded in the session are not refreshed.
+
+        Returns:
+            The number of rows updated.
+        """
+        count = 0
+        for batch in batched(ids, batch_size):
+            result = await self.session.execute(
+                update(self.table).where(self.table.c.id.in_(batch)).values(dict(values))
+            )
+            count += result.rowcount
+        return count
+
+    async def bulk_update(
+        self, rows: Iterable[Mapping[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> None:
+        """
+        Update rows with per-row values, each mapping holding the row's `id`.
+
+        Rows of a batch sharing the same columns are sent as one executemany UPDATE.
+        """
+        for batch in batched(rows, batch_size):
+            await self.session.execute(update(self.model), list(batch))
+
+    async def purge_deleted(
+        self, older_than: timedelta, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> int:
+        """
+        Permanently delete up to `batch_size` rows soft-deleted more than `older_than` ago.
+
+        The rows are moved to the model's `__archive_table__` when it names one, a table with
+        the same columns. Rows locked by other transactions are skipped, so purges run
+        alongside traffic; call repeatedly, one transaction per batch, until it returns less
+        than `batch_size`.
+
+        Returns:
+            The number of rows purged.
+        """
+        expired = (
+            select(self.table.c.id)
+            .where(self.table.c.deleted_at < func.now() - older_than)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        statement = delete(self.table).where(self.table.c.id.in_(expired.scalar_subquery()))
+        archive = getattr(self.model, "__archive_table__", None)
+        if archive is not None:
+            columns = [column.name for column in self.table.c]
+            moved = statement.returning(*self.table.c).cte("moved")
+            archive_table = table(
+                archive, *(column(name) for name in columns), schema=self.table.schema
+            )
+            statement = insert(archive_table).from_select(columns, select(*moved.c)).add_cte(moved)
+        result = await self.session.execute(statement.execution_options(hard_delete=True))
+        return result.rowcount
+
+    async def copy_many(
+        self,
+        rows: Iterable[Mapping[str, Any] | Sequence[Any]],
+        columns: Sequence[str],
+    ) -> int:
+        """
+        Load rows with PostgreSQL COPY through asyncpg, for very large loads.
+
+        COPY is an order of magnitude faster than INSERT, but bypasses ORM events and
+        Python-side defaults: omitted columns only get their server defaults, and
+        conflicting rows abort the whole load. Runs in the session's transaction.
+
+        Args:
+            rows: Mappings by column name, or sequences in `columns` order.
+            columns: The columns to load.
+
+        Returns:
+            The number of rows copied.
+        """
+        records = (
+            tuple(row[column] for column in columns) if isinstance(row, Mapping) else tuple(row)
+            for row in rows
+        )
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        status = await raw.driver_connection.copy_records_to_table(
+            self.table.name,
+            records=records,
+            columns=list(columns),
+            schema_name=self.table.schema,
+        )
+        # asyncpg returns the command tag, e.g. "COPY 10000"
+        return int(status.rsplit(" ", 1)[-1])
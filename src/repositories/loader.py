@@ -0,0 +1,96 @@
+import asyncio
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import ARRAY, any_, bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import Base
+
+
+class BatchLoader:
+    """
+    Primary-key loader batching the lookups made in the same event-loop tick.
+
+    Lookups of one model awaited together (e.g. through `asyncio.gather`) are resolved with
+    a single `WHERE id = ANY(:ids)` query, and results, misses included, are memoized for the
+    session's lifetime. With `get_db` that is the request, so resolving the relations of a
+    page costs one query per model whatever the page size.
+
+    Usage:
+        loader = BatchLoader.for_session(db)
+        authors = await loader.load_many(User, [question.author_id for question in page])
+
+    Rows inserted after a miss was memoized stay missing; call `clear()` after such writes.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._results: dict[tuple[type[Base], int], Any] = {}
+        self._pending: dict[type[Base], dict[int, asyncio.Future[Any]]] = {}
+        self._dispatch: asyncio.Task | None = None
+
+    @classmethod
+    def for_session(cls, session: AsyncSession) -> "BatchLoader":
+        """The loader attached to `session`, created on first use."""
+        loader = session.info.get("batch_loader")
+        if loader is None:
+            loader = session.info["batch_loader"] = cls(session)
+        return loader
+
+    async def load[ModelT: Base](self, model: type[ModelT], id: int) -> ModelT | None:
+        """The row with primary key `id`, or None."""
+        key = (model, id)
+        if key in self._results:
+            return self._results[key]
+
+        pending = self._pending.setdefault(model, {})
+        future = pending.get(id)
+        if future is None:
+            future = pending[id] = asyncio.get_running_loop().create_future()
+            if self._dispatch is None:
+                # Runs once every task that is ready now has queued its own lookups.
+                self._dispatch = asyncio.create_task(self._resolve())
+        return await future
+
+    async def load_many[ModelT: Base](
+        self, model: type[ModelT], ids: Iterable[int]
+    ) -> list[ModelT | None]:
+        """The rows with the given primary keys in input order, None for missing ones."""
+        return list(await asyncio.gather(*(self.load(model, id) for id in ids)))
+
+    def prime(self, *instances: Base) -> None:
+        """Memoize already loaded rows, e.g. from a list query, so they are not fetched again."""
+        for instance in instances:
+            self._results[(type(instance), instance.id)] = instance
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    async def _resolve(self) -> None:
+        # An AsyncSession runs one statement at a time, so models are fetched in turn.
+        try:
+            while self._pending:
+                model, pending = self._pending.popitem()
+                try:
+                    rows = await self._fetch(model, list(pending))
+                except BaseException as exc:
+                    for future in pending.values():
+                        if not future.done():
+                            future.set_exception(exc)
+                    if not isinstance(exc, Exception):
+                        raise
+                    continue
+                for id, future in pending.items():
+                    row = self._results[(model, id)] = rows.get(id)
+                    if not future.done():
+                        future.set_result(row)
+        finally:
+            self._dispatch = None
+
+    async def _fetch(self, model: type[Base], ids: list[int]) -> dict[int, Any]:
+        # One array parameter: the statement is the same for any number of ids, so PostgreSQL
+        # reuses its prepared plan, and no bind parameter limit applies.
+        ids_param = bindparam("ids", ids, type_=ARRAY(model.id.type))
+        result = await self.session.scalars(select(model).where(model.id == any_(ids_param)))
+        return {row.id: row for row in result}
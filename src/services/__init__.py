@@ -1,3 +1,28 @@
+from services.dispatch import BatchTooLarge, dispatch_many, dispatch_unique
+from services.executors import ProcessPool, get_process_pool, in_process
+from services.results import (
+    RecordingTaskExecutor,
+    ResultBackend,
+    TaskResult,
+    get_result_backend,
+)
+from services.routing import route_for, task
 from services.tasks import echo_message_task
+from services.worker import WeightedQueueWorker
 
-__all__ = ("echo_message_task",)
+__all__ = (
+    "BatchTooLarge",
+    "ProcessPool",
+    "RecordingTaskExecutor",
+    "ResultBackend",
+    "TaskResult",
+    "WeightedQueueWorker",
+    "dispatch_many",
+    "dispatch_unique",
+    "echo_message_task",
+    "get_process_pool",
+    "get_result_backend",
+    "in_process",
+    "route_for",
+    "task",
+)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from time import time
+from typing import Any
+
+from asynctasq import ensure_cleanup_registered
+from asynctasq.config import Config
+from asynctasq.core.dispatcher import get_dispatcher
+from asynctasq.drivers.base_driver import BaseDriver
+from asynctasq.drivers.redis_driver import RedisDriver
+from asynctasq.monitoring import EventRegistry, EventType, TaskEvent
+from asynctasq.tasks import BaseTask
+
+from config.settings import get_setting
+from services.results import get_result_backend
+
+logger = logging.getLogger(__name__)
+
+
+class BatchTooLarge(ValueError):
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"Batch of {size} tasks exceeds the limit of {limit}")
+        self.size = size
+        self.limit = limit
+
+
+# (queue, payload, delay in seconds, task) as `Dispatcher.dispatch` would enqueue them.
+type _Envelope = tuple[str, bytes, int, BaseTask]
+
+
+async def dispatch_many(
+    tasks: Sequence[BaseTask],
+    queue: str | None = None,
+    delay: int | None = None,
+) -> list[str]:
+    """
+    Enqueue `tasks` in one broker round trip per driver and return their task ids, in order.
+
+    On Redis the payloads are sent in a single non-transactional pipeline, one LPUSH per
+    queue (and one ZADD per queue for delayed tasks), instead of a round trip per task as
+    with `task.dispatch()`. Other drivers fall back to enqueueing the tasks one by one.
+
+    Args:
+        tasks: Task instances, e.g. `[echo_message_task(message=m) for m in messages]`.
+        queue: Overrides each task's configured queue.
+        delay: Overrides each task's configured delay, in seconds.
+
+    Raises:
+        BatchTooLarge: More tasks than `ASYNCTASQ_MAX_BATCH_SIZE`; split them up instead.
+    """
+    limit = get_setting("asynctasq").ASYNCTASQ_MAX_BATCH_SIZE
+    if len(tasks) > limit:
+        raise BatchTooLarge(len(tasks), limit)
+    return await _dispatch(tasks, [str(uuid.uuid4()) for _ in tasks], queue, delay)
+
+
+async def dispatch_unique(
+    task: BaseTask,
+    key: str | None = None,
+    window: float | None = None,
+    coalesce: bool = False,
+    queue: str | None = None,
+    delay: int | None = None,
+) -> str:
+    """
+    Enqueue `task` unless the same one was within `window` seconds, and return the task id
+    of whichever was enqueued: retried requests do not run the same work twice.
+
+    The key is claimed atomically in the result backend, before enqueueing.
+
+    Args:
+        key: Idempotency key, e.g. a client's `Idempotency-Key` header. By default, the
+            task's function and arguments: identical tasks are deduplicated.
+        window: Seconds a key is held, `ASYNCTASQ_DEDUP_WINDOW` by default.
+        coalesce: Only merge into a task still waiting in its queue: the key is freed as soon
+            as the task starts running (or at the end of the window, whichever is first), so
+            a later identical dispatch runs again, e.g. to rebuild data that changed since.
+    """
+    key = f"{_task_name(task)}:{key if key is not None else _task_digest(task)}"
+    if window is None:
+        window = get_setting("asynctasq").ASYNCTASQ_DEDUP_WINDOW
+    task_id = str(uuid.uuid4())
+    results = get_result_backend()
+    existing = await results.claim(key, task_id, window, coalesce)
+    if existing is not None:
+        logger.info("Task %s deduplicated into %s", _task_name(task), existing)
+        return existing
+    try:
+        await _dispatch([task], [task_id], queue, delay)
+    except BaseException:
+        await results.release(key, task_id)
+        raise
+    return task_id
+
+
+def _task_name(task: BaseTask) -> str:
+    func = getattr(task, "func", None)
+    source = func if func is not None else type(task)
+    return f"{source.__module__}.{source.__qualname__}"
+
+
+def _task_digest(task: BaseTask) -> str:
+    # The parameters `TaskSerializer` sends, without the per-dispatch metadata.
+    if hasattr(task, "func"):
+        arguments: Any = [task.args, task.kwargs]
+    else:
+        arguments = {
+            name: value
+            for name, value in vars(task).items()
+            if not name.startswith("_") and name != "config" and not callable(value)
+        }
+    encoded = json.dumps(arguments, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+async def _dispatch(
+    tasks: Sequence[BaseTask],
+    task_ids: Sequence[str],
+    queue: str | None,
+    delay: int | None,
+) -> list[str]:
+    await ensure_cleanup_registered()
+
+    # Keyed by identity: the drivers are (unhashable) dataclasses.
+    drivers: dict[int, BaseDriver] = {}
+    batches: dict[int, list[_Envelope]] = defaultdict(list)
+    for task, task_id in zip(tasks, task_ids, strict=True):
+        dispatcher = get_dispatcher(task.config.get("driver"))
+        task._task_id = task_id
+        task._dispatched_at = datetime.now(UTC)
+        target_queue = queue or task.config.get("queue") or "default"
+        delay_seconds = delay if delay is not None else getattr(task, "_delay_seconds", None) or 0
+        payload = dispatcher._task_serializer.serialize(task)
+        driver = dispatcher._get_driver(task)
+        drivers[id(driver)] = driver
+        batches[id(driver)].append((target_queue, payload, delay_seconds, task))
+
+    for key, envelopes in batches.items():
+        driver = drivers[key]
+        if isinstance(driver, RedisDriver):
+            await _enqueue_redis(driver, envelopes)
+        else:
+            await _enqueue_each(driver, envelopes)
+        for target_queue, _, _, task in envelopes:
+            EventRegistry.emit_nowait(
+                TaskEvent(
+                    event_type=EventType.TASK_ENQUEUED,
+                    task_id=task._task_id,
+                    task_name=task.__class__.__name__,
+                    queue=target_queue,
+                    worker_id="dispatcher",
+                )
+            )
+        logger.info("Dispatched %d tasks using %s", len(envelopes), type(driver).__name__)
+    return [task._task_id for task in tasks]
+
+
+async def _enqueue_redis(driver: RedisDriver, envelopes: list[_Envelope]) -> None:
+    if driver.client is None:
+        await driver.connect()
+    # The keys `RedisDriver.enqueue` writes to. Workers pop from the right of the list, so
+    # pushing a queue's payloads in order in one LPUSH keeps them FIFO.
+    immediate: dict[str, list[bytes]] = defaultdict(list)
+    delayed: dict[str, dict[bytes, float]] = defaultdict(dict)
+    now = time()
+    for target_queue, payload, delay_seconds, _ in envelopes:
+        if delay_seconds > 0:
+            delayed[target_queue][payload] = now + delay_seconds
+        else:
+            immediate[target_queue].append(payload)
+
+    pipeline = driver.client.pipeline(transaction=False)
+    for target_queue, payloads in immediate.items():
+        pipeline.lpush(f"queue:{target_queue}", *payloads)
+    for target_queue, scores in delayed.items():
+        pipeline.zadd(f"queue:{target_queue}:delayed", scores)
+    await pipeline.execute()
+
+
+async def _enqueue_each(driver: BaseDriver, envelopes: list[_Envelope]) -> None:
+    default_max_attempts = Config.get().task_defaults.max_attempts
+    for target_queue, payload, delay_seconds, task in envelopes:
+        await driver.enqueue(
+            target_queue,
+            payload,
+            delay_seconds,
+            task._current_attempt,
+            task.config.get("visibility_timeout", 3600),
+            task.config.get("max_attempts", default_max_attempts),
+        )
@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import importlib
+import inspect
+import logging
+import multiprocessing
+import os
+import signal
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Literal
+
+from config.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+Executor = Literal["async", "process"]
+
+
+def _timed_out(signum: int, frame: Any) -> None:
+    raise TimeoutError("Task exceeded timeout")
+
+
+def _call_in_child(
+    path: str, args: tuple[Any, ...], kwargs: dict[str, Any], timeout: float | None
+) -> Any:
+    # Functions are sent by import path: the module attribute of a task is its wrapper, so
+    # pickling the function itself fails, and the child unwraps it back here.
+    module_name, _, qualname = path.partition(":")
+    target: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        target = getattr(target, name)
+    func = inspect.unwrap(target)
+
+    # Stops runaway work in the child itself, so the slot frees up even after the parent
+    # stopped waiting; C code that never returns to the interpreter is not interrupted.
+    if timeout:
+        signal.signal(signal.SIGALRM, _timed_out)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if inspect.iscoroutinefunction(func):
+            return asyncio.run(func(*args, **kwargs))
+        return func(*args, **kwargs)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ProcessPool:
+    """
+    A `ProcessPoolExecutor` for CPU-bound task bodies, created on first use.
+
+    It has one process per core unless `ASYNCTASQ_PROCESS_POOL_SIZE` says otherwise.
+    Processes are spawned, not forked, so no locks or connections of the worker are
+    inherited. A pool broken by a crashed child (e.g. OOM-killed) is replaced.
+
+    So that leaks do not build up, the pool is replaced by a fresh one once it has been
+    given `ASYNCTASQ_PROCESS_MAX_TASKS_PER_CHILD` tasks per process; the old one finishes
+    its tasks in the background. (The executor's own `max_tasks_per_child` can deadlock
+    when tasks are queued as a child retires.)
+    """
+
+    def __init__(self, size: int | None = None, max_tasks_per_child: int | None = None):
+        asynctasq_settings = get_setting("asynctasq")
+        self.size = size or asynctasq_settings.ASYNCTASQ_PROCESS_POOL_SIZE or os.cpu_count() or 1
+        self.max_tasks_per_child = (
+            max_tasks_per_child or asynctasq_settings.ASYNCTASQ_PROCESS_MAX_TASKS_PER_CHILD
+        )
+        self._executor: ProcessPoolExecutor | None = None
+        self._submitted = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is not None and self._submitted >= self.size * self.max_tasks_per_child:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size, mp_context=multiprocessing.get_context("spawn")
+            )
+            self._submitted = 0
+        self._submitted += 1
+        return self._executor
+
+    async def run(
+        self,
+        path: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Call the function at `path` (`module:qualname`) in a child process.
+
+        Arguments and the result cross the process boundary pickled, so they must be
+        picklable; ORM instances, clients and such should be passed by id instead.
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, _call_in_child, path, args, kwargs, timeout)
+        except BrokenProcessPool:
+            if self._executor is executor:
+                logger.error("Process pool broken by a dead child, replacing it")
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache(maxsize=1)
+def get_process_pool() -> ProcessPool:
+    return ProcessPool()
+
+
+def in_process[**P, R](func: Callable[P, R], timeout: float | None = None) -> Callable[P, Any]:
+    """Make `func`, sync or async, run in the process pool when called (and awaited)."""
+    if "<locals>" in func.__qualname__:
+        raise ValueError(f"{func.__qualname__} must be importable to run in a process")
+    path = f"{func.__module__}:{func.__qualname__}"
+
+    @functools.wraps(func)
+    async def run_in_process(*args: P.args, **kwargs: P.kwargs) -> Any:
+        return await get_process_pool().run(path, args, kwargs, timeout)
+
+    return run_in_process
@@ -0,0 +1,285 @@
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Any, Literal
+
+from asynctasq.tasks import BaseTask
+from asynctasq.tasks.services.executor import TaskExecutor
+from pydantic import BaseModel, ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from config.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+TaskStatus = Literal["pending", "running", "retrying", "succeeded", "failed"]
+
+FINAL_STATUSES: frozenset[TaskStatus] = frozenset({"succeeded", "failed"})
+
+# Claims a dedup key unless it is held, returning the holder: SET NX GET, which needs
+# Redis 7. These scripts only use commands of Redis 6.0 (GETDEL came in 6.2 too).
+# With a second key, also marks the task as coalesced, pointing at the dedup key.
+# KEYS: dedup key[, coalesce marker]. ARGV: task id, window in milliseconds.
+_CLAIM = """
+local holder = redis.call('GET', KEYS[1])
+if holder then
+    return holder
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+if KEYS[2] then
+    redis.call('SET', KEYS[2], KEYS[1], 'PX', ARGV[2])
+end
+return false
+"""
+
+# Once a coalesced task starts, its dedup key is freed for the next identical dispatch,
+# unless a newer task already holds it.
+_RELEASE_COALESCED = """
+local key = redis.call('GET', KEYS[1])
+if key then
+    redis.call('DEL', KEYS[1])
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+    end
+end
+"""
+
+_RELEASE_IF_HELD = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class TaskResult(BaseModel):
+    task_id: str
+    status: TaskStatus = "pending"
+    result: Any = None
+    error: str | None = None
+    updated_at: datetime | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+
+class ResultBackend:
+    """
+    Task states in the `ASYNCTASQ_RESULT_BACKEND_URL` Redis, kept `ASYNCTASQ_RESULT_TTL`
+    seconds; workers write them through `RecordingTaskExecutor`.
+
+    Every change is also published on `ASYNCTASQ_RESULT_CHANNEL`. A process reads them with
+    a single subscription, started by `start()`, and hands them out to its waiting requests,
+    so long-polls and event streams hold no Redis connection of their own.
+
+    Usage:
+        results = ResultBackend()
+        await results.start()
+        result = await results.wait(task_id, timeout=10)
+    """
+
+    def __init__(self, client: Redis | None = None):
+        __settings = get_setting("asynctasq")
+        url = __settings.ASYNCTASQ_RESULT_BACKEND_URL
+        if client is None:
+            if url.scheme not in ("redis", "rediss"):
+                raise ValueError(f"The result backend must be Redis, got {url.scheme}")
+            client = Redis.from_url(str(url))
+        self.client = client
+        self.ttl = __settings.ASYNCTASQ_RESULT_TTL
+        self._channel = __settings.ASYNCTASQ_RESULT_CHANNEL
+        self._waiters: dict[str, set[asyncio.Queue[TaskResult | None]]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+
+    @staticmethod
+    def key(task_id: str) -> str:
+        return f"asynctasq:result:{task_id}"
+
+    @staticmethod
+    def dedup_key(key: str) -> str:
+        return f"asynctasq:dedup:{key}"
+
+    @staticmethod
+    def coalesce_key(task_id: str) -> str:
+        return f"asynctasq:coalesce:{task_id}"
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.client.aclose()
+
+    async def record(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        result: Any = None,
+        error: str | None = None,
+    ) -> None:
+        state = TaskResult(
+            task_id=task_id,
+            status=status,
+            result=result,
+            error=error,
+            updated_at=datetime.now(UTC),
+        )
+        # Results that are not JSON serializable are stored as their string form.
+        payload = state.model_dump_json(fallback=str)
+        async with self.client.pipeline(transaction=False) as pipeline:
+            pipeline.set(self.key(task_id), payload, ex=self.ttl)
+            pipeline.publish(self._channel, payload)
+            if status == "running":
+                pipeline.eval(_RELEASE_COALESCED, 1, self.coalesce_key(task_id), task_id)
+            await pipeline.execute()
+
+    async def claim(
+        self, key: str, task_id: str, window: float, coalesce: bool = False
+    ) -> str | None:
+        """
+        Claim the dedup `key` for `task_id` during `window` seconds, atomically (in a script,
+        so Redis 6 is enough).
+
+        Args:
+            coalesce: Free the key as soon as the task starts running, instead of at the end
+                of the window.
+
+        Returns:
+            The task id already holding the key, or None if `task_id` claimed it.
+        """
+        window_ms = max(int(window * 1000), 1)
+        keys = [self.dedup_key(key)]
+        if coalesce:
+            keys.append(self.coalesce_key(task_id))
+        existing = await self.client.eval(_CLAIM, len(keys), *keys, task_id, window_ms)
+        return existing.decode() if existing is not None else None
+
+    async def release(self, key: str, task_id: str) -> None:
+        """Free the dedup `key` if `task_id` still holds it, e.g. when its enqueue failed."""
+        await self.client.eval(_RELEASE_IF_HELD, 1, self.dedup_key(key), task_id)
+
+    async def get(self, task_id: str) -> TaskResult:
+        """The task's last recorded state, `pending` if it has none (yet, or anymore)."""
+        payload = await self.client.get(self.key(task_id))
+        if payload is None:
+            return TaskResult(task_id=task_id)
+        return TaskResult.model_validate_json(payload)
+
+    async def wait(self, task_id: str, timeout: float) -> TaskResult:
+        """The task's state once it is final, or its latest state after `timeout` seconds."""
+        state = None
+        async for state in self.stream(task_id, timeout):
+            pass
+        assert state is not None
+        return state
+
+    async def stream(self, task_id: str, timeout: float) -> AsyncIterator[TaskResult]:
+        """The task's current state, then each change until it is final or `timeout` expires."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # Subscribed before reading, so no change falls between the read and the first wait.
+        async with self._subscribe(task_id) as updates:
+            state = await self.get(task_id)
+            yield state
+            while not state.done:
+                try:
+                    update = await asyncio.wait_for(updates.get(), deadline - loop.time())
+                except TimeoutError:
+                    return
+                if update is None:  # resubscribed, changes may have been missed meanwhile
+                    update = await self.get(task_id)
+                if update != state:
+                    state = update
+                    yield state
+
+    @asynccontextmanager
+    async def _subscribe(self, task_id: str) -> AsyncIterator[asyncio.Queue[TaskResult | None]]:
+        updates: asyncio.Queue[TaskResult | None] = asyncio.Queue()
+        self._waiters[task_id].add(updates)
+        try:
+            yield updates
+        finally:
+            self._waiters[task_id].discard(updates)
+            if not self._waiters[task_id]:
+                del self._waiters[task_id]
+
+    def _notify(self, state: TaskResult | None, task_id: str | None = None) -> None:
+        queues = (
+            self._waiters.get(task_id, ())
+            if task_id is not None
+            else [queue for queues in self._waiters.values() for queue in queues]
+        )
+        for queue in queues:
+            queue.put_nowait(state)
+
+    async def _listen(self) -> None:
+        backoff = 0.1
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                self._notify(None)
+                backoff = 0.1
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None or message["type"] != "message":
+                        continue
+                    try:
+                        state = TaskResult.model_validate_json(message["data"])
+                    except ValidationError:
+                        logger.warning("Skipping malformed message on %s", self._channel)
+                        continue
+                    self._notify(state, state.task_id)
+            except (RedisError, OSError):
+                logger.warning("Task result listener disconnected, retrying")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+            finally:
+                await pubsub.aclose()
+
+
+@lru_cache(maxsize=1)
+def get_result_backend() -> ResultBackend:
+    return ResultBackend()
+
+
+class RecordingTaskExecutor(TaskExecutor):
+    """Task executor recording each task's state and result in the result backend."""
+
+    def __init__(self, results: ResultBackend):
+        super().__init__()
+        self.results = results
+
+    async def execute(self, task: BaseTask, timeout: float | None = None) -> None:
+        task_id = task._task_id
+        assert task_id is not None
+        await self._record(task_id, "running")
+        effective_timeout = timeout if timeout is not None else task.config.get("timeout")
+        try:
+            if effective_timeout:
+                result = await asyncio.wait_for(task.run(), timeout=effective_timeout)
+            else:
+                result = await task.run()
+        except Exception as exc:
+            # The worker makes the same retry decision right after.
+            status: TaskStatus = "retrying" if self.should_retry(task, exc) else "failed"
+            await self._record(task_id, status, error=f"{type(exc).__name__}: {exc}")
+            raise
+        await self._record(task_id, "succeeded", result=result)
+
+    async def _record(self, task_id: str, status: TaskStatus, **fields: Any) -> None:
+        # Losing a state update must not fail (and retry) the task itself.
+        try:
+            await self.results.record(task_id, status, **fields)
+        except (RedisError, OSError):
+            logger.warning("Could not record task %s as %s", task_id, status, exc_info=True)
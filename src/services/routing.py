@@ -0,0 +1,54 @@
+from collections.abc import Callable
+from fnmatch import fnmatchcase
+from typing import Any
+
+from asynctasq import task as _task
+from asynctasq.tasks.types.function_task import TaskFunction
+
+from config.settings import get_setting
+from services.executors import Executor, in_process
+
+
+def route_for(name: str) -> str:
+    """
+    The queue of the task `name` (`module.function`): the first `ASYNCTASQ_TASK_ROUTES`
+    pattern it matches, else `ASYNCTASQ_TASK_DEFAULTS_QUEUE`.
+    """
+    asynctasq_settings = get_setting("asynctasq")
+    for pattern, queue in asynctasq_settings.ASYNCTASQ_TASK_ROUTES.items():
+        if fnmatchcase(name, pattern):
+            return queue
+    return asynctasq_settings.ASYNCTASQ_TASK_DEFAULTS_QUEUE
+
+
+def task(
+    queue: str | None = None, executor: Executor = "async", **options: Any
+) -> Callable[[Callable[..., Any]], TaskFunction]:
+    """
+    `asynctasq.task`, with the queue routed by the settings unless given explicitly.
+
+    The queue is resolved when the task is declared, so every dispatch path (`dispatch()`,
+    `dispatch_many`, `dispatch_unique`) and the workers agree on it.
+
+    With `executor="process"` the body runs in the worker's process pool (`ProcessPool`)
+    instead of on its event loop, for CPU-bound work; the `timeout` option then also stops
+    the child process.
+
+    Usage:
+        @task(max_attempts=5)
+        async def send_report(report_id: int) -> None: ...
+
+        @task(executor="process", timeout=60)
+        def render_thumbnail(image_id: int) -> bytes: ...
+    """
+
+    def decorator(func: Callable[..., Any]) -> TaskFunction:
+        target = queue or route_for(f"{func.__module__}.{func.__qualname__}")
+        queues = get_setting("asynctasq").QUEUES
+        if target not in queues:
+            raise ValueError(f"Task {func.__qualname__} routed to undeclared queue {target!r}")
+        if executor == "process":
+            func = in_process(func, options.get("timeout"))
+        return _task(queue=target, **options)(func)
+
+    return decorator
@@ -1,6 +1,6 @@
-from asynctasq import task
+from services.routing import task
 
 
-@task(queue="default")
+@task()
 async def echo_message_task(message: str) -> str:
     return f"processed: {message}"
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Mapping
+from typing import Any
+
+from asynctasq.core.worker import Worker
+from asynctasq.drivers.base_driver import BaseDriver
+
+from config.settings import QueueSettings
+
+logger = logging.getLogger(__name__)
+
+
+class WeightedQueueWorker(Worker):
+    """
+    Worker consuming several queues with weighted fair scheduling.
+
+    The stock worker polls its queues in order, so a backlogged first queue starves the
+    others. Here every free slot goes to a queue picked by smooth weighted round-robin among
+    those with work and spare concurrency: a queue of priority 4 gets four picks for every
+    one of a priority 1 queue while both are backlogged, and an idle queue's share goes to
+    the others. Each queue also has its own concurrency limit, so bulk work can never take
+    all the slots latency-sensitive tasks need.
+
+    Usage:
+        worker = WeightedQueueWorker(driver, get_setting("asynctasq").QUEUES)
+        await worker.start()
+    """
+
+    def __init__(
+        self,
+        queue_driver: BaseDriver,
+        queues: Mapping[str, QueueSettings],
+        concurrency: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(
+            queue_driver,
+            queues=list(queues),
+            concurrency=concurrency or sum(queue.concurrency for queue in queues.values()),
+            **kwargs,
+        )
+        self.queue_settings = dict(queues)
+        self._active = dict.fromkeys(queues, 0)
+        self._credits = dict.fromkeys(queues, 0)
+        self._prefetched: dict[str, deque[bytes]] = {name: deque() for name in queues}
+
+    async def _run(self) -> None:
+        while self._running:
+            if self.max_tasks and self._tasks_processed >= self.max_tasks:
+                logger.info("Reached max tasks limit: %s", self.max_tasks)
+                break
+            if len(self._tasks) >= self.concurrency:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            fetched = await self._fetch_task()
+            if fetched is None:
+                if any(self._prefetched.values()):
+                    # Work is waiting on busy queues: resume as soon as a slot frees up.
+                    await asyncio.wait(
+                        self._tasks, timeout=0.1, return_when=asyncio.FIRST_COMPLETED
+                    )
+                else:
+                    await asyncio.sleep(0.1)
+                continue
+
+            task_data, queue_name = fetched
+            self._active[queue_name] += 1
+            task = asyncio.create_task(self._process_task(task_data, queue_name))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _, queue_name=queue_name: self._release(queue_name))
+
+    async def _fetch_task(self) -> tuple[bytes, str] | None:
+        candidates = [
+            name
+            for name, queue in self.queue_settings.items()
+            if self._active[name] < queue.concurrency
+        ]
+        while candidates:
+            name = self._pick(candidates)
+            prefetched = self._prefetched[name]
+            if not prefetched:
+                await self._prefetch(name)
+            if prefetched:
+                return prefetched.popleft(), name
+            # Empty: it sits out this round, and does not bank picks meanwhile.
+            candidates.remove(name)
+            self._credits[name] = 0
+        return None
+
+    def _pick(self, candidates: list[str]) -> str:
+        # Smooth weighted round-robin (as in nginx): picks interleave, no long runs.
+        total = 0
+        best = candidates[0]
+        for name in candidates:
+            priority = self.queue_settings[name].priority
+            self._credits[name] += priority
+            total += priority
+            if self._credits[name] > self._credits[best]:
+                best = name
+        self._credits[best] -= total
+        return best
+
+    async def _prefetch(self, name: str) -> None:
+        for _ in range(self.queue_settings[name].prefetch):
+            task_data = await self.queue_driver.dequeue(name)
+            if task_data is None:
+                return
+            self._prefetched[name].append(task_data)
+
+    def _release(self, name: str) -> None:
+        self._active[name] -= 1
+
+    async def _cleanup(self) -> None:
+        # Hand the tasks prefetched but never started back to the broker.
+        for name, prefetched in self._prefetched.items():
+            while prefetched:
+                await self.queue_driver.nack(name, prefetched.popleft())
+        await super()._cleanup()
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+import pytest
+from pydantic import BaseModel
+
+from core.cache import Cache, CacheHelper, LocalCache
+
+pytestmark = pytest.mark.anyio
+
+
+async def _until(condition: Callable[[], bool], timeout: float = 1.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def workers(make_cache: Callable[..., Cache]) -> tuple[Cache, Cache]:
+    """Two workers with their own L1, listening for each other's invalidations."""
+    first, second = make_cache(local=True), make_cache(local=True)
+    await first.start()
+    await second.start()
+    await _until(lambda: bool(first._drops and second._drops))  # both subscribed
+    return first, second
+
+
+def test_local_cache_evicts_least_recently_used() -> None:
+    local = LocalCache(max_entries=2, max_bytes=1024, ttl=60)
+    local.set("a", b"1")
+    local.set("b", b"2")
+    local.get("a")
+    local.set("c", b"3")
+    assert (local.get("a"), local.get("b"), local.get("c")) == (b"1", None, b"3")
+
+
+def test_local_cache_bounds_bytes() -> None:
+    local = LocalCache(max_entries=10, max_bytes=8, ttl=60, max_item_bytes=6)
+    local.set("big", b"x" * 7)
+    local.set("a", b"1234")
+    local.set("b", b"5678")
+    local.set("c", b"9")
+    assert local.get("big") is None and local.get("a") is None
+    assert local.size == 5 and len(local) == 2
+
+
+async def test_set_invalidates_other_workers_l1(workers: tuple[Cache, Cache]) -> None:
+    first, second = workers
+    await first.set("key", "v1")
+    assert await second.get("key") == b"v1"
+    assert second.local.get("key") == b"v1"
+
+    await first.set("key", "v2")
+    await _until(lambda: second.local.get("key") is None)
+    assert await second.get("key") == b"v2"
+
+
+async def test_delete_invalidates_other_workers_l1(workers: tuple[Cache, Cache]) -> None:
+    first, second = workers
+    await first.set("key", "value")
+    assert await second.get("key") == b"value"
+
+    await first.delete("key")
+    await _until(lambda: second.local.get("key") is None)
+    assert await second.get("key") is None
+
+
+async def test_invalidate_reaches_other_workers(workers: tuple[Cache, Cache]) -> None:
+    first, second = workers
+    writer, reader = CacheHelper(first, "items"), CacheHelper(second, "items")
+    key = await writer.build_cache_key("list", "/items", "")
+    await writer.set_cached_response(key, {"n": 1}, is_json=True)
+    assert await reader.build_cache_key("list", "/items", "") == key
+    assert await reader.get_cached_response(key, dict) == {"n": 1}
+
+    drops = second._drops
+    await writer.invalidate()
+    await _until(lambda: second._drops > drops)
+    new_key = await reader.build_cache_key("list", "/items", "")
+    assert new_key != key
+    assert await reader.get_cached_response(new_key, dict) is None
+
+
+class Item(BaseModel):
+    id: int
+
+
+async def test_invalid_cached_responses_read_as_misses(
+    make_cache: Callable[..., Cache], caplog: pytest.LogCaptureFixture
+) -> None:
+    helper = CacheHelper(make_cache(), "items")
+    key = await helper.build_cache_key("retrieve", "/items/1", "")
+    await helper.set_cached_response(key, {"id": 1}, is_json=True)
+    assert await helper.get_cached_response(key, Item) == Item(id=1)
+
+    await helper.set_cached_response(key, {"id": "one"}, is_json=True)
+    with caplog.at_level(logging.DEBUG, logger="core.cache"):
+        assert await helper.get_cached_response(key, Item) is None
+    assert [record.levelname for record in caplog.records] == ["DEBUG", "WARNING"]
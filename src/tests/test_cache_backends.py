@@ -0,0 +1,156 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import fakeredis
+import pytest
+
+from core.cache import Cache, LocalCache
+from core.cache_backends import MemoryBackend, RedisBackend, ShardedRedisBackend
+
+pytestmark = pytest.mark.anyio
+
+KEYS = [f":items:v1:list:/items/{i}:" for i in range(300)]
+
+
+def _sharded(nodes: int) -> ShardedRedisBackend:
+    return ShardedRedisBackend(
+        [
+            RedisBackend(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+            for _ in range(nodes)
+        ]
+    )
+
+
+def test_ring_spreads_keys_over_every_node() -> None:
+    backend = _sharded(3)
+    owners = [backend._node_index(key) for key in KEYS]
+    assert set(owners) == {0, 1, 2}
+    assert min(owners.count(node) for node in range(3)) > len(KEYS) // 6
+    assert owners == [_sharded(3)._node_index(key) for key in KEYS]  # stable across processes
+
+
+def test_adding_a_node_only_moves_keys_to_it() -> None:
+    before, after = _sharded(3), _sharded(4)
+    moved = [key for key in KEYS if before._node_index(key) != after._node_index(key)]
+    assert moved
+    assert all(after._node_index(key) == 3 for key in moved)
+    assert len(moved) < len(KEYS) // 2
+
+
+async def test_sharded_commands_reach_the_owning_node() -> None:
+    backend = _sharded(3)
+    keys = KEYS[:30]
+    await asyncio.gather(*(backend.set(key, key, ttl=60) for key in keys))
+
+    for key in keys:
+        owner = backend.node_for(key)
+        assert await owner.get(key) == key.encode()
+        others = [node for node in backend.nodes if node is not owner]
+        assert await asyncio.gather(*(node.get(key) for node in others)) == [None, None]
+    assert await backend.mget([*keys, "missing"]) == [*(key.encode() for key in keys), None]
+    assert await backend.execute([("delete", tuple(keys[:10])), ("get", (keys[10],))]) == [
+        10,
+        keys[10].encode(),
+    ]
+    assert await backend.delete(*keys) == 20
+
+
+async def test_transactions_cannot_span_shards() -> None:
+    backend = _sharded(3)
+    a, b = next(
+        (a, b) for a in KEYS for b in KEYS if backend._node_index(a) != backend._node_index(b)
+    )
+    with pytest.raises(ValueError):
+        await backend.execute([("set", (a, "1", 60)), ("set", (b, "2", 60))], transaction=True)
+
+
+async def test_pipelines_are_transactional_only_when_asked() -> None:
+    client = fakeredis.FakeAsyncRedis()
+    backend = RedisBackend(client)
+    pipeline, requested = client.pipeline, []
+
+    def recording_pipeline(transaction: bool = True, **kwargs):
+        requested.append(transaction)
+        return pipeline(transaction=transaction, **kwargs)
+
+    client.pipeline = recording_pipeline
+    assert await backend.execute([("set", ("k", "v", None)), ("get", ("k",))]) == [True, b"v"]
+    assert await backend.execute([("get", ("k",))], transaction=True) == [b"v"]
+    assert requested == [False, True]
+
+
+@pytest.fixture
+async def sharded_workers() -> AsyncIterator[tuple[Cache, Cache]]:
+    """Two workers with their own L1, sharing one sharded backend."""
+    backend = _sharded(3)
+    workers = [
+        Cache(backend=backend, local_cache=LocalCache(max_entries=100, max_bytes=1 << 20, ttl=60))
+        for _ in range(2)
+    ]
+    for worker in workers:
+        await worker.start()
+    async with asyncio.timeout(1):
+        while not all(worker._drops for worker in workers):  # both subscribed
+            await asyncio.sleep(0.01)
+    yield workers[0], workers[1]
+    for worker in workers:
+        await worker.close()
+
+
+async def test_sharded_transactions_still_invalidate_other_workers(
+    sharded_workers: tuple[Cache, Cache],
+) -> None:
+    first, second = sharded_workers
+    # Invalidations are published through node 0; the key lives on another shard.
+    key = next(key for key in KEYS if first.backend._node_index(key) != 0)
+    await first.set(key, "v1")
+    assert await second.get(key) == b"v1"
+
+    async with first.pipeline(transaction=True) as pipe:
+        pipe.set(key, "v2").get(key)
+
+    assert pipe.results == [True, b"v2"]
+    async with asyncio.timeout(1):
+        while second.local.get(key) is not None:
+            await asyncio.sleep(0.01)
+    assert await second.get(key) == b"v2"
+
+
+async def test_memory_backend_follows_redis_semantics() -> None:
+    backend = MemoryBackend()
+    assert await backend.set("lock", "a", ttl=60, nx=True)
+    assert not await backend.set("lock", "b", ttl=60, nx=True)
+    await backend.set("short", "x", ttl=0.01)
+    await asyncio.sleep(0.02)
+
+    assert await backend.mget(["lock", "short", "missing"]) == [b"a", None, None]
+    assert await backend.execute(
+        [("set", ("k", 1, None)), ("get", ("k",)), ("delete", ("k", "lock"))]
+    ) == [
+        True,
+        b"1",
+        2,
+    ]
+    assert await backend.execute(
+        [
+            ("sadd", ("tag", ["a", "b"], 60)),
+            ("srem", ("tag", "a", "missing")),
+            ("exists", ("tag",)),
+            ("srem", ("tag", "b")),
+            ("exists", ("tag",)),
+        ]
+    ) == [2, 1, 1, 1, 0]
+
+
+async def test_memory_backend_delivers_published_messages() -> None:
+    backend = MemoryBackend()
+    received: list[bytes] = []
+    subscribed = asyncio.Event()
+    listener = asyncio.create_task(backend.listen("channel", subscribed.set, received.append))
+    await subscribed.wait()
+
+    await backend.publish("channel", "hello")
+    await backend.publish("other", "ignored")
+    await asyncio.sleep(0)
+    listener.cancel()
+    assert received == [b"hello"]
@@ -0,0 +1,38 @@
+from collections.abc import Callable
+
+import pytest
+
+from core.cache import Cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pipeline_results_follow_queuing_order(make_cache: Callable[..., Cache]) -> None:
+    cache = make_cache(local=True)
+    await cache.set("existing", "old")
+    async with cache.pipeline() as pipe:
+        pipe.get("existing").set("new", "value").get("new").delete("existing", "missing")
+
+    assert pipe.results == [b"old", True, b"value", 1]
+    assert await cache.get("existing") is None
+    assert cache.local.get("existing") is None
+
+
+async def test_mget_mixes_local_hits_and_fetched_keys(make_cache: Callable[..., Cache]) -> None:
+    writer, reader = make_cache(), make_cache(local=True)
+    await writer.mset({"a": "1", "b": "2"}, ttl={"a": 60, "b": 60})
+    reader.local.set("a", b"local")
+
+    assert await reader.mget(["a", "b", "missing"]) == [b"local", b"2", None]
+    assert reader.local.get("b") == b"2"
+    assert await reader.mget(["a", "b"], local=False) == [b"1", b"2"]
+    assert await reader.mget([]) == []
+
+
+async def test_delete_many_counts_removed_keys(make_cache: Callable[..., Cache]) -> None:
+    cache = make_cache(local=True)
+    await cache.mset({"a": "1", "b": "2", "c": "3"})
+
+    assert await cache.delete_many(["a", "b", "missing"]) == 2
+    assert await cache.delete_many([]) == 0
+    assert await cache.mget(["a", "b", "c"]) == [None, None, b"3"]
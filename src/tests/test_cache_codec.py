@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from core.cache_codec import CacheCodec
+
+DATA = {"items": [{"id": i, "title": f"question {i}", "tags": ["a", "b"]} for i in range(200)]}
+MODULES = {"msgpack": "msgpack", "zstd": "zstandard", "lz4": "lz4.frame"}
+
+
+@pytest.mark.parametrize("compression", ["none", "zstd", "lz4"])
+@pytest.mark.parametrize("serializer", ["json", "msgpack"])
+def test_round_trip(serializer: str, compression: str) -> None:
+    for option in (serializer, compression):
+        if option in MODULES:
+            pytest.importorskip(MODULES[option])
+    codec = CacheCodec(serializer, compression, threshold=64)  # type: ignore[arg-type]
+
+    payload = codec.dumps(DATA)
+    assert codec.loads(payload) == DATA
+    assert json.loads(codec.loads_json(payload)) == DATA
+    if compression != "none":
+        assert len(payload) < len(json.dumps(DATA))
+
+
+@pytest.mark.parametrize("compression", ["zstd", "lz4"])
+def test_small_payloads_are_not_compressed(compression: str) -> None:
+    pytest.importorskip(MODULES[compression])
+    codec = CacheCodec("json", compression, threshold=1024)  # type: ignore[arg-type]
+    assert codec.dumps({"id": 1}) == b'{"id":1}'
+
+
+def test_json_body_is_framed_as_is() -> None:
+    codec = CacheCodec()
+    assert codec.dumps_json('{"id": 1}') == b'{"id": 1}'
+    assert codec.loads(codec.dumps_json(b'{"id": 1}')) == {"id": 1}
+
+
+@pytest.mark.parametrize("compression", ["none", "zstd", "lz4"])
+def test_reads_legacy_unframed_values(compression: str) -> None:
+    if compression in MODULES:
+        pytest.importorskip(MODULES[compression])
+    codec = CacheCodec("json", compression)  # type: ignore[arg-type]
+    legacy = json.dumps(DATA)
+
+    assert codec.loads(legacy.encode("utf-8")) == DATA
+    assert codec.loads(legacy) == DATA
+    assert codec.unframe(legacy.encode("utf-8")) == ("json", legacy.encode("utf-8"))
+
+
+def test_unknown_options_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        CacheCodec("pickle")  # type: ignore[arg-type]
+    with pytest.raises(ValueError):
+        CacheCodec("json", "gzip")  # type: ignore[arg-type]
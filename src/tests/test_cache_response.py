@@ -0,0 +1,66 @@
+from collections.abc import AsyncIterator, Callable
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from core.cache import Cache, CacheHelper
+from core.cache_response import cache_response
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def app(make_cache: Callable[..., Cache]) -> FastAPI:
+    app = FastAPI()
+    app.state.cache = make_cache()
+    app.state.calls = 0
+
+    @app.get("/items")
+    @cache_response(namespace="items", lock_timeout=None)
+    async def list_items(request: Request) -> dict[str, list[int]]:
+        request.app.state.calls += 1
+        return {"items": [1, 2, 3]}
+
+    return app
+
+
+@pytest.fixture
+async def client(app: FastAPI) -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_responses_carry_an_etag(app: FastAPI, client: httpx.AsyncClient) -> None:
+    first = await client.get("/items")
+    second = await client.get("/items")
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content == b'{"items":[1,2,3]}'
+    assert first.headers["etag"] == second.headers["etag"]
+    assert app.state.calls == 1
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"], ids=str)
+async def test_matching_if_none_match_gets_304(
+    client: httpx.AsyncClient, if_none_match: str
+) -> None:
+    etag = (await client.get("/items")).headers["etag"]
+
+    response = await client.get(
+        "/items", headers={"If-None-Match": if_none_match.format(etag=etag)}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+async def test_stale_etag_gets_the_new_body(app: FastAPI, client: httpx.AsyncClient) -> None:
+    etag = (await client.get("/items")).headers["etag"]
+    assert (await client.get("/items", headers={"If-None-Match": '"other"'})).status_code == 200
+
+    await CacheHelper(app.state.cache, "items").invalidate()
+    response = await client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert app.state.calls == 2
@@ -0,0 +1,82 @@
+import asyncio
+from collections.abc import Callable
+
+import pytest
+
+from core.cache import Cache, CacheHelper
+
+pytestmark = pytest.mark.anyio
+
+
+def _counting_loader(delay: float) -> tuple[Callable[[], int], Callable]:
+    calls = 0
+
+    async def loader() -> dict[str, int]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(delay)
+        return {"n": calls}
+
+    return lambda: calls, loader
+
+
+async def test_concurrent_misses_share_one_loader_call(make_cache: Callable[..., Cache]) -> None:
+    helper = CacheHelper(make_cache(), "items")
+    calls, loader = _counting_loader(0.05)
+
+    responses = await asyncio.gather(
+        *(helper.get_or_set("list", "/items", "", dict, loader, is_json=True) for _ in range(10))
+    )
+    assert calls() == 1
+    assert responses == [{"n": 1}] * 10
+    assert await helper.get_or_set("list", "/items", "", dict, loader, is_json=True) == {"n": 1}
+
+
+async def test_lock_lets_one_worker_compute_for_all(make_cache: Callable[..., Cache]) -> None:
+    helpers = [CacheHelper(make_cache(), "items") for _ in range(3)]
+    calls, loader = _counting_loader(0.1)
+
+    responses = await asyncio.gather(
+        *(helper.get_or_set("list", "/items", "", dict, loader, is_json=True) for helper in helpers)
+    )
+    assert calls() == 1
+    assert responses == [{"n": 1}] * 3
+
+
+async def test_failed_loader_is_not_cached(make_cache: Callable[..., Cache]) -> None:
+    helper = CacheHelper(make_cache(), "items")
+
+    async def failing() -> dict[str, int]:
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        await helper.get_or_set("list", "/items", "", dict, failing, is_json=True)
+    _, loader = _counting_loader(0)
+    assert await helper.get_or_set("list", "/items", "", dict, loader, is_json=True) == {"n": 1}
+
+
+async def test_stale_responses_are_counted_once(make_cache: Callable[..., Cache]) -> None:
+    cache = make_cache(local=True)
+    helper = CacheHelper(cache, "items")
+    _, loader = _counting_loader(0)
+
+    async def read() -> dict[str, int]:
+        return await helper.get_or_set(
+            "list", "/items", "", dict, loader, is_json=True, stale_while_revalidate=True
+        )
+
+    assert await read() == {"n": 1}
+    assert await read() == {"n": 1}
+    await helper.invalidate()
+    assert await read() == {"n": 1}
+    await asyncio.sleep(0.05)  # the background refresh
+
+    assert cache.metrics.lookups == {
+        ("items", "list", "miss"): 1,
+        ("items", "list", "hit"): 1,
+        ("items", "list", "stale"): 1,
+    }
+    hits, misses = cache.metrics.local_hits, cache.metrics.local_misses
+    await cache.set("a", "1")
+    await cache.mget(["a", "b"])
+    assert (cache.metrics.local_hits - hits, cache.metrics.local_misses - misses) == (1, 1)
@@ -0,0 +1,85 @@
+import asyncio
+from collections.abc import Callable
+
+import pytest
+
+from core.cache import Cache, CacheHelper
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_invalidate_tags_only_drops_tagged_responses(
+    make_cache: Callable[..., Cache],
+) -> None:
+    writer, reader = make_cache(local=True), make_cache(local=True)
+    await reader.start()
+    helper, reading = CacheHelper(writer, "items"), CacheHelper(reader, "items")
+    tagged = await helper.build_cache_key("retrieve", "/items/1", "")
+    untagged = await helper.build_cache_key("retrieve", "/items/2", "")
+    await helper.set_cached_response(tagged, {"id": 1}, is_json=True, tags=["item:1"])
+    await helper.set_cached_response(untagged, {"id": 2}, is_json=True)
+    assert await reading.get_cached_response(tagged, dict) == {"id": 1}
+
+    assert await helper.invalidate_tags("item:1") == 1
+    assert await helper.get_cached_response(tagged, dict) is None
+    assert await helper.get_cached_response(untagged, dict) == {"id": 2}
+    for _ in range(100):
+        if reader.local.get(tagged) is None:
+            break
+        await asyncio.sleep(0.01)
+    assert await reading.get_cached_response(tagged, dict) is None
+    assert await helper.invalidate_tags("item:1") == 0
+
+
+async def test_sweep_keeps_current_and_previous_versions(
+    make_cache: Callable[..., Cache],
+) -> None:
+    cache = make_cache()
+    helper = CacheHelper(cache, "items")
+    keys = {}
+    for name in ("dead", "previous", "current"):
+        if keys:
+            await helper.invalidate()
+        keys[name] = await helper.build_cache_key("list", "/items", "")
+        await helper.set_cached_response(keys[name], {"v": name}, is_json=True, tags=["item:1"])
+
+    assert await helper.sweep(batch_size=2) == 1
+    assert await cache.backend.mget(list(keys.values())) == [
+        None,
+        b'{"v":"previous"}',
+        b'{"v":"current"}',
+    ]
+    assert await cache.backend.get(":items:cache:version") is not None
+    # Members pointing at swept keys are dropped from the tag set, live ones are kept.
+    (members,) = await cache.backend.execute([("smembers", (helper._tag_key("item:1"),))])
+    assert sorted(members) == sorted([keys["previous"].encode(), keys["current"].encode()])
+
+
+async def test_sweep_drops_tag_sets_of_expired_keys(make_cache: Callable[..., Cache]) -> None:
+    cache = make_cache()
+    helper = CacheHelper(cache, "items")
+    key = await helper.build_cache_key("retrieve", "/items/1", "")
+    await helper.set_cached_response(key, {"id": 1}, is_json=True, tags=["item:1"])
+    await cache.backend.delete(key)  # as if it had expired
+
+    assert await helper.sweep() == 0
+    assert await cache.backend.execute([("exists", (helper._tag_key("item:1"),))]) == [0]
+
+
+async def test_sweep_leaves_other_namespaces_alone(make_cache: Callable[..., Cache]) -> None:
+    cache = make_cache()
+    items, item_tags = CacheHelper(cache, "items"), CacheHelper(cache, "items_tags")
+    other = await item_tags.build_cache_key("list", "/tags", "")
+    await item_tags.set_cached_response(other, {"tags": []}, is_json=True)
+    await items.get_version()
+
+    assert await items.sweep() == 0
+    assert await cache.backend.get(other) is not None
+
+
+@pytest.mark.parametrize("namespace", ["", "items:tags"])
+async def test_nested_or_empty_namespaces_are_rejected(
+    make_cache: Callable[..., Cache], namespace: str
+) -> None:
+    with pytest.raises(ValueError):
+        CacheHelper(make_cache(), namespace)
@@ -0,0 +1,125 @@
+import time
+from collections.abc import AsyncIterator
+
+import fakeredis
+import pytest
+from asynctasq.core.dispatcher import get_dispatcher
+from asynctasq.drivers.redis_driver import RedisDriver
+
+from config.settings import get_setting
+from services.dispatch import BatchTooLarge, dispatch_many, dispatch_unique
+from services.results import ResultBackend
+from services.tasks import echo_message_task
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def driver() -> AsyncIterator[RedisDriver]:
+    driver = RedisDriver()
+    driver.client = fakeredis.FakeAsyncRedis()
+    yield driver
+    await driver.client.aclose()
+
+
+@pytest.fixture
+async def results(monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[ResultBackend]:
+    results = ResultBackend(fakeredis.FakeAsyncRedis())
+    monkeypatch.setattr("services.dispatch.get_result_backend", lambda: results)
+    yield results
+    await results.close()
+
+
+def _echo(driver: RedisDriver, message: str):
+    task = echo_message_task(message=message)
+    task.config["driver"] = driver
+    return task
+
+
+async def _drain(driver: RedisDriver, queue: str) -> list[str]:
+    """The messages of the queued tasks, in the order a worker would run them."""
+    serializer = get_dispatcher(driver)._task_serializer
+    messages = []
+    while (payload := await driver.dequeue(queue)) is not None:
+        task = await serializer.deserialize(payload)
+        messages.append(task.kwargs["message"])
+    return messages
+
+
+async def test_batch_is_queued_in_order(driver: RedisDriver) -> None:
+    tasks = [_echo(driver, f"message {n}") for n in range(5)]
+
+    ids = await dispatch_many(tasks)
+
+    assert ids == [task._task_id for task in tasks]
+    assert len(set(ids)) == 5
+    assert await _drain(driver, "default") == [f"message {n}" for n in range(5)]
+
+
+async def test_batch_matches_single_dispatch(driver: RedisDriver) -> None:
+    await _echo(driver, "single").dispatch()
+    await dispatch_many([_echo(driver, "batched")])
+    assert await _drain(driver, "default") == ["single", "batched"]
+
+
+async def test_queue_and_delay_overrides(driver: RedisDriver) -> None:
+    await dispatch_many([_echo(driver, "later")], queue="low", delay=60)
+
+    assert await driver.client.llen("queue:low") == 0
+    (scheduled,) = await driver.client.zrange("queue:low:delayed", 0, -1, withscores=True)
+    assert scheduled[1] == pytest.approx(time.time() + 60, abs=5)
+
+
+async def test_oversized_batches_are_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_setting("asynctasq"), "ASYNCTASQ_MAX_BATCH_SIZE", 2)
+    with pytest.raises(BatchTooLarge) as raised:
+        await dispatch_many([echo_message_task(message=str(n)) for n in range(3)])
+    assert (raised.value.size, raised.value.limit) == (3, 2)
+
+
+async def test_identical_tasks_are_deduplicated(
+    driver: RedisDriver, results: ResultBackend
+) -> None:
+    first = await dispatch_unique(_echo(driver, "hello"))
+    assert await dispatch_unique(_echo(driver, "hello")) == first
+    other = await dispatch_unique(_echo(driver, "other"))
+
+    assert other != first
+    assert await _drain(driver, "default") == ["hello", "other"]
+
+
+async def test_idempotency_keys_override_the_arguments(
+    driver: RedisDriver, results: ResultBackend
+) -> None:
+    first = await dispatch_unique(_echo(driver, "a"), key="request-1")
+    assert await dispatch_unique(_echo(driver, "b"), key="request-1") == first
+    assert await dispatch_unique(_echo(driver, "a"), key="request-2") != first
+    assert await _drain(driver, "default") == ["a", "a"]
+
+
+async def test_coalesced_keys_are_freed_once_the_task_runs(
+    driver: RedisDriver, results: ResultBackend
+) -> None:
+    first = await dispatch_unique(_echo(driver, "rebuild"), coalesce=True)
+    assert await dispatch_unique(_echo(driver, "rebuild"), coalesce=True) == first
+
+    await results.record(first, "running")
+    second = await dispatch_unique(_echo(driver, "rebuild"), coalesce=True)
+
+    assert second != first
+    assert await _drain(driver, "default") == ["rebuild", "rebuild"]
+
+
+async def test_failed_enqueue_releases_the_key(
+    driver: RedisDriver, results: ResultBackend, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def unreachable(*args) -> None:
+        raise ConnectionError("broker down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("services.dispatch._dispatch", unreachable)
+        with pytest.raises(ConnectionError):
+            await dispatch_unique(_echo(driver, "retried"))
+
+    await dispatch_unique(_echo(driver, "retried"))
+    assert await _drain(driver, "default") == ["retried"]
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from services.executors import ProcessPool, in_process
+
+pytestmark = pytest.mark.anyio
+
+
+def pid() -> int:
+    return os.getpid()
+
+
+async def async_square(n: int) -> int:
+    await asyncio.sleep(0)
+    return n * n
+
+
+def sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch) -> Iterator[ProcessPool]:
+    pool = ProcessPool(size=1, max_tasks_per_child=2)
+    monkeypatch.setattr("services.executors.get_process_pool", lambda: pool)
+    yield pool
+    pool.shutdown()
+
+
+async def test_functions_run_in_a_child_process(pool: ProcessPool) -> None:
+    assert await in_process(pid)() != os.getpid()
+    assert await in_process(async_square)(7) == 49
+
+
+async def test_timeout_stops_the_call_in_the_child(pool: ProcessPool) -> None:
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        await in_process(sleep, timeout=0.2)(30)
+    assert time.monotonic() - started < 10
+
+    # The child is free again.
+    assert await in_process(async_square)(3) == 9
+
+
+async def test_pool_is_recycled_after_its_task_allowance(pool: ProcessPool) -> None:
+    pids = [await in_process(pid)() for _ in range(5)]
+    assert pids[0] == pids[1]
+    assert pids[2] == pids[3] != pids[1]
+    assert pids[4] != pids[3]
+
+
+def test_local_functions_are_rejected() -> None:
+    def local() -> None: ...
+
+    with pytest.raises(ValueError, match="must be importable"):
+        in_process(local)
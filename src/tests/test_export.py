@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+
+import pytest
+from pydantic import BaseModel as Schema
+from sqlalchemy import JSON, Column, String, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.export import export_response, stream_export
+from database.base import BaseModel
+
+pytestmark = pytest.mark.anyio
+
+
+class Product(BaseModel):
+    module_name = "test"
+
+    name = Column(String(50), nullable=False)
+    attributes = Column(JSON, nullable=False)
+
+
+class ProductSchema(Schema):
+    id: int
+    name: str
+    attributes: dict[str, str]
+
+
+@pytest.fixture
+async def db(make_db) -> AsyncSession:
+    session = await make_db(Product)
+    session.add_all(
+        [Product(id=n, name=f"product, {n}", attributes={"size": str(n)}) for n in range(1, 6)]
+    )
+    await session.commit()
+    return session
+
+
+async def _export(db: AsyncSession, format: str, **kwargs) -> list[bytes]:
+    chunks = stream_export(
+        select(Product).order_by(Product.id),
+        ProductSchema,
+        format,
+        batch_size=2,
+        session_factory=async_sessionmaker(db.bind),
+        **kwargs,
+    )
+    return [chunk async for chunk in chunks]
+
+
+async def test_ndjson_streams_one_chunk_per_batch(db: AsyncSession) -> None:
+    chunks = await _export(db, "ndjson")
+
+    assert len(chunks) == 3
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": n, "name": f"product, {n}", "attributes": {"size": str(n)}} for n in range(1, 6)
+    ]
+
+
+async def test_csv_has_a_header_and_json_encoded_cells(db: AsyncSession) -> None:
+    chunks = await _export(db, "csv")
+
+    assert len(chunks) == 4  # the header, then a chunk per batch
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "name", "attributes"]
+    assert rows[1:] == [
+        [str(n), f"product, {n}", json.dumps({"size": str(n)})] for n in range(1, 6)
+    ]
+
+
+@pytest.mark.parametrize(("format", "body"), [("ndjson", b""), ("csv", b"id,name,attributes\r\n")])
+async def test_empty_results(db: AsyncSession, format: str, body: bytes) -> None:
+    chunks = stream_export(
+        select(Product).where(Product.id < 0),
+        ProductSchema,
+        format,
+        session_factory=async_sessionmaker(db.bind),
+    )
+    assert b"".join([chunk async for chunk in chunks]) == body
+
+
+def test_export_response_names_the_download() -> None:
+    response = export_response(select(Product), ProductSchema, "csv", filename="products")
+    assert response.media_type == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == 'attachment; filename="products.csv"'
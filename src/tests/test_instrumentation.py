@@ -0,0 +1,137 @@
+import logging
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from config.settings import get_setting
+from core.middlewares import QueryStatsMiddleware
+from database.instrumentation import (
+    QueryBudgetExceeded,
+    QueryStats,
+    check_query_stats,
+    instrument_engine,
+    query_budget,
+    redact,
+    route_budget,
+    track_queries,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engine() -> AsyncIterator[AsyncEngine]:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine, slow_query_threshold=0)
+    yield engine
+    await engine.dispose()
+
+
+def _stats(*statements: str) -> QueryStats:
+    stats = QueryStats("GET /items")
+    for statement in statements:
+        stats.record(statement, 0.001)
+    return stats
+
+
+async def test_queries_are_counted_per_request(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 0"))
+        with track_queries("GET /items") as stats:
+            for n in range(3):
+                await connection.execute(text("SELECT :n"), {"n": n})
+            await connection.execute(text("SELECT 'other'"))
+        await connection.execute(text("SELECT 0"))
+
+    assert stats.count == 4
+    assert stats.duration > 0
+    assert stats.repeated(3) == [("SELECT ?", 3)]
+
+
+def test_repeated_statements_are_reported(caplog: pytest.LogCaptureFixture) -> None:
+    stats = _stats(*["SELECT * FROM card WHERE board_id = ?"] * 5, "SELECT * FROM board")
+    with caplog.at_level(logging.WARNING, "database.instrumentation"):
+        check_query_stats(stats, budget=0, repeat_threshold=5, strict=True)
+    assert [record.getMessage() for record in caplog.records] == [
+        "Possible N+1 on GET /items: 5 executions of SELECT * FROM card WHERE board_id = ?"
+    ]
+
+
+def test_budget_is_enforced_in_strict_mode(caplog: pytest.LogCaptureFixture) -> None:
+    stats = _stats("SELECT 1", "SELECT 2", "SELECT 3")
+    check_query_stats(stats, budget=3, repeat_threshold=0, strict=True)
+
+    with pytest.raises(QueryBudgetExceeded, match="ran 3 queries, over its budget of 2"):
+        check_query_stats(stats, budget=2, repeat_threshold=0, strict=True)
+
+    with caplog.at_level(logging.WARNING, "database.instrumentation"):
+        check_query_stats(stats, budget=2, repeat_threshold=0, strict=False)
+    assert "over its budget of 2" in caplog.text
+
+
+def test_query_budget_overrides_the_default() -> None:
+    @query_budget(3)
+    async def endpoint() -> None: ...
+
+    assert route_budget(endpoint, 20) == 3
+    assert route_budget(lambda: None, 20) == 20
+    assert route_budget(None, 20) == 20
+
+
+def test_redact_keeps_only_types() -> None:
+    assert redact({"email": "a@b.c", "id": 1}) == {"email": "str", "id": "int"}
+    assert redact(("a@b.c", 1)) == ["str", "int"]
+    assert redact([{"id": 1}, {"id": 2}]) == "<2 parameter sets>"
+
+
+@pytest.fixture
+def client(engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch) -> httpx.AsyncClient:
+    """An app behind the query stats middleware, with a budget of 2 queries per request."""
+    monkeypatch.setattr(get_setting("db"), "DATABASE_QUERY_BUDGET", 2)
+    monkeypatch.setattr(get_setting("db"), "DATABASE_QUERY_BUDGET_STRICT", False)
+    monkeypatch.setattr(get_setting("app"), "DEBUG", True)
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    async def run_queries(count: int) -> None:
+        async with engine.connect() as connection:
+            for n in range(count):
+                await connection.execute(text("SELECT :n"), {"n": n})
+
+    @app.get("/plain")
+    async def plain(count: int) -> dict[str, int]:
+        await run_queries(count)
+        return {"count": count}
+
+    @app.get("/streamed")
+    async def streamed(count: int) -> StreamingResponse:
+        async def body() -> AsyncIterator[bytes]:
+            yield b"first\n"
+            await run_queries(count)
+            yield b"last\n"
+
+        return StreamingResponse(body())
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.parametrize("path", ["/plain", "/streamed"])
+async def test_middleware_checks_every_query_of_the_response(
+    client: httpx.AsyncClient, path: str, caplog: pytest.LogCaptureFixture
+) -> None:
+    with caplog.at_level(logging.WARNING, "database.instrumentation"):
+        assert (await client.get(path, params={"count": 2})).status_code == 200
+        assert "over its budget" not in caplog.text
+
+        assert (await client.get(path, params={"count": 3})).status_code == 200
+    assert f"GET {path} ran 3 queries, over its budget of 2" in caplog.text
+
+
+async def test_middleware_reports_server_timing(client: httpx.AsyncClient) -> None:
+    response = await client.get("/plain", params={"count": 3})
+    assert response.headers["Server-Timing"].endswith('desc="3 queries"')
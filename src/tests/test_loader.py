@@ -0,0 +1,106 @@
+import asyncio
+from typing import Any
+
+import pytest
+from sqlalchemy import Column, String, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import Base, BaseModel
+from repositories.loader import BatchLoader
+
+pytestmark = pytest.mark.anyio
+
+
+class Author(BaseModel):
+    module_name = "test"
+
+    name = Column(String(50), nullable=False)
+
+
+class Tag(BaseModel):
+    module_name = "test"
+
+    label = Column(String(50), nullable=False)
+
+
+class RecordingLoader(BatchLoader):
+    """Fetches with `IN`, which SQLite supports, and records every batch it fetched."""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(session)
+        self.batches: list[tuple[type[Base], list[int]]] = []
+
+    async def _fetch(self, model: type[Base], ids: list[int]) -> dict[int, Any]:
+        self.batches.append((model, sorted(ids)))
+        result = await self.session.scalars(select(model).where(model.id.in_(ids)))
+        return {row.id: row for row in result}
+
+
+@pytest.fixture
+async def db(make_db) -> AsyncSession:
+    session = await make_db(Author, Tag)
+    session.add_all([Author(id=n, name=f"author {n}") for n in range(1, 5)])
+    session.add_all([Tag(id=n, label=f"tag {n}") for n in range(1, 3)])
+    await session.commit()
+    return session
+
+
+async def test_lookups_of_one_tick_share_one_query_per_model(db: AsyncSession) -> None:
+    loader = RecordingLoader(db)
+
+    authors, tags, single = await asyncio.gather(
+        loader.load_many(Author, [3, 1, 3, 9]),
+        loader.load_many(Tag, [2]),
+        loader.load(Author, 2),
+    )
+
+    assert [author and author.name for author in authors] == [
+        "author 3",
+        "author 1",
+        "author 3",
+        None,
+    ]
+    assert [tag.label for tag in tags] == ["tag 2"]
+    assert single.name == "author 2"
+    assert sorted(loader.batches, key=lambda batch: batch[0].__name__) == [
+        (Author, [1, 2, 3, 9]),
+        (Tag, [2]),
+    ]
+
+
+async def test_results_and_misses_are_memoized(db: AsyncSession) -> None:
+    loader = RecordingLoader(db)
+    await loader.load_many(Author, [1, 9])
+    loader.prime(await db.get(Author, 2))
+
+    assert (await loader.load(Author, 1)).name == "author 1"
+    assert await loader.load(Author, 9) is None
+    assert (await loader.load(Author, 2)).name == "author 2"
+    assert loader.batches == [(Author, [1, 9])]
+
+    loader.clear()
+    await loader.load(Author, 9)
+    assert loader.batches == [(Author, [1, 9]), (Author, [9])]
+
+
+async def test_for_session_attaches_one_loader(db: AsyncSession) -> None:
+    assert BatchLoader.for_session(db) is BatchLoader.for_session(db)
+
+
+async def test_ids_are_bound_as_one_array_parameter() -> None:
+    statements = []
+
+    class Session:
+        """Records the statements instead of running them."""
+
+        async def scalars(self, statement):
+            statements.append(statement)
+            return []
+
+    await BatchLoader(Session()).load_many(Author, range(1, 500))
+
+    (statement,) = statements
+    compiled = statement.compile(dialect=postgresql.dialect())
+    assert "WHERE tests_author.id = ANY (%(ids)s::BIGINT[])" in str(compiled)
+    assert compiled.params == {"ids": list(range(1, 500))}
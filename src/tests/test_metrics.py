@@ -0,0 +1,60 @@
+from collections.abc import AsyncIterator, Callable
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from pydantic import SecretStr
+
+from api.v1 import api_router
+from config.settings import get_setting
+from core.cache import Cache
+
+pytestmark = pytest.mark.anyio
+
+METRICS = ["/v1/metrics/cache", "/v1/metrics/db"]
+
+
+@pytest.fixture
+async def client(
+    make_cache: Callable[..., Cache], monkeypatch: pytest.MonkeyPatch
+) -> AsyncIterator[httpx.AsyncClient]:
+    monkeypatch.setattr(get_setting("app"), "DEBUG", False)
+    monkeypatch.setattr(get_setting("security"), "METRICS_TOKEN", SecretStr("s3cret"))
+    app = FastAPI()
+    app.include_router(api_router)
+    app.state.cache = make_cache()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", METRICS)
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "Basic s3cret", "s3cret"])
+async def test_metrics_are_hidden_without_the_token(
+    client: httpx.AsyncClient, path: str, authorization: str | None
+) -> None:
+    headers = {"Authorization": authorization} if authorization else {}
+    assert (await client.get(path, headers=headers)).status_code == 404
+
+
+@pytest.mark.parametrize("path", METRICS)
+async def test_metrics_are_served_with_the_token(client: httpx.AsyncClient, path: str) -> None:
+    response = await client.get(path, headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.text.startswith("# TYPE")
+
+
+@pytest.mark.parametrize("path", METRICS)
+async def test_metrics_are_open_in_debug(
+    client: httpx.AsyncClient, path: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_setting("app"), "DEBUG", True)
+    assert (await client.get(path)).status_code == 200
+
+
+async def test_metrics_are_never_served_without_a_configured_token(
+    client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_setting("security"), "METRICS_TOKEN", None)
+    response = await client.get(METRICS[0], headers={"Authorization": "Bearer "})
+    assert response.status_code == 404
@@ -0,0 +1,85 @@
+from datetime import UTC, datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import get_setting
+from core.pagination import CursorParams, decode_cursor, encode_cursor, paginate_cursor
+from database.base import BaseModel
+
+pytestmark = pytest.mark.anyio
+
+
+class Entry(BaseModel):
+    module_name = "test"
+
+    rank = Column(Integer, nullable=False)
+
+
+ORDER = [(Entry.rank, True), (Entry.id, True)]
+
+
+def test_cursor_round_trip() -> None:
+    values = [datetime(2024, 5, 1, 12, 30, tzinfo=UTC), 42]
+    assert decode_cursor(encode_cursor(values, "previous", ORDER), ORDER) == (values, "previous")
+
+
+def test_tampered_cursor_is_rejected() -> None:
+    _, signature = encode_cursor([3, 7], "next", ORDER).split(".")
+    forged = encode_cursor([3, 8], "next", ORDER).split(".")[0]
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(f"{forged}.{signature}", ORDER)
+    assert raised.value.status_code == 400
+
+
+def test_cursor_of_another_listing_is_rejected() -> None:
+    cursor = encode_cursor([3, 7], "next", ORDER)
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, [(Entry.rank, False), (Entry.id, False)])
+
+
+def test_cursors_need_a_secret_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_setting("security"), "CURSOR_SECRET_KEY", None)
+    with pytest.raises(RuntimeError, match="CURSOR_SECRET_KEY"):
+        encode_cursor([3, 7], "next", ORDER)
+
+
+@pytest.fixture
+async def db(make_db) -> AsyncSession:
+    session = await make_db(Entry)
+    # Ranks repeat, so pages have to break ties on the id.
+    session.add_all([Entry(rank=n // 3) for n in range(1, 12)])
+    await session.commit()
+    return session
+
+
+async def test_pages_walk_forward_and_back(db: AsyncSession) -> None:
+    order_by = [Entry.rank.desc()]
+    expected = [
+        entry.id
+        for entry in sorted(await db.scalars(select(Entry)), key=lambda e: (-e.rank, -e.id))
+    ]
+
+    pages, cursor = [], None
+    while True:
+        page = await paginate_cursor(
+            db, select(Entry), CursorParams(cursor=cursor, size=4), order_by
+        )
+        pages.append([entry.id for entry in page.items])
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert [entry_id for ids in pages for entry_id in ids] == expected
+    assert [len(ids) for ids in pages] == [4, 4, 3]
+
+    back = []
+    cursor = page.previous_cursor
+    while cursor is not None:
+        page = await paginate_cursor(
+            db, select(Entry), CursorParams(cursor=cursor, size=4), order_by
+        )
+        back.append([entry.id for entry in page.items])
+        cursor = page.previous_cursor
+    assert back == pages[-2::-1]
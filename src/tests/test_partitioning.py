@@ -0,0 +1,176 @@
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Column, Index, String
+from sqlalchemy.dialects import postgresql
+
+from database.base import BaseModel
+from database.partitioning import (
+    Partition,
+    PartitionedByCreatedAt,
+    ensure_partitions,
+    expire_partitions,
+    list_partitions,
+    next_period,
+    partition_for,
+    period_start,
+)
+
+
+class Visit(PartitionedByCreatedAt, BaseModel):
+    module_name = "test"
+    __partition_interval__ = "day"
+    __partition_retention__ = 2
+    __partition_table_args__ = (
+        Index("ix_tests_visit_path", "path"),
+        {"comment": "Page visits", "info": {"owner": "analytics"}},
+    )
+
+    path = Column(String(200), nullable=False)
+
+
+class FakeConnection:
+    """Answers the partition listing with `bounds` and records every other statement."""
+
+    dialect = postgresql.dialect()
+
+    def __init__(self, bounds: dict[str, str]):
+        self.bounds = bounds
+        self.statements: list[str] = []
+
+    def execute(self, statement, parameters=None):
+        sql = str(statement)
+        if sql.startswith("SELECT child.relname"):
+            assert parameters == {"table": "tests_visit"}
+            return list(self.bounds.items())
+        self.statements.append(sql)
+        return []
+
+
+def _bound(start: str, end: str) -> str:
+    return f"FOR VALUES FROM ('{start}') TO ('{end}')"
+
+
+@pytest.mark.parametrize(
+    ("interval", "expected"),
+    [
+        ("day", datetime(2024, 3, 1, tzinfo=UTC)),
+        ("week", datetime(2024, 2, 26, tzinfo=UTC)),
+        ("month", datetime(2024, 3, 1, tzinfo=UTC)),
+    ],
+)
+def test_period_start_is_in_utc(interval: str, expected: datetime) -> None:
+    # 2024-03-01 01:30 in UTC, still February 29 in New York.
+    moment = datetime(2024, 2, 29, 20, 30, tzinfo=timezone(timedelta(hours=-5)))
+    assert period_start(moment, interval) == expected
+
+
+def test_next_period_rolls_over_months_and_years() -> None:
+    assert next_period(datetime(2024, 1, 31, tzinfo=UTC), "day") == datetime(2024, 2, 1, tzinfo=UTC)
+    assert next_period(datetime(2024, 2, 26, tzinfo=UTC), "week") == datetime(
+        2024, 3, 4, tzinfo=UTC
+    )
+    assert next_period(datetime(2024, 11, 1, tzinfo=UTC), "month") == datetime(
+        2024, 12, 1, tzinfo=UTC
+    )
+    assert next_period(datetime(2024, 12, 1, tzinfo=UTC), "month") == datetime(
+        2025, 1, 1, tzinfo=UTC
+    )
+
+
+def test_partition_names() -> None:
+    start = datetime(2024, 12, 30, tzinfo=UTC)
+    assert partition_for("visit", start, "day").name == "visit_p20241230"
+    assert partition_for("visit", start, "week").name == "visit_p2025w01"
+    assert partition_for("visit", start.replace(day=1), "month").name == "visit_p202412"
+
+
+def test_partitioned_table_layout() -> None:
+    table = Visit.__table__
+    assert [column.name for column in table.primary_key.columns] == ["id", "created_at"]
+    assert table.dialect_options["postgresql"]["partition_by"] == "RANGE (created_at)"
+    assert table.info["partition_interval"] == "day"
+    assert table.info["partition_retention"] == 2
+    assert table.info["owner"] == "analytics"
+    assert table.comment == "Page visits"
+    assert [index.name for index in table.indexes] == ["ix_tests_visit_path"]
+
+
+def test_partitioned_models_cannot_replace_the_table_args() -> None:
+    with pytest.raises(TypeError, match="__partition_table_args__"):
+
+        class Click(PartitionedByCreatedAt, BaseModel):
+            module_name = "test"
+            __table_args__ = (Index("ix_tests_click_target", "target"),)
+
+            target = Column(String(200), nullable=False)
+
+
+def test_list_partitions_parses_bounds() -> None:
+    connection = FakeConnection(
+        {
+            "tests_visit_p20240302": _bound("2024-03-02 00:00:00+00", "2024-03-03 00:00:00+00"),
+            "tests_visit_default": "DEFAULT",
+            "tests_visit_p20240301": _bound("2024-03-01 00:00:00+00", "2024-03-02 00:00:00+00"),
+        }
+    )
+    assert list_partitions(connection, Visit.__table__) == [
+        Partition(
+            "tests_visit_p20240301",
+            datetime(2024, 3, 1, tzinfo=UTC),
+            datetime(2024, 3, 2, tzinfo=UTC),
+        ),
+        Partition(
+            "tests_visit_p20240302",
+            datetime(2024, 3, 2, tzinfo=UTC),
+            datetime(2024, 3, 3, tzinfo=UTC),
+        ),
+    ]
+
+
+def test_ensure_partitions_creates_the_missing_ones() -> None:
+    connection = FakeConnection(
+        {"tests_visit_p20240301": _bound("2024-03-01 00:00:00+00", "2024-03-02 00:00:00+00")}
+    )
+    created = ensure_partitions(
+        connection, Visit.__table__, "day", ahead=2, now=datetime(2024, 3, 1, 12, tzinfo=UTC)
+    )
+
+    assert [partition.name for partition in created] == [
+        "tests_visit_p20240302",
+        "tests_visit_p20240303",
+    ]
+    assert connection.statements[1] == (
+        "ALTER TABLE tests_visit ATTACH PARTITION tests_visit_p20240302 FOR VALUES "
+        "FROM ('2024-03-02T00:00:00+00:00') TO ('2024-03-03T00:00:00+00:00')"
+    )
+
+
+def test_expire_partitions_keeps_the_retention() -> None:
+    connection = FakeConnection(
+        {
+            f"tests_visit_p202403{day:02}": _bound(
+                f"2024-03-{day:02} 00:00:00+00", f"2024-03-{day + 1:02} 00:00:00+00"
+            )
+            for day in range(1, 5)
+        }
+    )
+    expired = expire_partitions(
+        connection,
+        Visit.__table__,
+        retention=2,
+        interval="day",
+        drop=True,
+        now=datetime(2024, 3, 4, 12, tzinfo=UTC),
+    )
+
+    assert [partition.name for partition in expired] == [
+        "tests_visit_p20240301",
+        "tests_visit_p20240302",
+    ]
+    assert connection.statements == [
+        "ALTER TABLE tests_visit DETACH PARTITION tests_visit_p20240301",
+        "DROP TABLE tests_visit_p20240301",
+        "ALTER TABLE tests_visit DETACH PARTITION tests_visit_p20240302",
+        "DROP TABLE tests_visit_p20240302",
+    ]
@@ -0,0 +1,43 @@
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.pool import create_instrumented_engine, render_prometheus, warm_up
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engine() -> AsyncIterator[AsyncEngine]:
+    engine = create_instrumented_engine(
+        "sqlite+aiosqlite://", "primary", pool_size=3, max_overflow=5
+    )
+    yield engine
+    await engine.dispose()
+
+
+async def test_warm_up_is_capped_at_the_pool_size(engine: AsyncEngine) -> None:
+    await warm_up(engine, 10)
+
+    pool = engine.sync_engine.pool
+    assert pool.metrics.connects == 3
+    assert pool.checkedin() == 3
+    assert pool.checkedout() == 0
+
+
+async def test_warm_up_of_nothing_opens_nothing(engine: AsyncEngine) -> None:
+    await warm_up(engine, 0)
+    assert engine.sync_engine.pool.metrics.connects == 0
+
+
+async def test_metrics_render_pool_state(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        metrics = render_prometheus([engine])
+        assert 'db_pool_checked_out{pool="primary"} 1' in metrics
+
+    assert 'db_pool_size{pool="primary"} 3' in metrics
+    assert 'db_pool_connections_opened_total{pool="primary"} 1' in metrics
+    assert 'db_pool_checkout_seconds_count{pool="primary"} 1' in metrics
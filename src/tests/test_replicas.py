@@ -0,0 +1,87 @@
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy import Column, String, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.base import Base, BaseModel
+from database.replicas import Replica, ReplicaSet, RoutingSession, use_primary
+
+pytestmark = pytest.mark.anyio
+
+
+class Note(BaseModel):
+    module_name = "test"
+
+    text = Column(String(50), nullable=False)
+
+
+@pytest.fixture
+async def replica_set() -> AsyncIterator[ReplicaSet]:
+    """A primary and two replicas, each its own empty SQLite database."""
+    engines = [create_async_engine("sqlite+aiosqlite://") for _ in range(3)]
+    for engine in engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Note.__table__])
+    replicas = [Replica(engine=engine, name=f"replica-{n}") for n, engine in enumerate(engines[1:])]
+    yield ReplicaSet(primary=engines[0], replicas=replicas)
+    await engines[0].dispose()
+    for replica in replicas:
+        await replica.engine.dispose()
+
+
+def _session(replica_set: ReplicaSet) -> AsyncSession:
+    routing = type("Routing", (RoutingSession,), {"replica_set": replica_set})
+    return AsyncSession(sync_session_class=routing)
+
+
+def _bind(session: AsyncSession, statement=None) -> Engine:
+    return session.sync_session.get_bind(clause=statement)
+
+
+async def test_choose_rotates_over_healthy_replicas(replica_set: ReplicaSet) -> None:
+    first, second = (replica.engine for replica in replica_set.replicas)
+    assert [replica_set.choose() for _ in range(4)] == [first, second, first, second]
+
+    replica_set.replicas[0].healthy = False
+    assert [replica_set.choose() for _ in range(2)] == [second, second]
+
+    replica_set.replicas[1].healthy = False
+    assert replica_set.choose() is replica_set.primary
+
+
+async def test_use_primary_skips_replicas(replica_set: ReplicaSet) -> None:
+    token = use_primary.set(True)
+    try:
+        assert replica_set.choose() is replica_set.primary
+    finally:
+        use_primary.reset(token)
+
+
+async def test_reads_stay_on_one_replica(replica_set: ReplicaSet) -> None:
+    async with _session(replica_set) as session:
+        bind = _bind(session, select(Note))
+        assert bind is not replica_set.primary.sync_engine
+        assert all(_bind(session, select(Note)) is bind for _ in range(3))
+
+
+async def test_flush_pins_the_session_to_the_primary(replica_set: ReplicaSet) -> None:
+    async with _session(replica_set) as session:
+        assert (await session.scalars(select(Note.text))).all() == []
+
+        session.add(Note(text="written"))
+        await session.flush()
+
+        assert _bind(session, select(Note)) is replica_set.primary.sync_engine
+        # The replica never saw the write, so this read can only come from the primary.
+        assert (await session.scalars(select(Note.text))).all() == ["written"]
+
+
+async def test_select_for_update_pins_the_session_to_the_primary(
+    replica_set: ReplicaSet,
+) -> None:
+    async with _session(replica_set) as session:
+        assert _bind(session, select(Note)) is not replica_set.primary.sync_engine
+        assert _bind(session, select(Note).with_for_update()) is replica_set.primary.sync_engine
+        assert _bind(session, select(Note)) is replica_set.primary.sync_engine
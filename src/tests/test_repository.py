@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import Column, Integer, String, UniqueConstraint, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import BaseModel
+from repositories.base import BaseRepository
+
+pytestmark = pytest.mark.anyio
+
+
+class Gadget(BaseModel):
+    module_name = "test"
+    __table_args__ = (UniqueConstraint("sku"),)
+
+    sku = Column(String(20), nullable=False)
+    stock = Column(Integer, nullable=False)
+
+
+class GadgetRepository(BaseRepository[Gadget]):
+    model = Gadget
+
+
+@pytest.fixture
+async def db(make_db) -> AsyncSession:
+    return await make_db(Gadget)
+
+
+async def test_insert_many_returns_ids_in_input_order(db: AsyncSession) -> None:
+    repository = GadgetRepository(db)
+    await repository.insert_many([{"sku": "first", "stock": 0}])
+    rows = [{"sku": f"sku-{n}", "stock": n} for n in range(7)]
+
+    ids = await repository.insert_many(reversed(rows), batch_size=3, returning=True)
+
+    assert len(ids) == len(rows)
+    skus = dict((await db.execute(select(Gadget.id, Gadget.sku))).tuples().all())
+    assert [skus[gadget_id] for gadget_id in ids] == [row["sku"] for row in reversed(rows)]
+
+
+async def test_insert_many_without_returning(db: AsyncSession) -> None:
+    repository = GadgetRepository(db)
+    assert await repository.insert_many([{"sku": "a", "stock": 1}, {"sku": "b", "stock": 2}]) == []
+    assert await db.scalar(select(Gadget.stock).where(Gadget.sku == "b")) == 2
+
+
+async def test_upsert_many_updates_existing_rows(db: AsyncSession) -> None:
+    repository = GadgetRepository(db)
+    await repository.insert_many([{"sku": "a", "stock": 1}, {"sku": "b", "stock": 2}])
+
+    rows = [{"sku": "b", "stock": 20}, {"sku": "c", "stock": 30}, {"sku": "a", "stock": 10}]
+    assert await repository.upsert_many(rows, ["sku"], batch_size=2) == 3
+
+    stock = dict((await db.execute(select(Gadget.sku, Gadget.stock))).tuples().all())
+    assert stock == {"a": 10, "b": 20, "c": 30}
+
+
+async def test_upsert_many_without_update_columns_keeps_existing_rows(db: AsyncSession) -> None:
+    repository = GadgetRepository(db)
+    await repository.insert_many([{"sku": "a", "stock": 1}])
+
+    rows = [{"sku": "a", "stock": 10}, {"sku": "b", "stock": 2}]
+    assert await repository.upsert_many(rows, ["sku"], update_columns=[]) == 1
+
+    stock = dict((await db.execute(select(Gadget.sku, Gadget.stock))).tuples().all())
+    assert stock == {"a": 1, "b": 2}
+
+
+async def test_update_many_touches_every_row(db: AsyncSession) -> None:
+    repository = GadgetRepository(db)
+    ids = await repository.insert_many(
+        [{"sku": f"sku-{n}", "stock": n} for n in range(5)], returning=True
+    )
+
+    assert await repository.update_many(ids[:3], {"stock": 0}, batch_size=2) == 3
+    stock = (await db.scalars(select(Gadget.stock).order_by(Gadget.id))).all()
+    assert stock == [0, 0, 0, 3, 4]
@@ -0,0 +1,103 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import fakeredis
+import pytest
+from asynctasq import task
+
+from services.results import RecordingTaskExecutor, ResultBackend
+from services.tasks import echo_message_task
+
+pytestmark = pytest.mark.anyio
+
+
+@task(queue="default")
+async def failing_task() -> None:
+    raise RuntimeError("boom")
+
+
+@pytest.fixture
+async def results() -> AsyncIterator[ResultBackend]:
+    results = ResultBackend(fakeredis.FakeAsyncRedis())
+    await results.start()
+    yield results
+    await results.close()
+
+
+async def test_unknown_tasks_are_pending(results: ResultBackend) -> None:
+    state = await results.get("missing")
+    assert (state.status, state.done) == ("pending", False)
+
+
+async def test_wait_returns_once_the_task_is_final(results: ResultBackend) -> None:
+    waiting = asyncio.create_task(results.wait("t1", timeout=5))
+    await asyncio.sleep(0.05)
+    await results.record("t1", "running")
+    await results.record("t1", "succeeded", result={"n": 1})
+
+    state = await waiting
+    assert (state.status, state.result) == ("succeeded", {"n": 1})
+    assert await results.client.ttl(results.key("t1")) == results.ttl
+
+
+async def test_wait_times_out_with_the_latest_state(results: ResultBackend) -> None:
+    await results.record("t2", "running")
+    assert (await results.wait("t2", timeout=0.1)).status == "running"
+
+
+async def test_malformed_messages_do_not_stop_the_listener(results: ResultBackend) -> None:
+    waiting = asyncio.create_task(results.wait("t6", timeout=5))
+    await asyncio.sleep(0.05)
+    await results.client.publish(results._channel, b"not a task result")
+    await results.record("t6", "succeeded")
+
+    assert (await waiting).status == "succeeded"
+    assert not results._listener.done()
+
+
+async def test_stream_yields_each_change(results: ResultBackend) -> None:
+    async def record() -> None:
+        await asyncio.sleep(0.05)
+        for status in ("running", "retrying", "running", "failed"):
+            await results.record("t3", status, error="boom" if status == "failed" else None)
+
+    recording = asyncio.create_task(record())
+    statuses = [state.status async for state in results.stream("t3", timeout=5)]
+    await recording
+    assert statuses == ["pending", "running", "retrying", "running", "failed"]
+
+
+async def test_executor_records_the_result(results: ResultBackend) -> None:
+    echo = echo_message_task(message="hi")
+    echo._task_id = "t4"
+    await RecordingTaskExecutor(results).execute(echo)
+
+    state = await results.get("t4")
+    assert (state.status, state.result) == ("succeeded", "processed: hi")
+
+
+@pytest.mark.parametrize(("max_attempts", "status"), [(1, "failed"), (3, "retrying")])
+async def test_executor_records_the_failure(
+    results: ResultBackend, max_attempts: int, status: str
+) -> None:
+    failing = failing_task().max_attempts(max_attempts)
+    failing._task_id = "t5"
+    failing.mark_attempt_started()  # as the worker does
+    with pytest.raises(RuntimeError):
+        await RecordingTaskExecutor(results).execute(failing)
+
+    state = await results.get("t5")
+    assert (state.status, state.error) == (status, "RuntimeError: boom")
+
+
+async def test_claims_work_on_redis_6() -> None:
+    results = ResultBackend(fakeredis.FakeAsyncRedis(version=6))
+    assert await results.claim("rebuild", "t1", window=60, coalesce=True) is None
+    assert await results.claim("rebuild", "t2", window=60, coalesce=True) == "t1"
+    assert 0 < await results.client.pttl(results.dedup_key("rebuild")) <= 60_000
+    assert not await results.client.exists(results.coalesce_key("t2"))
+
+    await results.record("t1", "running")  # frees the coalesced key
+    assert await results.claim("rebuild", "t3", window=60) is None
+    await results.release("rebuild", "t3")
+    assert not await results.client.exists(results.dedup_key("rebuild"))
@@ -0,0 +1,89 @@
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy import Column, String, event, select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from database import session as db_session
+from database.base import Base, BaseModel
+from database.replicas import ReplicaSet
+
+pytestmark = pytest.mark.anyio
+
+
+class Memo(BaseModel):
+    module_name = "test"
+
+    text = Column(String(50), nullable=False)
+
+
+@pytest.fixture
+async def engine(monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[AsyncEngine]:
+    """Point `get_db` at an in-memory SQLite database."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Memo.__table__])
+    monkeypatch.setattr(
+        db_session, "AsyncLocalSession", async_sessionmaker(engine, expire_on_commit=False)
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def checkouts(engine: AsyncEngine) -> list[object]:
+    """The connections checked out of the engine's pool from now on."""
+    checked_out: list[object] = []
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def record(dbapi_connection, connection_record, connection_proxy) -> None:
+        checked_out.append(dbapi_connection)
+
+    return checked_out
+
+
+async def _memos(engine: AsyncEngine) -> list[str]:
+    async with AsyncSession(engine) as session:
+        return list(await session.scalars(select(Memo.text)))
+
+
+async def test_unused_session_never_checks_out_a_connection(checkouts: list[object]) -> None:
+    async for session in db_session.get_db():
+        assert not session.in_transaction()
+    assert checkouts == []
+
+
+async def test_writes_are_committed_at_the_end(
+    engine: AsyncEngine, checkouts: list[object]
+) -> None:
+    async for session in db_session.get_db():
+        session.add(Memo(text="kept"))
+        await session.flush()
+        assert session.in_transaction()
+    assert len(checkouts) == 1
+    assert await _memos(engine) == ["kept"]
+
+
+async def test_errors_roll_back(engine: AsyncEngine) -> None:
+    dependency = db_session.get_db()
+    session = await anext(dependency)
+    session.add(Memo(text="dropped"))
+    await session.flush()
+    with pytest.raises(RuntimeError):
+        await dependency.athrow(RuntimeError("handler failed"))
+    assert await _memos(engine) == []
+
+
+async def test_autocommit_reads_share_the_pool(engine: AsyncEngine) -> None:
+    replica_set = ReplicaSet(primary=engine, autocommit_reads=True)
+    read_engine = replica_set.read_engine()
+    assert read_engine.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+    assert read_engine.pool is engine.sync_engine.pool
+    assert replica_set.read_engine() is read_engine
+
+    assert ReplicaSet(primary=engine).read_engine() is engine.sync_engine
@@ -0,0 +1,133 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+    delete,
+    event,
+    select,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import relationship
+from sqlalchemy.schema import CreateIndex
+
+from database.base import BaseModelWithDeleted
+
+pytestmark = pytest.mark.anyio
+
+
+class Board(BaseModelWithDeleted):
+    module_name = "test"
+    __table_args__ = (
+        Index("ix_tests_board_title", "title", unique=True),
+        Index("ix_tests_board_all_titles", "title", info={"include_deleted": True}),
+        UniqueConstraint("code", info={"include_deleted": True}),
+    )
+
+    title = Column(String(50), nullable=False)
+    slug = Column(String(50), unique=True)
+    code = Column(String(50))
+    cards = relationship("Card", lazy="selectin")
+
+
+Index("ix_tests_board_created_at", Board.created_at)
+
+
+class Card(BaseModelWithDeleted):
+    module_name = "test"
+
+    board_id = Column(ForeignKey(Board.id), nullable=False)
+    text = Column(String(50), nullable=False)
+
+
+@pytest.fixture
+async def session(make_db) -> tuple[AsyncSession, list[str]]:
+    """A session on a fresh SQLite database, with the statements it runs."""
+    db = await make_db(Board, Card)
+    db.add_all([Board(id=1, title="first"), Board(id=2, title="second")])
+    db.add_all([Card(id=1, board_id=1, text="live"), Card(id=2, board_id=1, text="gone")])
+    await db.commit()
+
+    statements: list[str] = []
+
+    @event.listens_for(db.bind.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    return db, statements
+
+
+async def test_session_delete_becomes_update(session: tuple[AsyncSession, list[str]]) -> None:
+    db, statements = session
+    board = await db.get(Board, 1)
+    await db.delete(board)
+    await db.commit()
+
+    assert not any(statement.startswith("DELETE") for statement in statements)
+    assert any(statement.startswith("UPDATE tests_board SET") for statement in statements)
+    deleted = await db.scalar(
+        select(Board).where(Board.id == 1).execution_options(include_deleted=True)
+    )
+    assert deleted is not None and deleted.deleted_at is not None
+
+
+async def test_orm_delete_statement_becomes_update(
+    session: tuple[AsyncSession, list[str]],
+) -> None:
+    db, statements = session
+    await db.execute(delete(Board).where(Board.title == "second"))
+    await db.commit()
+
+    assert not any(statement.startswith("DELETE") for statement in statements)
+    assert (await db.scalars(select(Board.title))).all() == ["first"]
+
+
+async def test_hard_delete_removes_rows(session: tuple[AsyncSession, list[str]]) -> None:
+    db, statements = session
+    await db.execute(delete(Board).where(Board.id == 2).execution_options(hard_delete=True))
+    await db.commit()
+
+    assert any(statement.startswith("DELETE FROM tests_board") for statement in statements)
+    assert await db.get(Board, 2, execution_options={"include_deleted": True}) is None
+
+
+async def test_deleted_rows_are_filtered_out(session: tuple[AsyncSession, list[str]]) -> None:
+    db, _ = session
+    await db.delete(await db.get(Card, 2))
+    await db.commit()
+    db.expunge_all()
+
+    assert (await db.scalars(select(Card.text))).all() == ["live"]
+    board = await db.scalar(select(Board).where(Board.id == 1))
+    assert [card.text for card in board.cards] == ["live"]
+    included = await db.scalars(select(Card.text).execution_options(include_deleted=True))
+    assert sorted(included.all()) == ["gone", "live"]
+
+
+def test_indexes_only_cover_live_rows() -> None:
+    indexes = {
+        index.name: str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+        for index in Board.__table__.indexes
+    }
+    assert indexes["ix_tests_board_title"].endswith("(title) WHERE deleted_at IS NULL")
+    assert indexes["ix_tests_board_all_titles"].endswith("(title)")
+    # `unique=True` columns get a partial unique index instead of a constraint.
+    assert indexes["uq_tests_board_slug"] == (
+        "CREATE UNIQUE INDEX uq_tests_board_slug ON tests_board (slug) WHERE deleted_at IS NULL"
+    )
+    assert indexes["ix_tests_board_created_at"].endswith("WHERE deleted_at IS NULL")
+    unique = [c for c in Board.__table__.constraints if isinstance(c, UniqueConstraint)]
+    assert [column.name for constraint in unique for column in constraint.columns] == ["code"]
+
+
+def test_models_do_not_import_alembic() -> None:
+    # In a fresh interpreter, as the test session itself may have imported it.
+    code = "import sys, database.base, repositories; assert 'alembic' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parents[1], check=True)
@@ -0,0 +1,138 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import fakeredis
+import pytest
+from asynctasq.drivers.redis_driver import RedisDriver
+
+from config.settings import QueueSettings, get_setting
+from services.dispatch import dispatch_many
+from services.results import RecordingTaskExecutor, ResultBackend
+from services.routing import route_for, task
+from services.tasks import echo_message_task
+from services.worker import WeightedQueueWorker
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingWorker(WeightedQueueWorker):
+    """Runs nothing: records the payloads it starts, each holding its slot until released."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started: list[bytes] = []
+        self.finish = asyncio.Event()
+
+    async def _process_task(self, task_data: bytes, queue_name: str) -> None:
+        self.started.append(task_data)
+        self._tasks_processed += 1
+        await self.finish.wait()
+
+
+@pytest.fixture
+async def driver() -> AsyncIterator[RedisDriver]:
+    driver = RedisDriver()
+    driver.client = fakeredis.FakeAsyncRedis()
+    yield driver
+    if driver.client is not None:  # a worker run disconnects it
+        await driver.client.aclose()
+
+
+async def _enqueue(driver: RedisDriver, queue: str, count: int) -> None:
+    for n in range(count):
+        await driver.enqueue(queue, f"{queue}-{n}".encode())
+
+
+async def _run_until(worker: RecordingWorker, condition, settle: float = 0) -> None:
+    """Run the worker's loop until `condition` holds, then `settle` seconds more."""
+    worker._running = True
+    running = asyncio.create_task(worker._run())
+    try:
+        async with asyncio.timeout(5):
+            while not condition():
+                await asyncio.sleep(0.01)
+        await asyncio.sleep(settle)
+    finally:
+        worker._running = False
+        worker.finish.set()
+        await running
+
+
+def test_picks_interleave_by_priority() -> None:
+    worker = WeightedQueueWorker(
+        RedisDriver(),
+        {"high": QueueSettings(priority=4), "low": QueueSettings(priority=1)},
+    )
+    picks = [worker._pick(["high", "low"]) for _ in range(10)]
+    assert picks == ["high", "high", "low", "high", "high"] * 2
+
+
+async def test_backlogged_queues_share_the_slots_by_priority(driver: RedisDriver) -> None:
+    await _enqueue(driver, "high", 10)
+    await _enqueue(driver, "low", 10)
+    worker = RecordingWorker(
+        driver,
+        {"high": QueueSettings(priority=2), "low": QueueSettings(priority=1)},
+    )
+    await _run_until(worker, lambda: len(worker.started) == 20)
+
+    queues = [task_data.split(b"-")[0] for task_data in worker.started]
+    # Two picks for one while both are backlogged; then "low" gets every slot.
+    assert queues == [b"high", b"low", b"high"] * 5 + [b"low"] * 5
+
+
+async def test_queue_concurrency_is_capped(driver: RedisDriver) -> None:
+    await _enqueue(driver, "bulk", 5)
+    await _enqueue(driver, "urgent", 1)
+    worker = RecordingWorker(
+        driver,
+        {"bulk": QueueSettings(priority=10, concurrency=2), "urgent": QueueSettings()},
+    )
+    # The settling time would let the worker start more tasks, were the caps not enforced.
+    await _run_until(worker, lambda: len(worker.started) == 3, settle=0.2)
+
+    assert sorted(worker.started) == [b"bulk-0", b"bulk-1", b"urgent-0"]
+    assert await driver.client.llen("queue:bulk") == 3
+
+
+async def test_worker_runs_dispatched_tasks_end_to_end(driver: RedisDriver) -> None:
+    # Exercises the asynctasq internals we build on (the worker loop, the executor hook, task
+    # ids and serialization), set up as `cmd.worker` does, against the pinned version.
+    results = ResultBackend(fakeredis.FakeAsyncRedis())
+    tasks = [echo_message_task(message=f"message {n}") for n in range(3)]
+    for queued in tasks:
+        queued.config["driver"] = driver
+    task_ids = await dispatch_many(tasks)
+
+    worker = WeightedQueueWorker(driver, {"default": QueueSettings()}, max_tasks=3)
+    worker._task_executor = RecordingTaskExecutor(results)
+    policy = asyncio.get_event_loop_policy()
+    try:
+        async with asyncio.timeout(5):
+            await worker.start()
+        states = [await results.get(task_id) for task_id in task_ids]
+    finally:
+        asyncio.set_event_loop_policy(policy)  # `start` switches to uvloop when installed
+        await results.close()
+
+    assert [(state.status, state.result) for state in states] == [
+        ("succeeded", f"processed: message {n}") for n in range(3)
+    ]
+
+
+def test_tasks_are_routed_by_pattern(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = get_setting("asynctasq")
+    monkeypatch.setattr(
+        settings, "ASYNCTASQ_QUEUES", {"default": QueueSettings(), "mail": QueueSettings()}
+    )
+    monkeypatch.setattr(
+        settings, "ASYNCTASQ_TASK_ROUTES", {"services.mail.*": "mail", "*.send_*": "missing"}
+    )
+
+    assert route_for("services.mail.send_welcome") == "mail"
+    assert route_for("services.tasks.echo") == "default"
+
+    async def send_report() -> None: ...
+
+    with pytest.raises(ValueError, match="undeclared queue 'missing'"):
+        task()(send_report)